@@ -0,0 +1,114 @@
+"""
+Бенчмарк памяти Redis под краткосрочную историю: сколько занимает история одного активного пользователя.
+
+Моделирует `--users` пользователей по `--turns` ходов диалога (ответы бота разной длины,
+в том числе очень длинные) и сравнивает три схемы хранения:
+- `legacy` — прежняя: строки "User: ..." / "Bot: ...", LPUSH + LTRIM до 10 записей, без TTL;
+- `structured` — записи `HistoryCodec` без сжатия, обрезка по бюджету токенов, скользящий TTL;
+- `structured+zlib` — то же со сжатием записей от `--compress-min-bytes` байт.
+
+Для каждой схемы выводится среднее MEMORY USAGE ключа истории, количество записей,
+оценка токенов истории (то, что попадает в контекст модели) и TTL ключа.
+
+Запуск из корня проекта (нужен локальный Redis):
+    python -m benchmarks.history_memory [--redis-url redis://localhost:6379/15] [--users 200] [--turns 30]
+        [--token-budget 1500] [--max-entries 20] [--compress-min-bytes 512]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+
+from bot.services.memory_services import TemporaryMemoryService
+from core.utils.history import HistoryCodec
+from database.redis.manager import RedisManager
+
+
+WORDS = (
+    "привет как дела сегодня вчера завтра работа учёба проект модель память контекст ответ вопрос "
+    "спасибо хорошо отлично интересно подробнее пример код функция данные запрос пользователь бот"
+).split()
+
+# Длина ответа бота (слов) и её вероятность: короткие, обычные, длинные и очень длинные ответы
+REPLY_LENGTHS = ((8, 0.4), (40, 0.35), (150, 0.2), (900, 0.05))
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_dialog(seed: int, turns: int) -> list:
+    rng = random.Random(seed)
+    lengths, weights = zip(*REPLY_LENGTHS)
+    return [
+        (make_text(rng, rng.randint(3, 20)), make_text(rng, rng.choices(lengths, weights)[0]))
+        for _ in range(turns)
+    ]
+
+
+async def legacy_turn(user_id: int, user_text: str, bot_reply: str) -> None:
+    client = RedisManager.get_client()
+    key = f"chat:{user_id}:history"
+    await client.lrange(key, 0, 9)
+    for text in (f"User: {user_text}", f"Bot: {bot_reply}"):
+        await client.lpush(key, text)
+        await client.ltrim(key, 0, 9)
+
+
+async def structured_turn(user_id: int, user_text: str, bot_reply: str) -> None:
+    await TemporaryMemoryService.get(user_id)
+    await TemporaryMemoryService.save(user_id, user_text, bot_reply)
+
+
+async def measure(name: str, turn, first_user: int, users: int, turns: int) -> None:
+    client = RedisManager.get_binary_client()
+    for user_id in range(first_user, first_user + users):
+        for user_text, bot_reply in make_dialog(user_id - first_user, turns):
+            await turn(user_id, user_text, bot_reply)
+
+    usage, entries, tokens, ttls = [], [], [], []
+    for user_id in range(first_user, first_user + users):
+        key = f"chat:{user_id}:history"
+        usage.append(await client.memory_usage(key, samples=0))
+        raw = await client.lrange(key, 0, -1)
+        entries.append(len(raw))
+        tokens.append(sum(HistoryCodec.decode(entry).tokens for entry in raw))
+        ttls.append(await client.ttl(key))
+    print(
+        f"{name:<16} {statistics.mean(usage):9.0f} B/user  {statistics.mean(entries):5.1f} entries  "
+        f"{statistics.mean(tokens):7.0f} tokens  ttl {min(ttls)}"
+    )
+    await client.delete(*(f"chat:{user_id}:history" for user_id in range(first_user, first_user + users)))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--token-budget", type=int, default=1500)
+    parser.add_argument("--max-entries", type=int, default=20)
+    parser.add_argument("--compress-min-bytes", type=int, default=512)
+    args = parser.parse_args()
+
+    RedisManager.init(args.redis_url)
+    await RedisManager.get_client().ping()
+    TemporaryMemoryService.init(
+        token_budget=args.token_budget,
+        max_entries=args.max_entries,
+        ttl=7 * 24 * 60 * 60,
+        max_entry_tokens=300
+    )
+
+    await measure("legacy", legacy_turn, 0, args.users, args.turns)
+    HistoryCodec.init(compress_min_bytes=0)
+    await measure("structured", structured_turn, args.users, args.users, args.turns)
+    HistoryCodec.init(compress_min_bytes=args.compress_min_bytes)
+    await measure("structured+zlib", structured_turn, 2 * args.users, args.users, args.turns)
+
+    await RedisManager.get_client().aclose()
+    await RedisManager.get_binary_client().aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Бенчмарк загрузки словарей: разбор YAML + pymorphy3 против скомпилированного артефакта.
+
+Каждый замер выполняется в новом процессе (как при старте бота или процесса-обработчика webhook):
+- `yaml + pymorphy` — прежняя работа при импорте `core.lexicon`: разбор всех YAML,
+  загрузка pymorphy3 и нормализация плохих слов (`compile_lexicons`);
+- `artifact` — чтение готового артефакта с проверкой хэшей исходников (`load_lexicons`);
+- `import main (cold)` / `import main (warm)` — полный импорт приложения без артефакта
+  (он собирается при старте) и с готовым артефактом.
+
+Модуль `core/lexicon/compiled.py` загружается по пути к файлу, чтобы первые два замера
+не включали импорт остальных пакетов проекта.
+
+Запуск из корня проекта:
+    python -m benchmarks.lexicon_import [--runs 7]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from core.lexicon.compiled import ARTIFACT_PATH, load_lexicons
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LOAD_MODULE = f"""
+import importlib.util, time
+spec = importlib.util.spec_from_file_location("compiled", {str(ROOT / "core/lexicon/compiled.py")!r})
+compiled = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(compiled)
+start = time.perf_counter()
+"""
+
+SCRIPTS = {
+    "yaml + pymorphy": LOAD_MODULE + "compiled.compile_lexicons(compiled.source_hashes())",
+    "artifact": LOAD_MODULE + "compiled.load_lexicons()",
+    "import main (cold)": "import time\nstart = time.perf_counter()\nimport main",
+    "import main (warm)": "import time\nstart = time.perf_counter()\nimport main",
+}
+
+
+def measure(script: str, cold: bool) -> float:
+    if cold:
+        ARTIFACT_PATH.unlink(missing_ok=True)
+    output = subprocess.run(
+        [sys.executable, "-c", script + "\nprint((time.perf_counter() - start) * 1000)"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    load_lexicons()
+    for name, script in SCRIPTS.items():
+        timings = [measure(script, cold=name.endswith("(cold)")) for _ in range(args.runs)]
+        print(f"{name:<20} median {statistics.median(timings):8.1f} ms   min {min(timings):8.1f} ms")
+    load_lexicons()
+
+
+if __name__ == "__main__":
+    main()
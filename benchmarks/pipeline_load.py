@@ -0,0 +1,389 @@
+"""
+Нагрузочный тест полного конвейера `handle_other_messages` на локальных заменах внешних сервисов.
+
+Диспетчер и все сервисы бота создаются через `setup_bot` (middleware почтовых ящиков,
+кэши, фоновая запись памяти), а внешние зависимости подменяются:
+- OpenAI — локальный stub-сервер (`/v1/chat/completions`, в том числе потоковый, и `/v1/embeddings`)
+  с логнормальным распределением задержек, заданным медианой и sigma (`--chat-latency 800:0.4`);
+- Telegram — сессия aiogram без сети с собственной задержкой ответа;
+- PostgreSQL и Redis — локальные экземпляры из .env-файла (`--env`).
+
+`--users` синтетических пользователей активируются и одновременно отправляют по `--messages`
+сообщений через `Dispatcher.feed_raw_update`. Отчёт: пропускная способность,
+p50 / p95 / p99 полного времени обработки апдейта и каждого этапа `stage_timer`,
+количество вызовов API OpenAI и Telegram на сообщение и число отклонённых апдейтов.
+Созданные пользователи, их память и ключи Redis, а также появившиеся за прогон записи кэша ответов,
+ключи кэшей embedding и решений AI-фильтра удаляются после прогона. Журнал решений AI-фильтра
+пишется во временный каталог.
+
+Запуск из корня проекта:
+    python -m benchmarks.pipeline_load --env .env.bench [--users 50] [--messages 10] \\
+        [--chat-latency 800:0.4] [--filter-latency 300:0.3] [--embedding-latency 120:0.3] \\
+        [--telegram-latency 40:0.3] [--important-rate 0.5] [--unique-rate 0.7] [--stream]
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import asyncpg
+import numpy as np
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import EditMessageText, SendMessage, TelegramMethod
+from aiohttp import web
+from openai import AsyncOpenAI
+from redis.asyncio import Redis
+
+from bot.lexicon import BOT_LEXICON
+from bot.middlewares import TelegramTimingMiddleware
+from bot.setup import setup_bot, shutdown_bot
+from core.config import load_config
+from core.utils.enums import OpenAiModels
+from core.utils.timing import add_stage_observer, remove_stage_observer
+from database.postgres.repositories import UsersRepository
+
+
+EMBEDDING_DIM = 1536
+
+# Ключи общих кэшей Redis, которые заполняются ответами заглушки
+CACHE_KEY_PATTERNS = ("embedding:*", "verdict:*")
+
+FACTS = [
+    "меня зовут {name} и я живу в {city}",
+    "я работаю {job} уже {years} лет",
+    "у меня есть собака по кличке {name}",
+    "я учусь в университете в {city} на {job}",
+]
+QUESTIONS = [
+    "как думаешь, стоит ли переехать в {city}?",
+    "расскажи что-нибудь интересное про {topic}",
+    "что почитать про {topic} в этом году?",
+]
+SMALL_TALK = ["привет", "спасибо", "хахаха ну ты даёшь", "ок"]
+WORDS = {
+    "name": ["Ира", "Макс", "Лёша", "Оля", "Бобик"],
+    "city": ["Казани", "Москве", "Питере", "Томске"],
+    "job": ["программистом", "дизайнером", "врачом", "учителем"],
+    "years": ["два", "пять", "десять"],
+    "topic": ["космос", "историю Рима", "нейросети", "шахматы"],
+}
+
+
+class Latency:
+    """Логнормальное распределение задержки, заданное строкой "медиана_мс:sigma"."""
+
+    def __init__(self, spec: str):
+        median, _, sigma = spec.partition(":")
+        self.median = float(median) / 1000
+        self.sigma = float(sigma or 0)
+
+    def sample(self) -> float:
+        return self.median * math.exp(self.sigma * random.gauss(0, 1))
+
+
+class StubOpenAI:
+    """Локальный HTTP-сервер, отвечающий в формате OpenAI API с заданными задержками."""
+
+    def __init__(
+        self,
+        chat_latency: Latency,
+        filter_latency: Latency,
+        embedding_latency: Latency,
+        filter_model: str,
+        important_rate: float,
+        reply_words: int
+    ):
+        self.chat_latency = chat_latency
+        self.filter_latency = filter_latency
+        self.embedding_latency = embedding_latency
+        self.filter_model = filter_model
+        self.important_rate = important_rate
+        self.reply_words = reply_words
+        self.calls: Counter = Counter()
+
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_post("/v1/embeddings", self.embeddings)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body["model"]
+        self.calls[f"chat.completions[{model}]"] += 1
+
+        if model == self.filter_model:
+            await asyncio.sleep(self.filter_latency.sample())
+            content = "да" if random.random() < self.important_rate else "нет"
+        else:
+            content = " ".join(["ответ"] * self.reply_words)
+
+        if not body.get("stream"):
+            if model != self.filter_model:
+                await asyncio.sleep(self.chat_latency.sample())
+            return web.json_response({
+                "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content}
+                }]
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        words = content.split(" ")
+        delay = self.chat_latency.sample() / len(words)
+        for i, word in enumerate(words):
+            await asyncio.sleep(delay)
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": None, "delta": {"content": word if not i else " " + word}}]
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.calls["embeddings"] += 1
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await asyncio.sleep(self.embedding_latency.sample())
+
+        data = []
+        for index, text in enumerate(inputs):
+            seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+            vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM, dtype=np.float32)
+            vector /= np.linalg.norm(vector)
+            embedding = (
+                base64.b64encode(vector.tobytes()).decode()
+                if body.get("encoding_format") == "base64" else vector.tolist()
+            )
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        return web.json_response({
+            "object": "list", "model": body["model"], "data": data,
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}
+        })
+
+
+class FakeTelegramSession(BaseSession):
+    """Сессия aiogram без сети: отвечает успешным результатом после заданной задержки."""
+
+    def __init__(self, latency: Latency):
+        super().__init__()
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.busy_replies = 0
+        self._message_id = 0
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls[method.__api_method__] += 1
+        await asyncio.sleep(self.latency.sample())
+
+        result: Any = True
+        if isinstance(method, (SendMessage, EditMessageText)):
+            if method.text == BOT_LEXICON["bot"]["messages"]["busy"]:
+                self.busy_replies += 1
+            self._message_id += 1
+            result = {
+                "message_id": getattr(method, "message_id", None) or self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": method.chat_id, "type": "private"},
+                "text": method.text
+            }
+
+        content = json.dumps({"ok": True, "result": result})
+        return self.check_response(bot=bot, method=method, status_code=200, content=content).result
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def make_message(rng: random.Random, unique_rate: float) -> str:
+    kind = rng.random()
+    templates = FACTS if kind < 0.4 else QUESTIONS if kind < 0.8 else SMALL_TALK
+    text = rng.choice(templates).format(**{key: rng.choice(values) for key, values in WORDS.items()})
+    if templates is not SMALL_TALK and rng.random() < unique_rate:
+        text += f" ({rng.randrange(10 ** 9)})"
+    return text
+
+
+def make_update(update_id: int, user_id: int, text: str) -> Dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(datetime.now().timestamp()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+            "text": text
+        }
+    }
+
+
+def percentiles(values: List[float]) -> str:
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return f"p50 {p50:8.1f} ms   p95 {p95:8.1f} ms   p99 {p99:8.1f} ms"
+
+
+async def run_user(dp, bot: Bot, user_id: int, texts: List[str], first_update_id: int, latencies: List[float]) -> None:
+    for offset, text in enumerate(texts):
+        start = time.perf_counter()
+        await dp.feed_raw_update(bot, make_update(first_update_id + offset, user_id, text))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def snapshot(config) -> Dict[str, Any]:
+    """Запоминает состояние общих кэшей до прогона, чтобы `cleanup` удалил только созданное тестом."""
+    connection = await asyncpg.connect(config.postgres.dsn)
+    last_response_id = await connection.fetchval("SELECT coalesce(max(id), 0) FROM response_cache")
+    await connection.close()
+
+    redis = Redis.from_url(config.redis_url)
+    keys = {key for pattern in CACHE_KEY_PATTERNS async for key in redis.scan_iter(match=pattern, count=1000)}
+    await redis.aclose()
+    return {"last_response_id": last_response_id, "cache_keys": keys}
+
+
+async def cleanup(config, user_ids: List[int], before: Optional[Dict[str, Any]]) -> None:
+    """
+    Удаляет созданных пользователей, их память и ключи Redis, а если есть снимок `snapshot` —
+    ещё и записи кэша ответов и ключи кэшей embedding и решений AI-фильтра, появившиеся
+    за время прогона (иначе ответы заглушки попали бы в кэши бота).
+    """
+    connection = await asyncpg.connect(config.postgres.dsn)
+    await connection.execute("DELETE FROM users_memories WHERE user_id = ANY($1::bigint[])", user_ids)
+    await connection.execute("DELETE FROM users WHERE id = ANY($1::bigint[])", user_ids)
+    if before is not None:
+        await connection.execute("DELETE FROM response_cache WHERE id > $1", before["last_response_id"])
+    await connection.close()
+
+    redis = Redis.from_url(config.redis_url)
+    keys = [f"chat:{user_id}:history" for user_id in user_ids] + [f"user:{user_id}:active" for user_id in user_ids]
+    if before is not None:
+        keys += [
+            key for pattern in CACHE_KEY_PATTERNS async for key in redis.scan_iter(match=pattern, count=1000)
+            if key not in before["cache_keys"]
+        ]
+    await redis.delete(*keys)
+    await redis.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--env", default=None, help=".env с локальными PostgreSQL и Redis")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--chat-latency", default="800:0.4")
+    parser.add_argument("--filter-latency", default="300:0.3")
+    parser.add_argument("--embedding-latency", default="120:0.3")
+    parser.add_argument("--telegram-latency", default="40:0.3")
+    parser.add_argument("--important-rate", type=float, default=0.5)
+    parser.add_argument("--unique-rate", type=float, default=0.7)
+    parser.add_argument("--reply-words", type=int, default=60)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--user-id-base", type=int, default=9_000_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+
+    config = load_config(args.env)
+    # Фоновое объединение памяти использует клиент OpenAI из `setup_bot`, а не заглушку
+    config.permanent_memory.consolidation_enabled = False
+    # Журнал решений фильтра ротируется, поэтому откатить общий журнал после прогона нельзя — пишем во временный
+    log_dir = tempfile.TemporaryDirectory()
+    config.cache.verdict_log_path = os.path.join(log_dir.name, "verdicts.jsonl")
+    stub = StubOpenAI(
+        chat_latency=Latency(args.chat_latency),
+        filter_latency=Latency(args.filter_latency),
+        embedding_latency=Latency(args.embedding_latency),
+        filter_model=OpenAiModels.GPT_5_NANO.value,
+        important_rate=args.important_rate,
+        reply_words=args.reply_words
+    )
+    base_url = await stub.start()
+
+    real_bot, dp = await setup_bot(config)
+    await real_bot.session.close()
+    session = FakeTelegramSession(Latency(args.telegram_latency))
+    session.middleware(TelegramTimingMiddleware())
+    bot = Bot(token="42:LOAD-TEST", session=session, default=DefaultBotProperties(parse_mode="Markdown"))
+    dp.workflow_data["openai_client"] = AsyncOpenAI(api_key="stub", base_url=base_url, max_retries=0)
+    dp.workflow_data["stream_replies"] = args.stream
+
+    user_ids = [args.user_id_base + i for i in range(args.users)]
+    before: Optional[Dict[str, Any]] = None
+    stages: Dict[str, List[float]] = defaultdict(list)
+
+    def observe(stage: str, elapsed_ms: float) -> None:
+        stages[stage].append(elapsed_ms)
+
+    try:
+        before = await snapshot(config)
+        for user_id in user_ids:
+            await UsersRepository.add_user(user_id, "Load")
+            await UsersRepository.set_user_active(user_id)
+
+        scripts = [[make_message(rng, args.unique_rate) for _ in range(args.messages)] for _ in user_ids]
+        latencies: List[float] = []
+        session.calls.clear()
+
+        add_stage_observer(observe)
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_user(dp, bot, user_id, texts, index * args.messages + 1, latencies)
+            for index, (user_id, texts) in enumerate(zip(user_ids, scripts))
+        ))
+        elapsed = time.perf_counter() - start
+        remove_stage_observer(observe)
+
+        total = len(latencies)
+        print(f"messages       {total} from {args.users} users in {elapsed:.2f} s")
+        print(f"throughput     {total / elapsed:.1f} msg/s")
+        print(f"rejected       {session.busy_replies} (busy)")
+        print(f"{'update':<24} {percentiles(latencies)}")
+        for stage, values in sorted(stages.items()):
+            print(f"{stage:<24} {percentiles(values)}   n={len(values)}")
+        for name, calls in sorted(stub.calls.items()):
+            print(f"openai {name:<35} {calls / total:6.2f} calls/msg")
+        for name, calls in sorted(session.calls.items()):
+            print(f"telegram {name:<33} {calls / total:6.2f} calls/msg")
+    finally:
+        remove_stage_observer(observe)
+        await shutdown_bot(bot, dp)
+        await stub.stop()
+        await cleanup(config, user_ids, before)
+        log_dir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
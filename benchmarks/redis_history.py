@@ -0,0 +1,74 @@
+"""
+Бенчмарк записи краткосрочной истории в Redis: round trips и время на один ход диалога.
+
+Сравнивает прежнюю схему (LRANGE + 2 × (LPUSH, LTRIM)) с текущей
+(LRANGE+EXPIRE одним pipeline и сохранение пары реплик с обрезкой и EXPIRE одним Lua-скриптом).
+
+Запуск из корня проекта (нужен локальный Redis):
+    python -m benchmarks.redis_history [--redis-url redis://localhost:6379/15] [--turns 2000]
+"""
+import argparse
+import asyncio
+import time
+
+from redis.asyncio.connection import Connection
+
+from database.redis.manager import RedisManager
+from bot.services.memory_services import TemporaryMemoryService
+
+
+ROUND_TRIPS = 0
+_send_packed_command = Connection.send_packed_command
+
+
+async def counting_send_packed_command(self, command, check_health=True):
+    """Каждая отправка пакета команд в сокет — один round trip."""
+    global ROUND_TRIPS
+    ROUND_TRIPS += 1
+    return await _send_packed_command(self, command, check_health)
+
+
+async def legacy_turn(user_id: int, user_text: str, bot_reply: str) -> None:
+    client = RedisManager.get_client()
+    key = f"chat:{user_id}:history"
+    await client.lrange(key, 0, 9)
+    for text in (f"User: {user_text}", f"Bot: {bot_reply}"):
+        await client.lpush(key, text)
+        await client.ltrim(key, 0, 9)
+
+
+async def pipelined_turn(user_id: int, user_text: str, bot_reply: str) -> None:
+    await TemporaryMemoryService.get(user_id)
+    await TemporaryMemoryService.save(user_id, user_text, bot_reply)
+
+
+async def run(name: str, turn, turns: int) -> None:
+    global ROUND_TRIPS
+    ROUND_TRIPS = 0
+    start = time.perf_counter()
+    for i in range(turns):
+        await turn(i % 100, f"сообщение {i}", f"ответ бота {i}")
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {ROUND_TRIPS / turns:5.2f} round trips/turn  {elapsed / turns * 1e6:9.1f} µs/turn")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    RedisManager.init(args.redis_url)
+    Connection.send_packed_command = counting_send_packed_command
+    client = RedisManager.get_client()
+    await client.ping()
+
+    await run("legacy", legacy_turn, args.turns)
+    await run("pipelined", pipelined_turn, args.turns)
+
+    await client.delete(*(f"chat:{user_id}:history" for user_id in range(100)))
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
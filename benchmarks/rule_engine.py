@@ -0,0 +1,63 @@
+"""
+Бенчмарк rule-based фильтров: старые циклы по правилам против `RuleEngine`.
+
+Запуск из корня проекта:
+    python -m benchmarks.rule_engine [--iterations 20000]
+"""
+import argparse
+import re
+import timeit
+
+from core.lexicon import RULE_BASED_LEXICON, BAD_WORDS_LEXICON
+from core.utils.text_normalization import normalize_text
+from core.utils.rule_engine import RULE_ENGINE
+
+
+MESSAGES = [
+    "привет",
+    "спасибо большое за помощь",
+    "меня зовут Ира и я живу в Казани",
+    "я работаю программистом уже пять лет",
+    "как думаешь, стоит ли учить Rust в этом году?",
+    "ну это какой-то пиздец если честно",
+    "хахаха ну ты даёшь конечно",
+    "расскажи что-нибудь интересное про космос и чёрные дыры",
+]
+
+
+def legacy_verdict(text: str) -> tuple:
+    """Прежняя логика MemoryFilter: отдельный проход по тексту для каждого правила."""
+    rules = RULE_BASED_LEXICON["rules"]
+    is_short = len(text.split()) < 3
+    is_noise = any(re.match(pattern, text) for pattern in rules["noise_patterns"])
+    is_question = text.strip().endswith("?")
+    text_lower = text.lower()
+    has_keyword = any(keyword.lower() in text_lower for keyword in rules["important_keywords"])
+    has_bad_words = not normalize_text(set(re.findall(r"\w+", text_lower))).isdisjoint(BAD_WORDS_LEXICON)
+    return is_short, is_noise, is_question, has_keyword, has_bad_words
+
+
+def engine_verdict(text: str) -> tuple:
+    verdict = RULE_ENGINE.evaluate(text)
+    return (
+        verdict.is_short, verdict.is_noise, verdict.is_question,
+        verdict.has_important_keyword, verdict.has_bad_words
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for text in MESSAGES:
+        assert legacy_verdict(text) == engine_verdict(text), text
+
+    for name, func in (("legacy loops", legacy_verdict), ("rule engine", engine_verdict)):
+        seconds = timeit.timeit(lambda: [func(text) for text in MESSAGES], number=args.iterations)
+        per_message_us = seconds / (args.iterations * len(MESSAGES)) * 1e6
+        print(f"{name:<14} {per_message_us:8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
+import asyncio
+import time
+
 from aiogram import Router, Bot
 from aiogram.types import Message
 from aiogram.enums import ChatAction
 from openai import AsyncOpenAI
 
-from bot.services.ai_services import AIService
+from bot.services.ai_services import AIService, ResponseCacheService
 from bot.services.memory_services import TemporaryMemoryService, MemoryContextService
 from bot.lexicon import BOT_LEXICON
 from database.postgres.repositories import UsersRepository
-from core.utils.chat import safe_answer
+from core.utils.chat import safe_answer, StreamingAnswer
+from core.utils.timing import stage_timer, timed
 
 
 router = Router()
@@ -20,20 +24,25 @@ async def handle_other_messages(
     openai_client: AsyncOpenAI,
     chat_model: str,
     filter_model: str,
-    embedding_model: str
+    embedding_model: str,
+    stream_replies: bool = False,
+    stream_edit_interval: float = 1.0
 ) -> None:
     """
     Обрабатывает все текстовые сообщения пользователей.
 
-    Алгоритм работы:
+    Алгоритм работы (длительность этапов пишется в лог через `stage_timer`):
     1. Проверяет активацию пользователя.
-    2. Отправляет индикатор "печатает..." в чат.
-    3. Формирует контекст для AI:
+    2. Одновременно отправляет индикатор "печатает..." в чат и формирует контекст для AI:
        - краткосрочная память (Redis),
        - долгосрочная память (PostgreSQL), если сообщение значимо.
-    4. Получает ответ от модели AI с учётом контекста.
-    5. Сохраняет реплики пользователя и бота в краткосрочную память.
-    6. Отправляет ответ безопасно, разбивая длинные тексты на чанки.
+    3. Если контекст памяти пуст, ищет ответ на похожий запрос в семантическом кэше (если он включён)
+       и при попадании отправляет ответ из кэша. Иначе получает ответ от модели AI с учётом контекста:
+       - в потоковом режиме ответ выводится по мере генерации, заменяя сообщение-заглушку
+         (редактирования ограничены по частоте, длинный ответ продолжается новыми сообщениями),
+       - иначе ответ отправляется целиком, с разбиением длинных текстов на чанки.
+    4. Сохраняет реплику пользователя и ответ бота в краткосрочную память
+       и, если для запроса выполнялся поиск в кэше, — в семантический кэш.
 
     Args:
         message (Message): Сообщение пользователя.
@@ -42,35 +51,83 @@ async def handle_other_messages(
         chat_model (str): Модель для генерации ответа AI.
         filter_model (str): Модель фильтрации сообщений для сохранения в долгосрочную память.
         embedding_model (str): Модель генерации embedding текста.
+        stream_replies (bool): Отправлять ответ потоком.
+        stream_edit_interval (float): Минимальный интервал между редактированиями сообщения (секунды).
     """
     user_id = message.from_user.id
     user_text = message.text
 
     # --- Проверка активации пользователя ---
-    if not await UsersRepository.is_user_activated(user_id):
+    with stage_timer("activation_check"):
+        is_activated = await UsersRepository.is_user_activated(user_id)
+
+    if not is_activated:
         # Отправляем уведомление, если пользователь не активирован
         await message.answer(BOT_LEXICON["bot"]["messages"]["not_activated"])
         return
 
-    # --- Индикатор "печатает..." ---
-    processing_msg = await message.answer(BOT_LEXICON["bot"]["messages"]["waiting_for_response"])
-    await bot.send_chat_action(message.chat.id, ChatAction.TYPING)
+    async with asyncio.TaskGroup() as tg:
+        # --- Индикатор "печатает..." ---
+        processing_task = tg.create_task(timed(
+            "send_placeholder",
+            message.answer(BOT_LEXICON["bot"]["messages"]["waiting_for_response"])
+        ))
+        tg.create_task(timed("chat_action", bot.send_chat_action(message.chat.id, ChatAction.TYPING)))
+
+        # --- Формирование контекста сообщений пользователя ---
+        context_task = tg.create_task(timed(
+            "build_context",
+            MemoryContextService.build_full_context(
+                user_id=user_id,
+                user_text=user_text,
+                openai_client=openai_client,
+                chat_model=chat_model,
+                filter_model=filter_model,
+                embedding_model=embedding_model
+            )
+        ))
+
+    processing_msg = processing_task.result()
+    memories_context = context_task.result().text
+
+    # --- Поиск ответа на похожий запрос в семантическом кэше (только для сообщений без контекста памяти) ---
+    cache_lookup = await timed(
+        "response_cache_lookup",
+        ResponseCacheService.lookup(user_text, openai_client, embedding_model, chat_model)
+    ) if ResponseCacheService.is_eligible(user_text, memories_context) else None
+
+    ai_reply = ResponseCacheService.accept(cache_lookup)
+    generation_start = time.perf_counter()
 
-    # --- Формирование контекста сообщений пользователя ---
-    memories_context = await MemoryContextService.build_full_context(
-        user_id=user_id,
-        user_text=user_text,
-        openai_client=openai_client,
-        filter_model=filter_model,
-        embedding_model=embedding_model
-    )
+    if ai_reply is not None:
+        # --- Ответ из семантического кэша ---
+        with stage_timer("send_reply"):
+            await processing_msg.delete()
+            await safe_answer(message, ai_reply)
+    elif stream_replies:
+        # --- Потоковый ответ модели AI в сообщение-заглушку ---
+        with stage_timer("chat_completion_stream"):
+            answer = StreamingAnswer(processing_msg, edit_interval=stream_edit_interval)
+            async for delta in AIService.stream_reply(user_text, memories_context, openai_client, chat_model):
+                await answer.feed(delta)
+            ai_reply = await answer.finish(AIService.FALLBACK_REPLY)
+    else:
+        # --- Получение ответа модели AI с учётом контекста ---
+        with stage_timer("chat_completion"):
+            ai_reply = await AIService.get_reply(user_text, memories_context, openai_client, chat_model)
 
-    # --- Получение ответа модели AI с учётом контекста ---
-    ai_reply = await AIService.get_reply(user_text, memories_context, openai_client, chat_model)
+        # --- Безопасная отправка ответа пользователю ---
+        with stage_timer("send_reply"):
+            await processing_msg.delete()
+            await safe_answer(message, ai_reply)
 
-    # --- Сохранение сообщений пользователя и бота в краткосрочную память ---
-    await TemporaryMemoryService.save(user_id, user_text, ai_reply)
+    # --- Сохранение реплики пользователя и ответа бота в краткосрочную память ---
+    with stage_timer("history_save"):
+        await TemporaryMemoryService.save(user_id, user_text, ai_reply)
 
-    # --- Безопасная отправка ответа пользователю ---
-    await processing_msg.delete()
-    await safe_answer(message, ai_reply)
+    # --- Сохранение нового ответа в семантический кэш ---
+    if cache_lookup is not None and cache_lookup.reply is None:
+        await ResponseCacheService.store(
+            cache_lookup, chat_model, ai_reply,
+            generation_ms=(time.perf_counter() - generation_start) * 1000
+        )
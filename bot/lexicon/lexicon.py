@@ -1,7 +1,9 @@
+from pathlib import Path
+
 import yaml
 
 
 # ------------------- Загрузка словаря бота -------------------
-# lexicon.yaml содержит тексты сообщений, кнопки, подсказки и т.д.
-with open('bot/lexicon/lexicon.yaml', 'r', encoding='utf-8') as file:
+# lexicon.yaml содержит тексты сообщений, кнопки, подсказки и т.д. (путь не зависит от текущей директории)
+with open(Path(__file__).resolve().parent / 'lexicon.yaml', 'r', encoding='utf-8') as file:
     BOT_LEXICON = yaml.safe_load(file)  # Загружаем как словарь для использования в коде
@@ -0,0 +1,2 @@
+from .mailbox import MailboxMiddleware
+from .metrics import MetricsMiddleware, TelegramTimingMiddleware
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update, User
+
+from bot.lexicon import BOT_LEXICON
+
+
+class MailboxMiddleware(BaseMiddleware):
+    """
+    Outer-middleware апдейтов: упорядоченный «почтовый ящик» на пользователя
+    и глобальное ограничение количества одновременно обрабатываемых апдейтов.
+
+    - Апдейты одного пользователя обрабатываются строго по одному, в порядке поступления
+      (история в Redis не перемешивается, на пользователя — не больше одного запроса к модели).
+    - Одновременно обрабатывается не больше `max_in_flight` апдейтов всех пользователей.
+      Если свободный слот не появился за `slot_wait` секунд, апдейт отбрасывается,
+      а пользователю сразу отправляется короткий ответ «бот занят».
+
+    Метрики (`stats`): глубина очередей пользователей, количество апдейтов в обработке,
+    отброшенные апдейты и время ожидания в очереди.
+    """
+
+    def __init__(self, max_in_flight: int, slot_wait: float = 0.0):
+        """
+        Args:
+            max_in_flight (int): Максимальное количество одновременно обрабатываемых апдейтов.
+            slot_wait (float): Сколько ждать свободного слота перед отказом (секунды).
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.slot_wait = max(0.0, slot_wait)
+
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._mailboxes: Dict[int, asyncio.Lock] = {}
+        self._depths: Dict[int, int] = {}
+
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.max_mailbox_depth = 0
+        self.processed = 0
+        self.shed = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user is None:
+            # Апдейты без пользователя не упорядочиваются и не ограничиваются слотами
+            return await handler(event, data)
+
+        user_id = user.id
+        mailbox = self._open_mailbox(user_id)
+        start = time.perf_counter()
+        waiting = True
+
+        try:
+            async with mailbox:
+                acquired = await self._acquire_slot()
+                waiting = False
+                self._leave_queue(start)
+
+                if not acquired:
+                    self.shed += 1
+                    await self._answer_busy(event)
+                    return None
+
+                self.in_flight += 1
+                try:
+                    return await handler(event, data)
+                finally:
+                    self.in_flight -= 1
+                    self.processed += 1
+                    self._slots.release()
+        finally:
+            if waiting:
+                self._leave_queue(start)
+            self._close_mailbox(user_id)
+
+    async def _acquire_slot(self) -> bool:
+        """
+        Занимает слот обработки.
+
+        Returns:
+            bool: True, если слот получен; False, если за `slot_wait` он не освободился.
+        """
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return True
+
+        if self.slot_wait <= 0:
+            return False
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.slot_wait)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _open_mailbox(self, user_id: int) -> asyncio.Lock:
+        """
+        Ставит апдейт в почтовый ящик пользователя.
+
+        Args:
+            user_id (int): ID пользователя.
+
+        Returns:
+            asyncio.Lock: Замок ящика (FIFO — апдейты получают его в порядке поступления).
+        """
+        mailbox = self._mailboxes.setdefault(user_id, asyncio.Lock())
+        depth = self._depths.get(user_id, 0) + 1
+        self._depths[user_id] = depth
+
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        self.max_mailbox_depth = max(self.max_mailbox_depth, depth)
+        return mailbox
+
+    def _close_mailbox(self, user_id: int) -> None:
+        """
+        Убирает апдейт из почтового ящика пользователя; пустой ящик удаляется.
+
+        Args:
+            user_id (int): ID пользователя.
+        """
+        depth = self._depths[user_id] - 1
+        if depth:
+            self._depths[user_id] = depth
+        else:
+            del self._depths[user_id]
+            del self._mailboxes[user_id]
+
+    def _leave_queue(self, start: float) -> None:
+        """
+        Учитывает окончание ожидания апдейта в очереди.
+
+        Args:
+            start (float): Момент постановки апдейта в очередь (perf_counter).
+        """
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.queued -= 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    @staticmethod
+    async def _answer_busy(event: TelegramObject) -> None:
+        """
+        Отправляет пользователю короткий ответ о перегрузке.
+
+        Args:
+            event (TelegramObject): Апдейт (или событие), который был отброшен.
+        """
+        if isinstance(event, Update):
+            event = event.event
+
+        if isinstance(event, Message):
+            await event.answer(BOT_LEXICON["bot"]["messages"]["busy"])
+        elif isinstance(event, CallbackQuery):
+            await event.answer(text=BOT_LEXICON["bot"]["messages"]["busy"], show_alert=False)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Возвращает метрики почтовых ящиков.
+
+        Returns:
+            Dict[str, float]: queued (ждут сейчас), in_flight, processed, shed,
+                              максимальные глубины очередей и время ожидания (мс).
+        """
+        waited = self.processed + self.shed
+        return {
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "max_mailbox_depth": self.max_mailbox_depth,
+            "mailboxes": len(self._depths),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "processed": self.processed,
+            "shed": self.shed,
+            "max_wait_ms": self.max_wait_ms,
+            "avg_wait_ms": self.total_wait_ms / waited if waited else 0.0
+        }
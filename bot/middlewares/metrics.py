@@ -0,0 +1,55 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from core.utils.metrics import Metrics
+from core.utils.timing import stage_timer
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Outer-middleware апдейтов: полное время обработки апдейта и её исход для `Metrics`.
+
+    Подключается первым, поэтому время включает ожидание в почтовом ящике пользователя.
+    Исход: handled — апдейт обработан, unhandled — подходящего обработчика нет,
+    error — обработчик завершился исключением.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        event_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        start = time.perf_counter()
+        status = "error"
+
+        try:
+            result = await handler(event, data)
+            status = "unhandled" if result is UNHANDLED else "handled"
+            return result
+        finally:
+            Metrics.observe_update(event_type, status, time.perf_counter() - start)
+
+
+class TelegramTimingMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: длительность каждого запроса к Bot API
+    как этап `telegram.<метод>` в `stage_timer` (лог DEBUG и метрики).
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        with stage_timer(f"telegram.{method.__api_method__}"):
+            return await make_request(bot, method)
@@ -1,6 +1,15 @@
-from typing import List, Optional
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
 from openai import AsyncOpenAI
-from core.lexicon import SYSTEM_PROMPTS_LEXICON
+
+from core.lexicon import SYSTEM_PROMPTS_LEXICON, LOGGING_LEXICON
+from core.utils.ai_utils import AiMemoryUtils
+from database.postgres.repositories import ResponseCacheRepository
+
+
+logger = logging.getLogger(__name__)
 
 
 class AIService:
@@ -9,9 +18,39 @@ class AIService:
 
     Отвечает за:
     - Формирование сообщений для ChatCompletion API, включая системные правила и память пользователя.
-    - Отправку запроса в модель OpenAI и возврат ответа.
+    - Отправку запроса в модель OpenAI и возврат ответа (целиком или потоком фрагментов).
     """
 
+    FALLBACK_REPLY = "Извини, я не смог сгенерировать ответ 😔"
+
+    @staticmethod
+    def _build_messages(user_text: str, memories_context: Optional[str]) -> List:
+        """
+        Формирует сообщения для ChatCompletion API.
+
+        Args:
+            user_text (str): Сообщение пользователя.
+            memories_context (Optional[str]): Контекст памяти пользователя.
+
+        Returns:
+            List: Системный промпт, контекст памяти (если есть) и сообщение пользователя.
+        """
+        messages: List = [
+            # Базовое поведение ассистента
+            {"role": "system", "content": SYSTEM_PROMPTS_LEXICON["system_prompts"]["base_assistant"]}
+        ]
+
+        # Добавляем память пользователя как системный контекст
+        if memories_context:
+            messages.append({
+                "role": "system",
+                "content": SYSTEM_PROMPTS_LEXICON["system_prompts"]["rule_memory"].format(memories_context)
+            })
+
+        # Добавляем сообщение пользователя
+        messages.append({"role": "user", "content": user_text})
+        return messages
+
     @staticmethod
     async def get_reply(
         user_text: str,
@@ -40,20 +79,7 @@ class AIService:
             str: Текст ответа модели. Если AI не вернул текст, возвращается fallback-сообщение.
         """
         # --- Сбор сообщений для Chat API ---
-        messages: List = [
-            # Базовое поведение ассистента
-            {"role": "system", "content": SYSTEM_PROMPTS_LEXICON["system_prompts"]["base_assistant"]}
-        ]
-
-        # Добавляем память пользователя как системный контекст
-        if memories_context:
-            messages.append({
-                "role": "system",
-                "content": SYSTEM_PROMPTS_LEXICON["system_prompts"]["rule_memory"].format(memories_context)
-            })
-
-        # Добавляем сообщение пользователя
-        messages.append({"role": "user", "content": user_text})
+        messages = AIService._build_messages(user_text, memories_context)
 
         # --- Отправка запроса в OpenAI ---
         response = await openai_client.chat.completions.create(
@@ -65,4 +91,239 @@ class AIService:
         ai_message = response.choices[0].message.content
 
         # --- Fallback, если ответ пуст ---
-        return ai_message.strip() if ai_message else "Извини, я не смог сгенерировать ответ 😔"
+        return ai_message.strip() if ai_message else AIService.FALLBACK_REPLY
+
+    @staticmethod
+    async def stream_reply(
+        user_text: str,
+        memories_context: Optional[str],
+        openai_client: AsyncOpenAI,
+        model: str
+    ) -> AsyncIterator[str]:
+        """
+        Получает ответ модели AI потоком (`stream=True`), отдавая текст по мере генерации.
+
+        Сообщения для модели формируются так же, как в `get_reply`.
+        Пустые фрагменты (служебные чанки без текста) пропускаются.
+
+        Args:
+            user_text (str): Сообщение пользователя.
+            memories_context (Optional[str]): Контекст памяти пользователя.
+            openai_client (AsyncOpenAI): Асинхронный клиент OpenAI.
+            model (str): Название модели для генерации ответа.
+
+        Yields:
+            str: Очередной фрагмент текста ответа.
+        """
+        stream = await openai_client.chat.completions.create(
+            model=model,
+            messages=AIService._build_messages(user_text, memories_context),
+            stream=True
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+@dataclass(slots=True)
+class CacheLookup:
+    """
+    Результат поиска в семантическом кэше ответов.
+
+    Attributes:
+        text (str): Текст запроса пользователя.
+        vector (List[float]): Embedding запроса (используется и для сохранения нового ответа).
+        reply (Optional[str]): Найденный ответ, если сходство выше порога.
+        generation_ms (int): Длительность генерации найденного ответа (мс).
+        lookup_ms (float): Длительность поиска (embedding + запрос к базе, мс).
+    """
+    text: str
+    vector: List[float]
+    reply: Optional[str]
+    generation_ms: int
+    lookup_ms: float
+
+
+class ResponseCacheService:
+    """
+    Семантический кэш ответов модели (opt-in) для типовых запросов, не зависящих от памяти.
+
+    Ключ — embedding запроса; ответ берётся из кэша, если косинусное сходство
+    с закэшированным запросом не ниже `similarity_threshold`. Записи хранятся
+    в PostgreSQL (pgvector, HNSW-индекс по косинусному расстоянию) с TTL;
+    каждые `evict_every` сохранений удаляются устаревшие записи и записи сверх `max_entries`.
+
+    Правила обхода кэша (проверяются в `is_eligible` до поиска, чтобы не тратить
+    на него embedding и запрос к pgvector):
+    - кэш выключен или сообщение короче `min_length` (короткие реплики обычно продолжают диалог);
+    - для сообщения собран непустой контекст памяти (краткосрочная история или долгосрочная память) —
+      ответ зависит от диалога пользователя, он не берётся из кэша и не сохраняется в него
+      (кэш общий для всех пользователей, и ответ мог бы раскрыть чужой диалог).
+    """
+
+    __enabled: bool = False
+    __threshold: float = 0.95
+    __ttl: int = 24 * 60 * 60
+    __max_entries: int = 10000
+    __min_length: int = 20
+    __evict_every: int = 100
+
+    __metrics: Dict[str, float] = {
+        "lookups": 0, "hits": 0, "bypassed": 0, "stored": 0, "evicted": 0, "errors": 0,
+        "latency_saved_ms": 0.0
+    }
+
+    @classmethod
+    def init(
+        cls,
+        enabled: bool,
+        similarity_threshold: float,
+        ttl: int,
+        max_entries: int,
+        min_length: int,
+        evict_every: int = 100
+    ) -> None:
+        """
+        Настраивает кэш.
+
+        Args:
+            enabled (bool): Включён ли кэш.
+            similarity_threshold (float): Минимальное косинусное сходство запросов для попадания.
+            ttl (int): Время жизни ответа (секунды).
+            max_entries (int): Максимальное количество ответов в кэше.
+            min_length (int): Минимальная длина сообщения, для которого используется кэш.
+            evict_every (int): Через сколько сохранений выполнять вытеснение.
+        """
+        cls.__enabled = enabled
+        cls.__threshold = similarity_threshold
+        cls.__ttl = ttl
+        cls.__max_entries = max_entries
+        cls.__min_length = min_length
+        cls.__evict_every = max(1, evict_every)
+        cls.__metrics = {
+            "lookups": 0, "hits": 0, "bypassed": 0, "stored": 0, "evicted": 0, "errors": 0,
+            "latency_saved_ms": 0.0
+        }
+
+    @classmethod
+    def is_eligible(cls, text: str, memories_context: Optional[str]) -> bool:
+        """
+        Проверяет, можно ли использовать кэш для сообщения. Обход из-за контекста памяти учитывается в метриках.
+
+        Args:
+            text (str): Текст сообщения.
+            memories_context (Optional[str]): Контекст памяти, собранный для сообщения
+                                              (краткосрочная история и долгосрочная память).
+
+        Returns:
+            bool: True, если кэш включён, сообщение достаточно длинное и контекст памяти пуст.
+        """
+        if not cls.__enabled or len(text.strip()) < cls.__min_length:
+            return False
+
+        if memories_context:
+            cls.__metrics["bypassed"] += 1
+            return False
+        return True
+
+    @classmethod
+    async def lookup(
+        cls,
+        text: str,
+        openai_client: AsyncOpenAI,
+        embedding_model: str,
+        chat_model: str
+    ) -> Optional[CacheLookup]:
+        """
+        Ищет ответ на похожий запрос. Ошибки не пробрасываются: поиск считается промахом.
+
+        Args:
+            text (str): Текст сообщения.
+            openai_client (AsyncOpenAI): Клиент OpenAI.
+            embedding_model (str): Модель для генерации embedding запроса.
+            chat_model (str): Чат-модель, ответы которой ищутся.
+
+        Returns:
+            Optional[CacheLookup]: Результат поиска или None при ошибке.
+        """
+        start = time.perf_counter()
+        try:
+            vector = await AiMemoryUtils.generate_embedding(text, openai_client, embedding_model)
+            row = await ResponseCacheRepository.find_reply(chat_model, vector, cls.__ttl)
+        except Exception as e:
+            cls.__metrics["errors"] += 1
+            logger.warning(LOGGING_LEXICON["logging"]["response_cache"]["error"].format(e))
+            return None
+
+        cls.__metrics["lookups"] += 1
+        is_hit = row is not None and 1 - row.distance >= cls.__threshold
+        return CacheLookup(
+            text=text,
+            vector=vector,
+            reply=row.reply if is_hit else None,
+            generation_ms=row.generation_ms if is_hit else 0,
+            lookup_ms=(time.perf_counter() - start) * 1000
+        )
+
+    @classmethod
+    def accept(cls, lookup: Optional[CacheLookup]) -> Optional[str]:
+        """
+        Решает, отвечать ли из кэша, и учитывает результат в метриках.
+
+        Args:
+            lookup (Optional[CacheLookup]): Результат `lookup`.
+
+        Returns:
+            Optional[str]: Ответ из кэша или None, если ответ нужно сгенерировать.
+        """
+        if lookup is None:
+            return None
+
+        if lookup.reply is not None:
+            cls.__metrics["hits"] += 1
+            cls.__metrics["latency_saved_ms"] += max(0.0, lookup.generation_ms - lookup.lookup_ms)
+        return lookup.reply
+
+    @classmethod
+    async def store(
+        cls,
+        lookup: Optional[CacheLookup],
+        chat_model: str,
+        reply: str,
+        generation_ms: float
+    ) -> None:
+        """
+        Сохраняет сгенерированный ответ в кэш, если запрос участвовал в поиске (см. `is_eligible`).
+
+        Args:
+            lookup (Optional[CacheLookup]): Результат `lookup` (None — кэш для сообщения не использовался).
+            chat_model (str): Чат-модель, сгенерировавшая ответ.
+            reply (str): Ответ модели.
+            generation_ms (float): Длительность генерации ответа (мс).
+        """
+        if lookup is None or reply == AIService.FALLBACK_REPLY:
+            return
+
+        try:
+            await ResponseCacheRepository.save_reply(chat_model, lookup.text, lookup.vector, reply, int(generation_ms))
+            cls.__metrics["stored"] += 1
+
+            if cls.__metrics["stored"] % cls.__evict_every == 0:
+                cls.__metrics["evicted"] += await ResponseCacheRepository.evict(cls.__ttl, cls.__max_entries)
+        except Exception as e:
+            cls.__metrics["errors"] += 1
+            logger.warning(LOGGING_LEXICON["logging"]["response_cache"]["error"].format(e))
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает метрики кэша.
+
+        Returns:
+            Dict[str, float]: lookups, hits, hit_rate, bypassed, stored, evicted, errors
+                              и сэкономленное время генерации (мс).
+        """
+        stats = dict(cls.__metrics)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats.get("lookups") else 0.0
+        return stats
@@ -1,11 +1,25 @@
 import asyncio
-from typing import List
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 from openai import AsyncOpenAI
 
 from database.postgres.repositories import UsersMemoriesRepository
 from database.redis.repositories import RedisMemoriesRepository
 from core.utils.memory_filters import MemoryFilter
 from core.utils.ai_utils import AiMemoryUtils
+from core.utils.context_builder import BuiltContext, ContextBuilder
+from core.utils.history import HistoryCodec, HistoryEntry
+from core.utils.timing import stage_timer, timed
+from core.utils.vector_store import find_clusters
+from core.lexicon import LOGGING_LEXICON
+
+
+logger = logging.getLogger(__name__)
 
 
 class PermanentMemoryService:
@@ -17,32 +31,121 @@ class PermanentMemoryService:
     - Получение наиболее релевантных сообщений по embedding.
 
     Ограничения:
-    - Для каждого пользователя хранится максимум 50 сообщений.
-    - Вопросительные сообщения не сохраняются при переполнении памяти.
+    - Для каждого пользователя хранится максимум MAX_MEMORIES сообщений; на лимите новые сообщения
+      вытесняют давно не использованные (`PermanentMemoryWriter`).
+    - Вопросительные сообщения не сохраняются.
+    - Почти повторы уже сохранённых сообщений не сохраняются, а объединяются с ними.
+
+    Метрики (`stats`): переданные на запись и проверенные сообщения, подавленные дубликаты
+    (по отпечатку текста и по близости векторов), ошибки проверки.
     """
 
-    @staticmethod
-    async def save(user_id: int, text: str, vector: List[float]) -> None:
+    MAX_MEMORIES = 50
+
+    # L2-расстояние между нормированными векторами при косинусном сходстве 0.95
+    __duplicate_distance: float = math.sqrt(2 * (1 - 0.95))
+
+    __metrics: Dict[str, float] = {
+        "checked": 0, "submitted": 0, "duplicates_text": 0, "duplicates_vector": 0, "dedup_errors": 0
+    }
+
+    @classmethod
+    def init(cls, duplicate_similarity: float) -> None:
+        """
+        Настраивает подавление дубликатов.
+
+        Args:
+            duplicate_similarity (float): Минимальное косинусное сходство с существующей записью,
+                                          при котором сообщение считается дубликатом.
+        """
+        # Векторы embedding нормированы, поэтому |a - b|² = 2 · (1 - cos(a, b))
+        cls.__duplicate_distance = math.sqrt(2 * max(0.0, 1 - duplicate_similarity))
+        cls.__metrics = {
+            "checked": 0, "submitted": 0, "duplicates_text": 0, "duplicates_vector": 0, "dedup_errors": 0
+        }
+
+    @classmethod
+    async def save(cls, user_id: int, text: str, vector: List[float]) -> None:
         """
         Сохраняет сообщение в долгосрочную память при соблюдении условий.
 
         Условия сохранения:
-        1. Если у пользователя ≤ 50 сообщений и текст не является вопросом — сохраняем.
-        2. Если сообщений > 50 или текст является вопросом — игнорируем.
+        1. Если текст не является вопросом — сохраняем; если у пользователя уже MAX_MEMORIES сообщений,
+           при записи вытесняется давно не использованная запись.
+        2. Если текст является вопросом — игнорируем.
+        3. Если у пользователя уже есть запись с тем же каноническим текстом (`text_fingerprint`)
+           или с вектором ближе порога сходства — новая запись не создаётся,
+           а у существующей обновляется время создания.
+
+        Запись передаётся в `PermanentMemoryWriter` и сохраняется в фоне пачками: проверка дубликатов
+        (`remove_duplicates`) и вставка выполняются там же, а не на пути ответа пользователю.
+        Проверка лимита выполняется атомарно вместе со вставкой (по счётчику `users.memories_count`).
+        Пользователь становится кандидатом на объединение похожих записей (`PermanentMemoryMaintenance`).
 
         Args:
             user_id (int): Идентификатор пользователя.
             text (str): Сообщение пользователя.
             vector (List[float]): Векторное представление текста.
         """
-        count = await UsersMemoriesRepository.count_memories(user_id)
-        if count <= 50 and not MemoryFilter.is_question(text):
-            await UsersMemoriesRepository.safe_memory(user_id, text, vector)
+        if MemoryFilter.is_question(text):
+            return
+
+        cls.__metrics["submitted"] += 1
+        await PermanentMemoryWriter.submit(user_id, text, vector)
+        PermanentMemoryMaintenance.mark(user_id)
+
+    @classmethod
+    async def remove_duplicates(cls, batch: List[Tuple[int, str, List[float]]]) -> List[Tuple[int, str, List[float]]]:
+        """
+        Отбрасывает из пачки записи, дублирующие уже сохранённую память пользователя
+        (тот же канонический текст или вектор ближе порога сходства), и обновляет время создания
+        дублируемых записей. Поиск и обновление выполняются одним запросом каждое для всей пачки.
+
+        Если проверку выполнить не удалось, пачка возвращается без изменений.
+
+        Args:
+            batch (List[Tuple[int, str, List[float]]]): Записи (user_id, текст, вектор).
+
+        Returns:
+            List[Tuple[int, str, List[float]]]: Записи, которые нужно сохранить.
+        """
+        cls.__metrics["checked"] += len(batch)
+        try:
+            duplicates = await UsersMemoriesRepository.find_duplicates(batch, cls.__duplicate_distance)
+            unique, refreshed = [], []
+            for memory, duplicate in zip(batch, duplicates):
+                if duplicate is None:
+                    unique.append(memory)
+                    continue
+                existing_text, match = duplicate
+                refreshed.append((memory[0], existing_text))
+                cls.__metrics[f"duplicates_{match}"] += 1
+            await UsersMemoriesRepository.refresh_memories(refreshed)
+            return unique
+        except Exception as e:
+            cls.__metrics["dedup_errors"] += 1
+            logger.warning(LOGGING_LEXICON["logging"]["permanent_memory"]["dedup_error"].format(len(batch), e))
+            return batch
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает метрики сохранения долгосрочной памяти.
+
+        Returns:
+            Dict[str, float]: checked, submitted, duplicates_text, duplicates_vector,
+                              dedup_errors и доля подавленных дубликатов (suppressed_rate).
+        """
+        stats = dict(cls.__metrics)
+        suppressed = stats["duplicates_text"] + stats["duplicates_vector"]
+        stats["suppressed_rate"] = suppressed / stats["checked"] if stats["checked"] else 0.0
+        return stats
 
     @staticmethod
     async def get(user_id: int, vector: List[float], limit: int = 5) -> List[str]:
         """
         Извлекает наиболее релевантные сообщения пользователя из долгосрочной памяти.
+        Попадания записей в результаты учитываются в `PermanentMemoryMaintenance`.
 
         Args:
             user_id (int): Идентификатор пользователя.
@@ -52,24 +155,27 @@ class PermanentMemoryService:
         Returns:
             List[str]: Список текстов сообщений, отсортированных по релевантности.
         """
-        return await UsersMemoriesRepository.get_memory(user_id, vector, limit)
+        memories = await UsersMemoriesRepository.get_memory(user_id, vector, limit)
+        PermanentMemoryMaintenance.record_usage(user_id, memories)
+        return memories
 
     @staticmethod
-    async def build_context_and_save(
+    async def search_and_save(
         user_id: int,
         user_text: str,
         openai_client: AsyncOpenAI,
         filter_model: str,
         embedding_model: str
-    ) -> str:
+    ) -> List[str]:
         """
-        Формирует контекст из долгосрочной памяти и сохраняет новое сообщение.
+        Находит релевантные сообщения долгосрочной памяти и сохраняет новое сообщение.
 
         Логика:
         1. Проверяет значимость сообщения через `MemoryFilter`.
         2. Генерирует embedding для текста.
         3. Извлекает релевантные сообщения пользователя.
-        4. Асинхронно сохраняет новое сообщение и его embedding.
+        4. Ставит новое сообщение и его embedding в очередь фоновой записи
+           (или объединяет его с уже сохранённым дубликатом).
 
         Args:
             user_id (int): Идентификатор пользователя.
@@ -79,20 +185,385 @@ class PermanentMemoryService:
             embedding_model (str): Модель для генерации embedding текста.
 
         Returns:
-            str: Контекст релевантных сообщений для передачи в AI.
+            List[str]: Релевантные сообщения (от более релевантных к менее) или пустой список,
+                       если сообщение не значимо.
+        """
+        memories: List[str] = []
+
+        with stage_timer("memory_filter"):
+            is_required = await MemoryFilter.is_required_for_permanent_memory(user_text, openai_client, filter_model)
+
+        if is_required:
+            with stage_timer("embedding"):
+                vector = await AiMemoryUtils.generate_embedding(user_text, openai_client, embedding_model)
+            with stage_timer("memory_search"):
+                memories = await PermanentMemoryService.get(user_id, vector)
+
+            # Сохраняем сообщение и embedding через очередь фоновой записи
+            await PermanentMemoryService.save(user_id, user_text, vector)
+
+        return memories
+
+
+class PermanentMemoryWriter:
+    """
+    Фоновая запись долгосрочной памяти (write-behind) через ограниченную очередь.
+
+    Назначение:
+    - Снимает запись в PostgreSQL (и проверку дубликатов) с пути ответа пользователю.
+    - Отбрасывает дубликаты уже сохранённой памяти (`PermanentMemoryService.remove_duplicates`).
+    - Объединяет записи в пачки и сохраняет их одним многострочным INSERT ... ON CONFLICT DO NOTHING.
+    - В той же транзакции, что и вставка, освобождает место у пользователей сверх лимита памяти,
+      вытесняя записи, которые дольше всех не попадали в результаты поиска
+      (`UsersMemoriesRepository.save_memories_with_eviction`).
+    - При заполненной очереди `submit` ждёт освобождения места (backpressure).
+    - При остановке дожидается записи всех принятых сообщений.
+
+    Метрики (`stats`): глубина очереди, количество пачек, добавленных и вытесненных записей, задержка сброса.
+    """
+
+    __queue: Optional[asyncio.Queue] = None
+    __worker: Optional[asyncio.Task] = None
+    __batch_size: int = 32
+    __flush_interval: float = 0.05
+
+    __metrics: Dict[str, float] = {}
+
+    @classmethod
+    def start(cls, max_queue_size: int, batch_size: int, flush_interval_ms: int) -> None:
+        """
+        Создаёт очередь и запускает фоновый обработчик.
+
+        Args:
+            max_queue_size (int): Максимальное количество записей в очереди.
+            batch_size (int): Максимальное количество записей в одном INSERT.
+            flush_interval_ms (int): Сколько ждать наполнения пачки после первой записи (мс).
+        """
+        cls.__queue = asyncio.Queue(maxsize=max_queue_size)
+        cls.__batch_size = max(1, batch_size)
+        cls.__flush_interval = max(0, flush_interval_ms) / 1000
+        cls.__metrics = {
+            "submitted": 0, "flushes": 0, "inserted": 0, "evicted": 0, "failed": 0, "max_queue_depth": 0,
+            "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0
+        }
+        cls.__worker = asyncio.create_task(cls.__run())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """
+        Дожидается записи всех сообщений из очереди и останавливает обработчик.
+        """
+        if cls.__queue is None or cls.__worker is None:
+            return
+
+        await cls.__queue.join()
+        cls.__worker.cancel()
+        try:
+            await cls.__worker
+        except asyncio.CancelledError:
+            pass
+
+        cls.__queue, cls.__worker = None, None
+
+    @classmethod
+    async def submit(cls, user_id: int, text: str, vector: List[float]) -> None:
+        """
+        Ставит запись в очередь. Если очередь заполнена — ждёт свободного места.
+
+        Если обработчик не запущен, запись сохраняется сразу.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            text (str): Сообщение пользователя.
+            vector (List[float]): Векторное представление текста.
+        """
+        if cls.__queue is None:
+            batch = await PermanentMemoryService.remove_duplicates([(user_id, text, vector)])
+            await UsersMemoriesRepository.save_memories_with_eviction(batch, PermanentMemoryService.MAX_MEMORIES)
+            return
+
+        await cls.__queue.put((user_id, text, vector))
+        cls.__metrics["submitted"] += 1
+        cls.__metrics["max_queue_depth"] = max(cls.__metrics["max_queue_depth"], cls.__queue.qsize())
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает метрики фоновой записи.
+
+        Returns:
+            Dict[str, float]: queue_depth, submitted, flushes, inserted, evicted, failed,
+                              max_queue_depth и задержки сброса (last/avg/max, мс).
+        """
+        stats = dict(cls.__metrics)
+        stats["queue_depth"] = cls.__queue.qsize() if cls.__queue is not None else 0
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / stats["flushes"] if stats.get("flushes") else 0.0
+        return stats
+
+    @classmethod
+    async def __run(cls) -> None:
+        """Цикл обработчика: собирает пачку и сохраняет её."""
+        queue = cls.__queue
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + cls.__flush_interval
+
+            while len(batch) < cls.__batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await cls.__flush(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    @classmethod
+    async def __flush(cls, batch: List[Tuple[int, str, List[float]]]) -> None:
+        """
+        Отбрасывает дубликаты уже сохранённой памяти, сохраняет пачку
+        и вытесняет лишние записи у пользователей на лимите в одной транзакции.
+        Ошибки логируются и не останавливают обработчик.
+
+        Args:
+            batch (List[Tuple[int, str, List[float]]]): Записи (user_id, текст, вектор).
         """
-        context = ""
+        start = time.perf_counter()
+        try:
+            memories = await PermanentMemoryService.remove_duplicates(batch)
+            inserted, evicted = await UsersMemoriesRepository.save_memories_with_eviction(
+                memories, PermanentMemoryService.MAX_MEMORIES
+            )
+            cls.__metrics["inserted"] += len(inserted)
+            cls.__metrics["evicted"] += sum(evicted.values())
+        except Exception as e:
+            cls.__metrics["failed"] += len(batch)
+            logger.error(LOGGING_LEXICON["logging"]["memory_writer"]["flush_error"].format(len(batch), e))
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        cls.__metrics["flushes"] += 1
+        cls.__metrics["last_flush_ms"] = elapsed_ms
+        cls.__metrics["total_flush_ms"] += elapsed_ms
+        cls.__metrics["max_flush_ms"] = max(cls.__metrics["max_flush_ms"], elapsed_ms)
+
+
+class PermanentMemoryMaintenance:
+    """
+    Фоновое обслуживание долгосрочной памяти.
 
-        if await MemoryFilter.is_required_for_permanent_memory(user_text, openai_client, filter_model):
-            vector = await AiMemoryUtils.generate_embedding(user_text, openai_client, embedding_model)
-            memories = await PermanentMemoryService.get(user_id, vector)
-            if memories:
-                context = "\nPermanent memories:\n" + "\n".join(memories)
+    Назначение:
+    - Учёт использования: попадания записей в результаты поиска (`record_usage`) копятся в памяти
+      процесса и раз в `interval` секунд записываются одним запросом (`hits`, `last_used_at`).
+      По ним `PermanentMemoryWriter` выбирает, какие записи вытеснить на лимите.
+    - Объединение: у пользователей, сохранявших память (`mark`), с не меньше чем `min_memories` записями
+      группы похожих записей (косинусное сходство с центром группы ≥ `similarity`) заменяются одной
+      короткой записью, сформулированной моделью, с новым embedding. За один проход обрабатывается
+      не больше `max_users` пользователей.
+    - При остановке записывает накопленную статистику использования.
+
+    Метрики (`stats`): записанные попадания, проверенные пользователи, объединённые группы и записи,
+    отклонённые ответы модели, ошибки.
+    """
 
-            # Сохраняем сообщение и embedding асинхронно
-            asyncio.create_task(PermanentMemoryService.save(user_id, user_text, vector))
+    # Максимальное количество записей, объединяемых в одну
+    MAX_CLUSTER_SIZE = 6
 
-        return context
+    __task: Optional[asyncio.Task] = None
+    __interval: float = 60
+    __consolidate: bool = True
+    __min_memories: int = 30
+    __similarity: float = 0.85
+    __max_users: int = 20
+
+    __openai_client: Optional[AsyncOpenAI] = None
+    __model: str = ""
+    __embedding_model: str = ""
+
+    __usage: Dict[Tuple[int, str], List] = {}
+    __candidates: Dict[int, None] = {}
+    __metrics: Dict[str, float] = {}
+
+    @classmethod
+    def start(
+        cls,
+        openai_client: AsyncOpenAI,
+        model: str,
+        embedding_model: str,
+        interval: int,
+        consolidate: bool,
+        min_memories: int,
+        similarity: float,
+        max_users: int
+    ) -> None:
+        """
+        Запускает фоновое обслуживание.
+
+        Args:
+            openai_client (AsyncOpenAI): Клиент OpenAI.
+            model (str): Модель для формулировки объединённых записей.
+            embedding_model (str): Модель embedding для объединённых записей.
+            interval (int): Период обслуживания (секунды).
+            consolidate (bool): Объединять ли похожие записи (учёт использования ведётся всегда).
+            min_memories (int): С какого количества записей у пользователя их начинают объединять.
+            similarity (float): Минимальное косинусное сходство записи с центром группы.
+            max_users (int): Максимальное количество пользователей за один проход.
+        """
+        cls.__openai_client = openai_client
+        cls.__model = model
+        cls.__embedding_model = embedding_model
+        cls.__interval = max(1, interval)
+        cls.__consolidate = consolidate
+        cls.__min_memories = max(2, min_memories)
+        cls.__similarity = similarity
+        cls.__max_users = max(1, max_users)
+        cls.__usage = {}
+        cls.__candidates = {}
+        cls.__metrics = {
+            "usage_flushes": 0, "usage_records": 0, "users_checked": 0,
+            "clusters_merged": 0, "memories_merged": 0, "rejected": 0, "errors": 0
+        }
+        cls.__task = asyncio.create_task(cls.__run())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """
+        Останавливает обслуживание и записывает накопленную статистику использования.
+        """
+        if cls.__task is None:
+            return
+
+        cls.__task.cancel()
+        try:
+            await cls.__task
+        except asyncio.CancelledError:
+            pass
+
+        cls.__task = None
+        await cls.__flush_usage()
+
+    @classmethod
+    def record_usage(cls, user_id: int, texts: List[str]) -> None:
+        """
+        Учитывает попадание записей в результаты поиска памяти (если обслуживание запущено).
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            texts (List[str]): Тексты найденных записей.
+        """
+        if cls.__task is None or not texts:
+            return
+
+        now = datetime.utcnow()
+        for text in texts:
+            entry = cls.__usage.get((user_id, text))
+            if entry is None:
+                cls.__usage[(user_id, text)] = [1, now]
+            else:
+                entry[0] += 1
+                entry[1] = now
+
+    @classmethod
+    def mark(cls, user_id: int) -> None:
+        """
+        Отмечает пользователя как кандидата на объединение записей памяти.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+        """
+        if cls.__task is not None and cls.__consolidate:
+            cls.__candidates[user_id] = None
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает метрики обслуживания.
+
+        Returns:
+            Dict[str, float]: usage_flushes, usage_records, users_checked, clusters_merged,
+                              memories_merged, rejected, errors, а также pending_usage и pending_users.
+        """
+        stats = dict(cls.__metrics)
+        stats["pending_usage"] = len(cls.__usage)
+        stats["pending_users"] = len(cls.__candidates)
+        return stats
+
+    @classmethod
+    async def __run(cls) -> None:
+        """Цикл обслуживания: запись статистики использования и объединение записей кандидатов."""
+        while True:
+            await asyncio.sleep(cls.__interval)
+            await cls.__flush_usage()
+
+            users = list(cls.__candidates)[:cls.__max_users]
+            for user_id in users:
+                cls.__candidates.pop(user_id, None)
+                try:
+                    await cls.consolidate_user(user_id)
+                except Exception as e:
+                    cls.__metrics["errors"] += 1
+                    logger.error(LOGGING_LEXICON["logging"]["memory_maintenance"]["consolidation_error"].format(user_id, e))
+
+    @classmethod
+    async def __flush_usage(cls) -> None:
+        """Записывает накопленные попадания одним запросом. Ошибки логируются."""
+        usage, cls.__usage = cls.__usage, {}
+        if not usage:
+            return
+
+        try:
+            await UsersMemoriesRepository.record_usage([
+                (user_id, text, hits, last_used_at) for (user_id, text), (hits, last_used_at) in usage.items()
+            ])
+            cls.__metrics["usage_flushes"] += 1
+            cls.__metrics["usage_records"] += len(usage)
+        except Exception as e:
+            cls.__metrics["errors"] += 1
+            logger.error(LOGGING_LEXICON["logging"]["memory_maintenance"]["usage_error"].format(len(usage), e))
+
+    @classmethod
+    async def consolidate_user(cls, user_id: int) -> int:
+        """
+        Объединяет группы похожих записей памяти пользователя.
+
+        Каждая группа (записи от старых к новым) отправляется модели; объединённая запись
+        принимается, только если она короче исходных записей вместе взятых.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            int: Количество объединённых групп.
+        """
+        if await UsersMemoriesRepository.count_memories(user_id) < cls.__min_memories:
+            return 0
+
+        cls.__metrics["users_checked"] += 1
+        with stage_timer("memory_consolidation"):
+            rows = await UsersMemoriesRepository.get_user_memories(user_id)
+            if len(rows) < cls.__min_memories:
+                return 0
+
+            clusters = find_clusters(np.asarray([vector for _, vector in rows]), cls.__similarity, cls.MAX_CLUSTER_SIZE)
+            merged = 0
+            for members in clusters:
+                texts = [rows[index][0] for index in sorted(members)]
+                summary = await AiMemoryUtils.consolidate_memories(texts, cls.__openai_client, cls.__model)
+                if not summary or len(summary) >= sum(len(text) for text in texts):
+                    cls.__metrics["rejected"] += 1
+                    continue
+
+                vector = await AiMemoryUtils.generate_embedding(summary, cls.__openai_client, cls.__embedding_model)
+                if await UsersMemoriesRepository.replace_memories(user_id, texts, summary, vector):
+                    merged += 1
+                    cls.__metrics["clusters_merged"] += 1
+                    cls.__metrics["memories_merged"] += len(texts)
+
+        return merged
 
 
 class TemporaryMemoryService:
@@ -100,53 +571,93 @@ class TemporaryMemoryService:
     Сервис управления краткосрочной памятью пользователей (Redis).
 
     Назначение:
-    - Хранение последних реплик диалога (пользователь + бот).
+    - Хранение последних реплик диалога (пользователь + бот) в виде структурированных записей
+      (роль, текст, оценка токенов, время) в компактной сериализации (`HistoryCodec`).
     - Быстро формирует контекст последних сообщений для AI.
 
     Ограничения:
-    - Хранится ограниченное количество сообщений.
+    - История обрезается по бюджету токенов (и не больше max_entries записей), длинные реплики
+      обрезаются до max_entry_tokens.
+    - История удаляется, если пользователь не обращался к ней дольше ttl (TTL продлевается при каждом обращении).
     """
 
-    @staticmethod
-    async def save(user_id: int, user_text: str, bot_reply: str) -> None:
+    __token_budget: int = 1500
+    __max_entries: int = 20
+    __ttl: int = 7 * 24 * 60 * 60
+    __max_entry_tokens: int = 300
+
+    @classmethod
+    def init(cls, token_budget: int, max_entries: int, ttl: int, max_entry_tokens: int) -> None:
         """
-        Сохраняет связку "пользователь + бот" в Redis.
+        Настраивает ограничения истории.
 
         Args:
-            user_id (int): Идентификатор пользователя.
-            user_text (str): Сообщение пользователя.
-            bot_reply (str): Ответ модели.
+            token_budget (int): Бюджет токенов истории.
+            max_entries (int): Максимальное количество записей в истории.
+            ttl (int): Время жизни истории с последнего обращения (секунды).
+            max_entry_tokens (int): Максимальная длина одной реплики (токены).
         """
-        await RedisMemoriesRepository.save_memory(user_id, f"User: {user_text}")
-        await RedisMemoriesRepository.save_memory(user_id, f"Bot: {bot_reply}")
+        cls.__token_budget = token_budget
+        cls.__max_entries = max_entries
+        cls.__ttl = ttl
+        cls.__max_entry_tokens = max_entry_tokens
 
-    @staticmethod
-    async def get(user_id: int) -> List[str]:
+    @classmethod
+    def encode(cls, role: str, text: str) -> bytes:
         """
-        Извлекает историю диалога пользователя из Redis.
+        Сериализует реплику для записи в Redis.
 
         Args:
-            user_id (int): Идентификатор пользователя.
+            role (str): Автор реплики: "user" или "bot".
+            text (str): Текст реплики.
 
         Returns:
-            List[str]: Список сообщений в формате ["User: ...", "Bot: ...", ...].
+            bytes: Сериализованная запись истории.
         """
-        return await RedisMemoriesRepository.get_memories(user_id)
+        return HistoryCodec.encode(HistoryEntry.create(role, text, cls.__max_entry_tokens))
 
     @staticmethod
-    async def build_context(user_id: int) -> str:
+    def render(entries: List[bytes]) -> List[str]:
         """
-        Формирует строковый контекст последних сообщений из Redis.
+        Args:
+            entries (List[bytes]): Сериализованные записи истории.
+
+        Returns:
+            List[str]: Сообщения в формате ["User: ...", "Bot: ...", ...].
+        """
+        return [HistoryCodec.decode(entry).render() for entry in entries]
+
+    @classmethod
+    async def save(cls, user_id: int, user_text: str, bot_reply: str) -> None:
+        """
+        Сохраняет связку "пользователь + бот" в Redis за один round trip.
+
+        Вызывается только после успешного ответа, чтобы в истории не оставалось
+        реплик пользователя без ответа.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            user_text (str): Сообщение пользователя.
+            bot_reply (str): Ответ модели.
+        """
+        await RedisMemoriesRepository.save_memories(
+            user_id,
+            [cls.encode("user", user_text), cls.encode("bot", bot_reply)],
+            cls.__token_budget, cls.__max_entries, cls.__ttl
+        )
+
+    @classmethod
+    async def get(cls, user_id: int) -> List[str]:
+        """
+        Извлекает историю диалога пользователя из Redis.
 
         Args:
             user_id (int): Идентификатор пользователя.
 
         Returns:
-            str: Контекст вида "Temporary memories:\nUser: ...\nBot: ...",
-                 или пустая строка, если сообщений нет.
+            List[str]: Сообщения в формате ["User: ...", "Bot: ...", ...] от новых к старым.
         """
-        temporary_context = await TemporaryMemoryService.get(user_id)
-        return "Temporary memories:\n" + "\n".join(temporary_context) if temporary_context else ""
+        return cls.render(await RedisMemoriesRepository.get_memories(user_id, cls.__max_entries, cls.__ttl))
 
 
 class MemoryContextService:
@@ -160,30 +671,43 @@ class MemoryContextService:
         user_id: int,
         user_text: str,
         openai_client: AsyncOpenAI,
+        chat_model: str,
         filter_model: str,
         embedding_model: str
-    ) -> str:
+    ) -> BuiltContext:
         """
         Формирует полный контекст для AI.
 
         Логика:
-        1. Достаёт краткосрочную память (последние сообщения из Redis).
-        2. Достаёт долгосрочную память (релевантные сообщения из PostgreSQL, если нужно).
-        3. Объединяет их в единую строку для передачи модели.
-        4. Сохраняет текущее сообщение в обе памяти.
+        1. Параллельно достаёт краткосрочную память (последние сообщения из Redis)
+           и долгосрочную память (релевантные сообщения из PostgreSQL, если нужно).
+           Если один из этапов падает, второй отменяется.
+        2. Собирает из них контекст в пределах бюджета токенов чат-модели (`ContextBuilder`).
+        3. Передает текущее сообщение на сохранение в долгосрочную память
+           (в краткосрочную оно сохраняется вместе с ответом через `TemporaryMemoryService.save`).
 
         Args:
             user_id (int): Идентификатор пользователя.
             user_text (str): Сообщение пользователя.
             openai_client (AsyncOpenAI): Клиент OpenAI.
+            chat_model (str): Модель, для которой собирается контекст (определяет бюджет токенов).
             filter_model (str): Модель для фильтрации значимых сообщений.
             embedding_model (str): Модель для генерации embedding текста.
 
         Returns:
-            str: Полный контекст сообщений (краткосрочные + долгосрочные).
+            BuiltContext: Полный контекст сообщений (краткосрочные + долгосрочные) в поле `text`
+                          (пустая строка, если памяти нет) и оценки токенов.
         """
-        temporary_context = await TemporaryMemoryService.build_context(user_id)
-        permanent_context = await PermanentMemoryService.build_context_and_save(
-            user_id, user_text, openai_client, filter_model, embedding_model
-        )
-        return temporary_context + "\n\n" + permanent_context
\ No newline at end of file
+        async with asyncio.TaskGroup() as tg:
+            temporary_task = tg.create_task(timed(
+                "history_fetch",
+                TemporaryMemoryService.get(user_id)
+            ))
+            permanent_task = tg.create_task(timed(
+                "permanent_memory",
+                PermanentMemoryService.search_and_save(
+                    user_id, user_text, openai_client, filter_model, embedding_model
+                )
+            ))
+
+        return ContextBuilder.build(chat_model, temporary_task.result(), permanent_task.result())
\ No newline at end of file
@@ -0,0 +1,237 @@
+import logging
+from typing import Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from openai import AsyncOpenAI
+
+from bot.handlers import common, chat
+from bot.middlewares import MailboxMiddleware, MetricsMiddleware, TelegramTimingMiddleware
+from bot.services.ai_services import ResponseCacheService
+from bot.services.memory_services import (
+    PermanentMemoryMaintenance, PermanentMemoryService, PermanentMemoryWriter, TemporaryMemoryService
+)
+from core.config import Config
+from core.lexicon import LOGGING_LEXICON
+from core.utils.enums import OpenAiModels
+from core.utils.embedding_cache import EmbeddingCache
+from core.utils.embedding_batcher import EmbeddingBatcher
+from core.utils.verdict_cache import VerdictCache
+from core.utils.activation_cache import ActivationCache
+from core.utils.context_builder import ContextBuilder
+from core.utils.history import HistoryCodec
+from core.utils.vector_store import UserVectorStore
+from core.utils.metrics import Metrics
+from database.setup import setup_db_connections
+from database.postgres.manager import PostgresManager
+from database.redis.repositories import RedisMemoriesRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_bot(config: Config) -> Bot:
+    """
+    Создает экземпляр Telegram-бота с настройками по умолчанию.
+
+    Args:
+        config (Config): Конфигурация приложения.
+
+    Returns:
+        Bot: Экземпляр бота (разметка Markdown по умолчанию).
+    """
+    return Bot(
+        token=config.tg_bot.token,
+        default=DefaultBotProperties(parse_mode="Markdown")
+    )
+
+
+async def setup_bot(config: Config, worker_index: int = 0, create_schema: bool = True) -> Tuple[Bot, Dispatcher]:
+    """
+    Полная инициализация процесса, обрабатывающего апдейты.
+
+    Используется и при long polling, и в каждом процессе-обработчике webhook:
+    1. Создает бота и диспетчер, подключает роутеры и middleware почтовых ящиков.
+    2. Настраивает соединения с базами данных.
+    3. Инициализирует кэши и фоновую запись долгосрочной памяти.
+    4. Создает клиент OpenAI и заполняет общие данные обработчиков.
+    5. Запускает HTTP-сервер метрик Prometheus (если метрики включены).
+
+    Args:
+        config (Config): Конфигурация приложения.
+        worker_index (int): Номер процесса-обработчика webhook (смещение порта метрик).
+        create_schema (bool): Создавать ли схему PostgreSQL (процессы-обработчики webhook получают
+                              уже созданную схему от родительского процесса).
+
+    Returns:
+        Tuple[Bot, Dispatcher]: Бот и диспетчер, готовые к обработке апдейтов.
+    """
+    # --- Инициализация Telegram-бота ---
+    bot = create_bot(config)
+    bot.session.middleware(TelegramTimingMiddleware())
+    dp = Dispatcher()
+
+    # --- Подключение роутеров (обработчиков команд и сообщений) ---
+    dp.include_routers(
+        common.router,
+        chat.router
+    )
+
+    # --- Метрики: подключаются первыми, чтобы учитывать ожидание в почтовом ящике ---
+    Metrics.init(enabled=config.metrics.enabled)
+    if config.metrics.enabled:
+        dp.update.outer_middleware(MetricsMiddleware())
+
+    # --- Упорядоченная обработка апдейтов пользователя и общий лимит параллелизма ---
+    mailbox = MailboxMiddleware(
+        max_in_flight=config.mailbox.max_in_flight,
+        slot_wait=config.mailbox.slot_wait_ms / 1000
+    )
+    dp.update.outer_middleware(mailbox)
+
+    # --- Инициализация подключений к базам данных ---
+    await setup_db_connections(
+        postgres=config.postgres,
+        redis_url=config.redis_url,
+        create_schema=create_schema
+    )
+
+    # --- Инициализация кэшей ---
+    EmbeddingCache.init(
+        max_size=config.cache.embedding_cache_size,
+        ttl=config.cache.embedding_cache_ttl
+    )
+    VerdictCache.init(
+        max_size=config.cache.verdict_cache_size,
+        ttl=config.cache.verdict_cache_ttl,
+        log_path=config.cache.verdict_log_path,
+        log_max_bytes=config.cache.verdict_log_max_mb * 1024 * 1024
+    )
+    VerdictCache.warm_up()
+    ActivationCache.init(
+        max_size=config.cache.activation_cache_size,
+        ttl=config.cache.activation_cache_ttl
+    )
+    UserVectorStore.init(memory_budget=config.cache.vector_store_budget_mb * 1024 * 1024)
+    EmbeddingBatcher.init(
+        max_batch_size=config.batching.embedding_batch_size,
+        max_wait_ms=config.batching.embedding_batch_wait_ms
+    )
+
+    ResponseCacheService.init(
+        enabled=config.response_cache.enabled,
+        similarity_threshold=config.response_cache.similarity_threshold,
+        ttl=config.response_cache.ttl,
+        max_entries=config.response_cache.max_entries,
+        min_length=config.response_cache.min_length
+    )
+
+    # --- Ограничения контекста памяти для модели ---
+    ContextBuilder.init(
+        max_entry_tokens=config.context.max_entry_tokens,
+        token_budget=config.context.token_budget
+    )
+
+    # --- Краткосрочная история: бюджет токенов, TTL и сжатие записей ---
+    HistoryCodec.init(compress_min_bytes=config.history.compress_min_bytes)
+    TemporaryMemoryService.init(
+        token_budget=config.history.token_budget,
+        max_entries=config.history.max_entries,
+        ttl=config.history.ttl,
+        max_entry_tokens=config.context.max_entry_tokens
+    )
+    if worker_index == 0:
+        expired = await RedisMemoriesRepository.expire_histories(config.history.ttl)
+        logger.info(LOGGING_LEXICON["logging"]["history"]["expired"].format(expired))
+
+    # --- Подавление дубликатов и запуск фоновой записи долгосрочной памяти ---
+    PermanentMemoryService.init(duplicate_similarity=config.permanent_memory.duplicate_similarity)
+    PermanentMemoryWriter.start(
+        max_queue_size=config.memory_writer.queue_size,
+        batch_size=config.memory_writer.batch_size,
+        flush_interval_ms=config.memory_writer.flush_interval_ms
+    )
+
+    # --- Инициализация OpenAI клиента ---
+    openai_client = AsyncOpenAI(
+        api_key=config.aitunnel_api_key,
+        base_url="https://api.aitunnel.ru/v1/"
+    )
+
+    # --- Фоновое обслуживание долгосрочной памяти: статистика использования и объединение записей ---
+    PermanentMemoryMaintenance.start(
+        openai_client=openai_client,
+        model=OpenAiModels.GPT_5_NANO.value,
+        embedding_model=OpenAiModels.TEXT_EMBEDDING_3_SMALL.value,
+        interval=config.permanent_memory.maintenance_interval,
+        consolidate=config.permanent_memory.consolidation_enabled,
+        min_memories=config.permanent_memory.consolidation_min_memories,
+        similarity=config.permanent_memory.consolidation_similarity,
+        max_users=config.permanent_memory.consolidation_max_users
+    )
+
+    # --- Общие данные, доступные во всех обработчиках ---
+    dp.workflow_data.update({
+        "mailbox": mailbox,
+        "admin_ids": config.tg_bot.admin_ids,
+        "openai_client": openai_client,
+        "chat_model": OpenAiModels.GPT_5_MINI.value,
+        "filter_model": OpenAiModels.GPT_5_NANO.value,
+        "embedding_model": OpenAiModels.TEXT_EMBEDDING_3_SMALL.value,
+        "stream_replies": config.streaming.enabled,
+        "stream_edit_interval": config.streaming.edit_interval_ms / 1000
+    })
+
+    # --- Метрики Prometheus: статистика компонентов и HTTP-сервер /metrics ---
+    if config.metrics.enabled:
+        for component, source in (
+            ("mailbox", mailbox.stats),
+            ("permanent_memory", PermanentMemoryService.stats),
+            ("memory_writer", PermanentMemoryWriter.stats),
+            ("memory_maintenance", PermanentMemoryMaintenance.stats),
+            ("embedding_cache", EmbeddingCache.stats),
+            ("verdict_cache", VerdictCache.stats),
+            ("vector_store", UserVectorStore.stats),
+            ("context", ContextBuilder.stats),
+            ("history", HistoryCodec.stats),
+            ("response_cache", ResponseCacheService.stats)
+        ):
+            Metrics.register_stats(component, source)
+        await Metrics.start_server(config.metrics.host, config.metrics.port + worker_index)
+
+    return bot, dp
+
+
+async def shutdown_bot(bot: Bot, dp: Dispatcher) -> None:
+    """
+    Корректное завершение процесса, обрабатывающего апдейты.
+
+    Дожидается записи принятых сообщений и статистики использования в долгосрочную память,
+    пишет статистику очередей апдейтов и кэшей, дописывает журнал решений AI-фильтра,
+    закрывает сессию бота и соединения с базами данных.
+
+    Args:
+        bot (Bot): Экземпляр Telegram-бота.
+        dp (Dispatcher): Диспетчер, созданный `setup_bot`.
+    """
+    # --- Дожидаемся записи принятых сообщений и статистики использования в долгосрочную память ---
+    await PermanentMemoryWriter.stop()
+    await PermanentMemoryMaintenance.stop()
+
+    logger.info(LOGGING_LEXICON["logging"]["bot"]["stop"])
+    logger.info(LOGGING_LEXICON["logging"]["mailbox"]["stats"].format(dp["mailbox"].stats()))
+    logger.info(LOGGING_LEXICON["logging"]["memory_writer"]["stopped"].format(PermanentMemoryWriter.stats()))
+    logger.info(LOGGING_LEXICON["logging"]["permanent_memory"]["stats"].format(PermanentMemoryService.stats()))
+    logger.info(LOGGING_LEXICON["logging"]["memory_maintenance"]["stopped"].format(PermanentMemoryMaintenance.stats()))
+    logger.info(LOGGING_LEXICON["logging"]["cache"]["embedding_stats"].format(EmbeddingCache.stats()))
+    logger.info(LOGGING_LEXICON["logging"]["cache"]["verdict_stats"].format(VerdictCache.stats()))
+    VerdictCache.close()
+    logger.info(LOGGING_LEXICON["logging"]["vector_store"]["stats"].format(UserVectorStore.stats()))
+    logger.info(LOGGING_LEXICON["logging"]["context"]["stats"].format(ContextBuilder.stats()))
+    logger.info(LOGGING_LEXICON["logging"]["history"]["stats"].format(HistoryCodec.stats()))
+    logger.info(LOGGING_LEXICON["logging"]["response_cache"]["stats"].format(ResponseCacheService.stats()))
+
+    # --- Закрытие сервера метрик, сессии бота и соединений с БД ---
+    await Metrics.stop_server()
+    await bot.session.close()
+    await PostgresManager.close()
@@ -0,0 +1,369 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+
+from bot.setup import create_bot, setup_bot, shutdown_bot
+from core.config import Config
+from core.lexicon import LOGGING_LEXICON
+from core.loggers import setup_logging
+from database.setup import setup_db_schema
+
+
+logger = logging.getLogger(__name__)
+
+# Поля апдейта, по которым определяется пользователь (в порядке приоритета)
+_USER_FIELDS = ("from", "user", "chat")
+
+# Период проверки процессов-обработчиков и время ожидания их остановки (секунды)
+WORKER_CHECK_INTERVAL = 5.0
+WORKER_STOP_TIMEOUT = 30.0
+
+
+def extract_user_id(update: Dict[str, Any]) -> int:
+    """
+    Определяет ID пользователя (или чата), к которому относится апдейт.
+
+    Апдейт Telegram содержит ровно одно событие (message, callback_query, ...),
+    ID берется из его поля `from`, `user` или `chat`.
+
+    Args:
+        update (Dict[str, Any]): Апдейт Telegram в виде JSON-объекта.
+
+    Returns:
+        int: ID пользователя или 0, если апдейт не привязан к пользователю.
+    """
+    for event in update.values():
+        if not isinstance(event, dict):
+            continue
+        for field in _USER_FIELDS:
+            owner = event.get(field)
+            if isinstance(owner, dict) and "id" in owner:
+                return owner["id"]
+    return 0
+
+
+class UpdateFeeder:
+    """
+    Передает апдейты в диспетчер, каждый — отдельной задачей (как `handle_as_tasks` в режиме polling).
+
+    Порядок обработки апдейтов пользователя и общий лимит параллелизма обеспечивает
+    `MailboxMiddleware`, поэтому его очереди и метрики отражают все принятые апдейты.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot):
+        """
+        Args:
+            dispatcher (Dispatcher): Диспетчер aiogram.
+            bot (Bot): Экземпляр Telegram-бота.
+        """
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, update: Dict[str, Any]) -> None:
+        """
+        Запускает обработку апдейта.
+
+        Args:
+            update (Dict[str, Any]): Апдейт Telegram.
+        """
+        task = asyncio.create_task(self._feed(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _feed(self, update: Dict[str, Any]) -> None:
+        """
+        Обрабатывает апдейт, логируя ошибки.
+
+        Args:
+            update (Dict[str, Any]): Апдейт Telegram.
+        """
+        try:
+            await self.dispatcher.feed_raw_update(self.bot, update)
+        except Exception as e:
+            logger.exception(LOGGING_LEXICON["logging"]["webhook"]["update_error"].format(update.get("update_id"), e))
+
+    async def drain(self) -> None:
+        """Дожидается обработки всех принятых апдейтов."""
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+
+class RoutingRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик webhook-запросов aiohttp, который не обрабатывает апдейт сам,
+    а передает его функции маршрутизации вместе с ID пользователя.
+
+    Telegram получает ответ сразу после приема апдейта. Если маршрутизация
+    не смогла принять апдейт (очередь переполнена), возвращается 503 —
+    Telegram повторит доставку позже.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        route: Callable[[int, Dict[str, Any]], bool],
+        secret_token: Optional[str] = None
+    ):
+        """
+        Args:
+            dispatcher (Dispatcher): Диспетчер aiogram (события startup/shutdown).
+            bot (Bot): Экземпляр Telegram-бота.
+            route (Callable[[int, Dict[str, Any]], bool]): Функция приема апдейта (user_id, update) -> принят ли.
+            secret_token (Optional[str]): Секрет заголовка X-Telegram-Bot-Api-Secret-Token.
+        """
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, secret_token=secret_token)
+        self.route = route
+
+    async def close(self) -> None:
+        """Сессию бота закрывает владелец — после обработки уже принятых апдейтов."""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Проверяет секрет запроса и передает апдейт функции маршрутизации.
+
+        Переопределяется публичный `handle` (маршрут aiohttp), а не внутренние методы
+        обработки aiogram, чтобы обновление aiogram не меняло поведение незаметно.
+
+        Args:
+            request (web.Request): Запрос Telegram с апдейтом.
+
+        Returns:
+            web.Response: 200 — апдейт принят, 401 — неверный секрет, 503 — очередь переполнена.
+        """
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+
+        update = await request.json(loads=bot.session.json_loads)
+        if not self.route(extract_user_id(update), update):
+            return web.Response(status=503)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    __call__ = handle
+
+
+def run_worker(index: int, updates: multiprocessing.Queue, config: Config) -> None:
+    """
+    Точка входа процесса-обработчика апдейтов (запускается через spawn).
+
+    SIGINT игнорируется: Ctrl-C получает вся группа процессов, а обработчик должен дочитать
+    свою очередь до сигнала остановки (None), который родитель отправляет при завершении.
+
+    Args:
+        index (int): Номер процесса-обработчика.
+        updates (multiprocessing.Queue): Очередь апдейтов этого обработчика (None — остановка).
+        config (Config): Конфигурация приложения.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging("core/loggers/config.yaml")
+    asyncio.run(_worker_main(index, updates, config))
+
+
+async def _worker_main(index: int, updates: multiprocessing.Queue, config: Config) -> None:
+    """
+    Цикл процесса-обработчика: читает апдейты из очереди и передает их в диспетчер.
+
+    Args:
+        index (int): Номер процесса-обработчика.
+        updates (multiprocessing.Queue): Очередь апдейтов этого обработчика.
+        config (Config): Конфигурация приложения.
+    """
+    bot, dp = await setup_bot(config, worker_index=index, create_schema=False)
+    feeder = UpdateFeeder(dp, bot)
+    loop = asyncio.get_running_loop()
+
+    await dp.emit_startup(bot=bot, **dp.workflow_data)
+    logger.info(LOGGING_LEXICON["logging"]["webhook"]["worker_started"].format(index))
+
+    try:
+        while (update := await loop.run_in_executor(None, updates.get)) is not None:
+            feeder.submit(update)
+    finally:
+        # Уже принятые апдейты обрабатываются и при прерывании (Ctrl-C доходит и до обработчиков)
+        await feeder.drain()
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+        await shutdown_bot(bot, dp)
+
+
+def _start_worker(
+    context: multiprocessing.context.BaseContext,
+    index: int,
+    updates: multiprocessing.Queue,
+    config: Config
+) -> multiprocessing.Process:
+    """
+    Запускает процесс-обработчик апдейтов.
+
+    Args:
+        context (multiprocessing.context.BaseContext): Контекст multiprocessing (spawn).
+        index (int): Номер процесса-обработчика.
+        updates (multiprocessing.Queue): Очередь апдейтов этого обработчика.
+        config (Config): Конфигурация приложения.
+
+    Returns:
+        multiprocessing.Process: Запущенный процесс.
+    """
+    worker = context.Process(target=run_worker, args=(index, updates, config), name=f"bot-worker-{index}")
+    worker.start()
+    return worker
+
+
+async def _supervise(
+    context: multiprocessing.context.BaseContext,
+    workers: List[multiprocessing.Process],
+    queues: List[multiprocessing.Queue],
+    config: Config
+) -> None:
+    """
+    Перезапускает завершившиеся процессы-обработчики на их же очередях,
+    чтобы апдейты их пользователей (`user_id % N`) не отклонялись до перезапуска бота.
+
+    Args:
+        context (multiprocessing.context.BaseContext): Контекст multiprocessing (spawn).
+        workers (List[multiprocessing.Process]): Процессы-обработчики (обновляется на месте).
+        queues (List[multiprocessing.Queue]): Очереди апдейтов обработчиков.
+        config (Config): Конфигурация приложения.
+    """
+    while True:
+        await asyncio.sleep(WORKER_CHECK_INTERVAL)
+        for index, worker in enumerate(workers):
+            if not worker.is_alive():
+                logger.error(LOGGING_LEXICON["logging"]["webhook"]["worker_died"].format(index, worker.exitcode))
+                workers[index] = _start_worker(context, index, queues[index], config)
+
+
+async def _stop_workers(workers: List[multiprocessing.Process], queues: List[multiprocessing.Queue]) -> None:
+    """
+    Останавливает процессы-обработчики после обработки уже принятых апдейтов.
+
+    Обработчик, который не успел дочитать очередь и завершиться за `WORKER_STOP_TIMEOUT`
+    (или очередь которого переполнена), завершается принудительно.
+
+    Args:
+        workers (List[multiprocessing.Process]): Процессы-обработчики.
+        queues (List[multiprocessing.Queue]): Очереди апдейтов обработчиков.
+    """
+    for worker, updates in zip(workers, queues):
+        if worker.is_alive():
+            try:
+                await asyncio.to_thread(updates.put, None, timeout=WORKER_STOP_TIMEOUT)
+            except queue.Full:
+                pass
+
+    for index, worker in enumerate(workers):
+        await asyncio.to_thread(worker.join, WORKER_STOP_TIMEOUT)
+        if worker.is_alive():
+            logger.warning(LOGGING_LEXICON["logging"]["webhook"]["worker_stop_timeout"].format(index, WORKER_STOP_TIMEOUT))
+            worker.terminate()
+            await asyncio.to_thread(worker.join)
+
+
+async def _serve(app: web.Application, config: Config) -> None:
+    """
+    Запускает HTTP-сервер webhook и работает до отмены.
+
+    Args:
+        app (web.Application): Приложение aiohttp.
+        config (Config): Конфигурация приложения.
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=config.webhook.host, port=config.webhook.port).start()
+        logger.info(LOGGING_LEXICON["logging"]["webhook"]["start"].format(
+            config.webhook.host, config.webhook.port, config.webhook.path, config.webhook.workers
+        ))
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def _set_webhook(bot: Bot, config: Config) -> None:
+    """
+    Регистрирует webhook в Telegram, отбрасывая апдейты, пришедшие до старта бота.
+
+    Args:
+        bot (Bot): Экземпляр Telegram-бота.
+        config (Config): Конфигурация приложения.
+    """
+    await bot.set_webhook(
+        url=config.webhook.base_url.rstrip("/") + config.webhook.path,
+        secret_token=config.webhook.secret or None,
+        drop_pending_updates=True
+    )
+
+
+async def run_webhook(config: Config) -> None:
+    """
+    Запускает бота в режиме webhook.
+
+    При `workers <= 1` апдейты обрабатываются в этом же процессе. Иначе процесс только
+    принимает HTTP-запросы и раскладывает апдейты по очередям N процессов-обработчиков
+    по `user_id % N`: апдейты одного пользователя всегда попадают в один процесс,
+    где `MailboxMiddleware` обрабатывает их в порядке поступления. Завершившийся
+    процесс-обработчик перезапускается на той же очереди.
+
+    Args:
+        config (Config): Конфигурация приложения.
+    """
+    app = web.Application()
+
+    if config.webhook.workers <= 1:
+        bot, dp = await setup_bot(config)
+        feeder = UpdateFeeder(dp, bot)
+
+        def route(user_id: int, update: Dict[str, Any]) -> bool:
+            feeder.submit(update)
+            return True
+
+        RoutingRequestHandler(dp, bot, route, config.webhook.secret or None).register(app, path=config.webhook.path)
+        await dp.emit_startup(bot=bot, **dp.workflow_data)
+        await _set_webhook(bot, config)
+
+        try:
+            await _serve(app, config)
+        finally:
+            await feeder.drain()
+            await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+            await shutdown_bot(bot, dp)
+        return
+
+    # --- Схема PostgreSQL создается один раз, до запуска процессов-обработчиков ---
+    await setup_db_schema(config.postgres)
+
+    # --- Процессы-обработчики со своими очередями апдейтов ---
+    context = multiprocessing.get_context("spawn")
+    queues: List[multiprocessing.Queue] = [
+        context.Queue(maxsize=config.webhook.queue_size) for _ in range(config.webhook.workers)
+    ]
+    workers = [_start_worker(context, index, updates, config) for index, updates in enumerate(queues)]
+    supervisor = asyncio.create_task(_supervise(context, workers, queues, config))
+
+    def route(user_id: int, update: Dict[str, Any]) -> bool:
+        try:
+            queues[user_id % len(queues)].put_nowait(update)
+            return True
+        except queue.Full:
+            logger.warning(LOGGING_LEXICON["logging"]["webhook"]["queue_full"].format(user_id % len(queues)))
+            return False
+
+    bot = create_bot(config)
+    RoutingRequestHandler(Dispatcher(), bot, route, config.webhook.secret or None).register(app, path=config.webhook.path)
+    await _set_webhook(bot, config)
+
+    try:
+        await _serve(app, config)
+    finally:
+        # --- Останавливаем обработчики после обработки уже принятых апдейтов ---
+        supervisor.cancel()
+        await _stop_workers(workers, queues)
+        await bot.session.close()
@@ -1 +1,15 @@
-from .lexicon import LOGGING_LEXICON, RULE_BASED_LEXICON, SYSTEM_PROMPTS_LEXICON, BAD_WORDS_LEXICON
+from typing import Any
+
+from .lexicon import LEXICON_NAMES, get_lexicon
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Ленивый доступ к словарям: `from core.lexicon import LOGGING_LEXICON` загружает
+    артефакт словарей при первом обращении, после чего значение сохраняется в модуле.
+    """
+    if name not in LEXICON_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = get_lexicon(name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,153 @@
+"""
+Скомпилированный артефакт словарей `core/lexicon`.
+
+YAML-файлы словарей разбираются, плохие слова нормализуются через pymorphy3,
+а правила rule-based фильтров собираются в готовые регулярные выражения один раз —
+результат сохраняется в бинарный файл рядом со словарями. Последующие процессы
+(в том числе процессы-обработчики webhook) только читают этот файл.
+
+Артефакт проверяется по хэшам исходных YAML и пересобирается автоматически,
+если словари изменились. Пути не зависят от текущей директории.
+
+Сборка вручную (например, при сборке образа):
+    python -m core.lexicon.compiled
+"""
+import os
+import pickle
+import re
+import tempfile
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+
+# Версия формата артефакта: увеличивается при изменении структуры или способа компиляции
+ARTIFACT_VERSION = 1
+
+LEXICON_DIR = Path(__file__).resolve().parent
+
+# Исходные словари: ключ в артефакте → YAML-файл
+SOURCES = {
+    "logging": LEXICON_DIR / "logging.yaml",
+    "rule_based": LEXICON_DIR / "rule_based.yaml",
+    "system_prompts": LEXICON_DIR / "system_prompts.yaml",
+    "bad_words": LEXICON_DIR / "bad_words.yaml",
+}
+
+ARTIFACT_PATH = LEXICON_DIR / "lexicon.compiled.pickle"
+
+
+def source_hashes() -> Dict[str, str]:
+    """
+    Считает хэши исходных YAML-файлов.
+
+    Returns:
+        Dict[str, str]: Ключ словаря → hex-хэш BLAKE2b содержимого файла.
+    """
+    return {name: blake2b(path.read_bytes(), digest_size=16).hexdigest() for name, path in SOURCES.items()}
+
+
+def compile_rule_patterns(noise_patterns: Iterable[str], important_keywords: Iterable[str]) -> Dict[str, str]:
+    """
+    Собирает правила rule-based фильтров в два регулярных выражения.
+
+    - шаблоны шума объединяются в одну альтернацию (семантика `re.match`);
+    - ключевые слова приводятся к нижнему регистру и объединяются в одно выражение,
+      длинные раньше коротких, чтобы результат не зависел от порядка в YAML.
+
+    Args:
+        noise_patterns (Iterable[str]): Регулярные выражения шума.
+        important_keywords (Iterable[str]): Важные ключевые слова.
+
+    Returns:
+        Dict[str, str]: noise_pattern и keywords_pattern.
+    """
+    keywords = sorted({keyword.lower() for keyword in important_keywords}, key=len, reverse=True)
+    return {
+        "noise_pattern": "|".join(f"(?:{pattern})" for pattern in noise_patterns),
+        "keywords_pattern": "|".join(re.escape(keyword) for keyword in keywords),
+    }
+
+
+def compile_lexicons(hashes: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Компилирует словари из YAML (медленный путь: PyYAML и pymorphy3).
+
+    Плохие слова нормализуются так же, как `core.utils.text_normalization.normalize_text`.
+
+    Args:
+        hashes (Dict[str, str]): Хэши исходных файлов, которые будут записаны в артефакт.
+
+    Returns:
+        Dict[str, Any]: Содержимое артефакта.
+    """
+    import yaml
+    from pymorphy3 import MorphAnalyzer
+
+    data: Dict[str, Any] = {}
+    for name, path in SOURCES.items():
+        with open(path, "r", encoding="utf-8") as file:
+            data[name] = yaml.safe_load(file)
+
+    morph = MorphAnalyzer(lang="ru")
+    bad_words = data.pop("bad_words").get("bad_words", [])
+    rules = data["rule_based"]["rules"]
+
+    return {
+        "version": ARTIFACT_VERSION,
+        "hashes": hashes,
+        **data,
+        "bad_words": frozenset(morph.parse(word.lower())[0].normal_form for word in bad_words if word.strip()),
+        "rule_patterns": compile_rule_patterns(rules["noise_patterns"], rules["important_keywords"]),
+    }
+
+
+def save_artifact(data: Dict[str, Any]) -> None:
+    """
+    Атомарно записывает артефакт (через временный файл), чтобы параллельно
+    стартующие процессы не прочитали его частично.
+
+    Args:
+        data (Dict[str, Any]): Содержимое артефакта.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=LEXICON_DIR, prefix=".lexicon-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, ARTIFACT_PATH)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_lexicons() -> Dict[str, Any]:
+    """
+    Загружает словари из артефакта, пересобирая его, если он отсутствует, повреждён
+    или не совпадает с исходными YAML по хэшам.
+
+    Если записать артефакт нельзя (например, файловая система только для чтения),
+    используются скомпилированные в памяти словари.
+
+    Returns:
+        Dict[str, Any]: Словари logging, rule_based, system_prompts, bad_words и rule_patterns.
+    """
+    hashes = source_hashes()
+    try:
+        with open(ARTIFACT_PATH, "rb") as file:
+            data = pickle.load(file)
+        if data.get("version") == ARTIFACT_VERSION and data.get("hashes") == hashes:
+            return data
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        pass
+
+    data = compile_lexicons(hashes)
+    try:
+        save_artifact(data)
+    except OSError:
+        pass
+    return data
+
+
+if __name__ == "__main__":
+    save_artifact(compile_lexicons(source_hashes()))
+    print(f"Lexicon artifact written to {ARTIFACT_PATH}")
@@ -1,21 +1,47 @@
-import yaml
-from core.utils.text_normalization import normalize_text
+from functools import lru_cache
+from typing import Any, Dict
 
+from core.lexicon.compiled import load_lexicons
 
-# ------------------- Загрузка логов -------------------
-with open('core/lexicon/logging.yaml', 'r', encoding='utf-8') as file:
-    LOGGING_LEXICON = yaml.safe_load(file)  # Словарь с текстами для логирования
 
-# ------------------- Правила для rule-based фильтров -------------------
-with open('core/lexicon/rule_based.yaml', 'r', encoding='utf-8') as file:
-    RULE_BASED_LEXICON = yaml.safe_load(file)  # Словарь с правилами для фильтров
+# ------------------- Имена словарей -------------------
+# Константа пакета `core.lexicon` → ключ в скомпилированном артефакте:
+# - LOGGING_LEXICON: тексты для логирования
+# - RULE_BASED_LEXICON: правила для rule-based фильтров
+# - SYSTEM_PROMPTS_LEXICON: системные промпты для AI
+# - BAD_WORDS_LEXICON: нормализованные через pymorphy плохие слова (frozenset)
+# - RULE_PATTERNS: правила фильтров, собранные в регулярные выражения
+LEXICON_NAMES = {
+    "LOGGING_LEXICON": "logging",
+    "RULE_BASED_LEXICON": "rule_based",
+    "SYSTEM_PROMPTS_LEXICON": "system_prompts",
+    "BAD_WORDS_LEXICON": "bad_words",
+    "RULE_PATTERNS": "rule_patterns",
+}
 
-# ------------------- Системные промпты для AI -------------------
-with open('core/lexicon/system_prompts.yaml', 'r', encoding='utf-8') as file:
-    SYSTEM_PROMPTS_LEXICON = yaml.safe_load(file)  # Словарь с системными промптами
 
-# ------------------- Словарь плохих слов -------------------
-with open('core/lexicon/bad_words.yaml', 'r', encoding='utf-8') as file:
-    data = yaml.safe_load(file)
-    bad_words = set(data.get("bad_words", []))  # Преобразуем в set для быстрого поиска
-    BAD_WORDS_LEXICON = normalize_text(bad_words)  # Нормализуем слова через pymorphy
+@lru_cache(maxsize=1)
+def get_lexicons() -> Dict[str, Any]:
+    """
+    Загружает словари при первом обращении (см. `core.lexicon.compiled.load_lexicons`).
+
+    Returns:
+        Dict[str, Any]: Содержимое скомпилированного артефакта словарей.
+    """
+    return load_lexicons()
+
+
+def get_lexicon(name: str) -> Any:
+    """
+    Возвращает словарь по имени константы.
+
+    Args:
+        name (str): Имя константы (например, "LOGGING_LEXICON").
+
+    Returns:
+        Any: Словарь.
+
+    Raises:
+        KeyError: Если такого словаря нет.
+    """
+    return get_lexicons()[LEXICON_NAMES[name]]
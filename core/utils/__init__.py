@@ -1,5 +1,15 @@
+from . import cache
+from . import timing
+from . import embedding_cache
+from . import embedding_batcher
+from . import verdict_cache
+from . import activation_cache
 from . import ai_utils
 from . import enums
 from . import chat
 from . import text_normalization
+from . import rule_engine
 from . import memory_filters
+from . import context_builder
+from . import history
+from . import vector_store
@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, Optional
+
+from redis.exceptions import RedisError
+
+from core.lexicon import LOGGING_LEXICON
+from core.utils.cache import LRUCache
+from database.redis.repositories import RedisUsersRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+class ActivationCache:
+    """
+    Кэш статуса активации пользователей (in-process LRU + Redis).
+
+    Обновляется по схеме write-through из `UsersRepository`.
+    Кэшируются только активированные пользователи: активация необратима, поэтому такая запись
+    не может устареть, даже если статус меняет другой процесс. Отрицательный статус не кэшируется:
+    если запись активации в Redis не удалась или опоздавшая запись "не активирован"
+    перезаписала бы её, активированный пользователь получал бы отказ до истечения TTL.
+    """
+
+    __memory: LRUCache = LRUCache(max_size=0)
+    __ttl: int = 0
+
+    @classmethod
+    def init(cls, max_size: int, ttl: int) -> None:
+        """
+        Настраивает кэш.
+
+        Args:
+            max_size (int): Максимальное количество пользователей в памяти процесса.
+            ttl (int): Время жизни статуса в Redis (секунды). 0 — Redis-уровень отключён.
+        """
+        cls.__memory = LRUCache(max_size=max_size)
+        cls.__ttl = ttl
+
+    @classmethod
+    async def get(cls, user_id: int) -> Optional[bool]:
+        """
+        Возвращает закэшированный статус активации.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            Optional[bool]: True, если пользователь активирован, или None, если статус нужно читать из PostgreSQL.
+        """
+        if cls.__memory.get(user_id):
+            return True
+
+        if cls.__ttl <= 0:
+            return None
+
+        try:
+            is_active = await RedisUsersRepository.get_activation(user_id)
+        except (RedisError, RuntimeError) as e:
+            logger.warning(LOGGING_LEXICON["logging"]["cache"]["redis_error"].format(user_id, e))
+            return None
+
+        if not is_active:
+            return None
+        cls.__memory.set(user_id, True)
+        return True
+
+    @classmethod
+    async def set_active(cls, user_id: int) -> None:
+        """
+        Записывает в кэш активацию пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+        """
+        cls.__memory.set(user_id, True)
+
+        if cls.__ttl > 0:
+            try:
+                await RedisUsersRepository.save_activation(user_id, cls.__ttl)
+            except (RedisError, RuntimeError) as e:
+                logger.warning(LOGGING_LEXICON["logging"]["cache"]["redis_error"].format(user_id, e))
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """Возвращает статистику in-process уровня кэша."""
+        return cls.__memory.stats()
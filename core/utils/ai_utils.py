@@ -4,6 +4,10 @@ from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam
 
 from core.lexicon import SYSTEM_PROMPTS_LEXICON
+from core.utils.embedding_cache import EmbeddingCache
+from core.utils.embedding_batcher import EmbeddingBatcher
+from core.utils.verdict_cache import VerdictCache
+from core.utils.timing import stage_timer
 
 
 class AiMemoryUtils:
@@ -13,6 +17,7 @@ class AiMemoryUtils:
     Основные функции:
     - Генерация векторного представления текста (embedding) для хранения в памяти.
     - Оценка значимости сообщения через AI (для фильтрации важного контента).
+    - Объединение группы похожих записей памяти в одну через AI.
     """
 
     # ------------------- Генерация embedding -------------------
@@ -22,6 +27,9 @@ class AiMemoryUtils:
         """
         Генерирует векторное представление текста пользователя.
 
+        Сначала ищет вектор в `EmbeddingCache`. При промахе запрос проходит через
+        `EmbeddingBatcher`, который объединяет одновременные запросы в один вызов API.
+
         Args:
             text (str): Текст сообщения.
             openai_client (AsyncOpenAI): Асинхронный клиент OpenAI.
@@ -30,11 +38,14 @@ class AiMemoryUtils:
         Returns:
             List[float]: Векторное представление текста (embedding).
         """
-        emb = await openai_client.embeddings.create(
-            model=model,
-            input=text
-        )
-        return emb.data[0].embedding
+        cached = await EmbeddingCache.get(model, text)
+        if cached is not None:
+            return cached
+
+        vector = await EmbeddingBatcher.get(openai_client, model).embed(text)
+
+        await EmbeddingCache.set(model, text, vector)
+        return vector
 
     # ------------------- Оценка важности через AI -------------------
 
@@ -44,9 +55,10 @@ class AiMemoryUtils:
         Определяет, следует ли сохранять сообщение, с помощью AI.
 
         Логика:
-        1. Использует системный промпт из lexicon для правил фильтрации.
-        2. Отправляет текст пользователя как пользовательское сообщение.
-        3. Получает ответ модели: "да" или "нет".
+        1. Ищет готовое решение для этого текста и модели в `VerdictCache`.
+        2. Использует системный промпт из lexicon для правил фильтрации.
+        3. Отправляет текст пользователя как пользовательское сообщение.
+        4. Получает ответ модели: "да" или "нет" и сохраняет его в кэш.
 
         Args:
             text (str): Текст сообщения пользователя.
@@ -56,6 +68,10 @@ class AiMemoryUtils:
         Returns:
             str: Ответ AI в нижнем регистре ("да" или "нет"), указывающий, стоит ли сохранять сообщение.
         """
+        cached = await VerdictCache.get(model, text)
+        if cached is not None:
+            return cached
+
         messages = [
             ChatCompletionSystemMessageParam(
                 role="system",
@@ -67,9 +83,47 @@ class AiMemoryUtils:
             )
         ]
 
-        response = await openai_client.chat.completions.create(
-            model=model,
-            messages=messages
-        )
+        with stage_timer("filter_completion"):
+            response = await openai_client.chat.completions.create(
+                model=model,
+                messages=messages
+            )
+
+        verdict = response.choices[0].message.content.strip().lower()
+
+        await VerdictCache.set(model, text, verdict)
+        return verdict
+
+    # ------------------- Объединение записей памяти через AI -------------------
+
+    @staticmethod
+    async def consolidate_memories(texts: List[str], openai_client: AsyncOpenAI, model: str) -> str:
+        """
+        Объединяет группу похожих записей долгосрочной памяти в одну короткую запись.
+
+        Args:
+            texts (List[str]): Тексты записей от старых к новым.
+            openai_client (AsyncOpenAI): Асинхронный клиент OpenAI.
+            model (str): Модель для генерации объединённой записи.
+
+        Returns:
+            str: Текст объединённой записи (пустая строка, если модель ничего не вернула).
+        """
+        messages = [
+            ChatCompletionSystemMessageParam(
+                role="system",
+                content=SYSTEM_PROMPTS_LEXICON["system_prompts"]["memory_consolidation"]
+            ),
+            ChatCompletionUserMessageParam(
+                role="user",
+                content="\n".join(f"- {text}" for text in texts)
+            )
+        ]
+
+        with stage_timer("consolidation_completion"):
+            response = await openai_client.chat.completions.create(
+                model=model,
+                messages=messages
+            )
 
-        return response.choices[0].message.content.strip().lower()
+        return (response.choices[0].message.content or "").strip()
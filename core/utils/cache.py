@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Простой in-process LRU-кэш с ограничением размера и счётчиками попаданий.
+
+    Используется как первый (локальный) уровень кэшей перед Redis/PostgreSQL.
+    Не потокобезопасен: рассчитан на использование внутри одного event-loop.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size (int): Максимальное количество элементов. 0 — кэш отключён.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Возвращает значение по ключу и помечает его как недавно использованное.
+
+        Args:
+            key (Hashable): Ключ.
+
+        Returns:
+            Optional[Any]: Значение или None, если ключа нет в кэше.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохраняет значение, вытесняя самый давно использованный элемент при переполнении.
+
+        Args:
+            key (Hashable): Ключ.
+            value (Any): Значение.
+        """
+        if self.max_size <= 0:
+            return
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Удаляет ключ из кэша и возвращает его значение (или None)."""
+        return self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очищает кэш и сбрасывает счётчики."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Возвращает статистику кэша.
+
+        Returns:
+            Dict[str, float]: size, max_size, hits, misses и hit_rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
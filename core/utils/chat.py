@@ -1,5 +1,16 @@
+import asyncio
+import logging
+import time
+
+from aiogram.client.default import Default
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.types import Message
-from typing import List
+from typing import List, Optional
+
+from core.lexicon import LOGGING_LEXICON
+
+
+logger = logging.getLogger(__name__)
 
 
 def _split_text_into_lines(text: str) -> List[str]:
@@ -71,3 +82,183 @@ async def safe_answer(message: Message, text: str, max_len: int = 4096):
 
     for chunk in chunks:
         await message.answer(chunk)
+
+
+def close_code_fence(text: str) -> str:
+    """
+    Закрывает незакрытый блок кода Markdown в конце текста.
+
+    Используется при промежуточных обновлениях потокового ответа, чтобы каждое
+    отправленное состояние сообщения было корректной разметкой.
+
+    Args:
+        text (str): Текст (возможно, с открытым блоком кода).
+
+    Returns:
+        str: Текст с закрытыми блоками кода.
+    """
+    if text.count("```") % 2 == 0:
+        return text
+    return text + ("```" if text.endswith("\n") else "\n```")
+
+
+class StreamingAnswer:
+    """
+    Потоковый ответ в Telegram через редактирование сообщения-заглушки.
+
+    Текст накапливается через `feed`, а сообщение обновляется не чаще одного раза
+    в `edit_interval` секунд (лимиты Telegram на редактирование).
+    Когда ответ перестаёт помещаться в `max_len` символов, текущее сообщение фиксируется
+    (по границе строки) и продолжение отправляется новым сообщением; открытый блок кода
+    закрывается в конце сообщения и открывается заново в следующем.
+
+    Если Telegram не может разобрать разметку промежуточного состояния, оно отправляется
+    без форматирования; при `RetryAfter` промежуточное обновление пропускается.
+    """
+
+    FENCE = "```"
+
+    def __init__(self, placeholder: Message, edit_interval: float = 1.0, max_len: int = 4096):
+        """
+        Args:
+            placeholder (Message): Сообщение-заглушка, которое будет заменено ответом.
+            edit_interval (float): Минимальный интервал между редактированиями (секунды).
+            max_len (int): Максимальная длина одного сообщения.
+        """
+        self.edit_interval = edit_interval
+        self.max_len = max_len
+
+        self.text = ""
+        self.edits = 0
+        self.messages = 1
+
+        self._chat_message = placeholder
+        self._current: Optional[Message] = placeholder
+        self._sent: Optional[str] = None
+        self._offset = 0
+        self._prefix = ""
+        self._next_flush_at = 0.0
+
+    async def feed(self, delta: str) -> None:
+        """
+        Добавляет фрагмент ответа и при необходимости обновляет сообщение.
+
+        Пробельные символы в начале ответа отбрасываются сразу, чтобы позиции уже
+        зафиксированных сообщений не сдвигались при окончательной обработке текста.
+
+        Args:
+            delta (str): Очередной фрагмент текста.
+        """
+        if not self.text:
+            delta = delta.lstrip()
+            if not delta:
+                return
+        self.text += delta
+        if time.monotonic() >= self._next_flush_at:
+            await self._flush(final=False)
+
+    async def finish(self, fallback: str) -> str:
+        """
+        Отправляет окончательный текст ответа.
+
+        Args:
+            fallback (str): Текст, который отправляется, если модель ничего не вернула.
+
+        Returns:
+            str: Полный текст ответа (без пробелов по краям).
+        """
+        self.text = self.text.rstrip() or fallback
+        await self._flush(final=True)
+        return self.text
+
+    async def _flush(self, final: bool) -> None:
+        """
+        Отображает накопленный текст, при переполнении переходя к новому сообщению.
+
+        Args:
+            final (bool): Окончательное обновление (ошибки лимитов не пропускаются).
+        """
+        while True:
+            body = self._prefix + self.text[self._offset:]
+            if len(close_code_fence(body)) <= self.max_len:
+                break
+
+            # Фиксируем текущее сообщение по последнему переносу строки
+            limit = self.max_len - len(self.FENCE) - 1
+            cut = body.rfind("\n", len(self._prefix), limit) + 1
+            if cut <= len(self._prefix):
+                cut = limit
+
+            part = body[:cut]
+            if not await self._render(close_code_fence(part), final=True):
+                return
+
+            self._offset += cut - len(self._prefix)
+            # Открытый блок кода продолжается в новом сообщении с той же строкой-открытием (```lang)
+            opener = part[part.rfind(self.FENCE):].split("\n", 1)[0]
+            self._prefix = opener + "\n" if part.count(self.FENCE) % 2 else ""
+            self._current = None
+            self._sent = None
+
+        body = body if final else body.rstrip()
+        if body.strip(self.FENCE + " \n"):
+            await self._render(close_code_fence(body), final=final)
+
+        self._next_flush_at = time.monotonic() + self.edit_interval
+
+    async def _render(self, text: str, final: bool) -> bool:
+        """
+        Редактирует текущее сообщение или отправляет новое, если текущего нет.
+
+        Если разметка не разобрана, текст отправляется без разметки (с той же обработкой `RetryAfter`).
+        Если не удалось и это, ошибка логируется, а обновление считается неудавшимся.
+
+        Args:
+            text (str): Текст сообщения.
+            final (bool): При `RetryAfter` дождаться и повторить, а не пропустить обновление.
+
+        Returns:
+            bool: True, если сообщение отображает переданный текст.
+        """
+        if text == self._sent:
+            return True
+
+        parse_mode = Default("parse_mode")
+        while True:
+            try:
+                await self._send(text, parse_mode=parse_mode)
+                return True
+
+            except TelegramRetryAfter as e:
+                if not final:
+                    self._next_flush_at = time.monotonic() + e.retry_after
+                    return False
+                await asyncio.sleep(e.retry_after)
+
+            except TelegramBadRequest as e:
+                if "message is not modified" in e.message:
+                    self._sent = text
+                    return True
+
+                if parse_mode is None:
+                    logger.warning(LOGGING_LEXICON["logging"]["streaming"]["render_error"].format(e.message))
+                    return False
+
+                # Разметка промежуточного состояния не разобрана — отправляем как есть
+                parse_mode = None
+
+    async def _send(self, text: str, parse_mode) -> None:
+        """
+        Выполняет запрос к Telegram: редактирование или отправка нового сообщения.
+
+        Args:
+            text (str): Текст сообщения.
+            parse_mode: Режим разметки (по умолчанию — из настроек бота, None — без разметки).
+        """
+        if self._current is None:
+            self._current = await self._chat_message.answer(text, parse_mode=parse_mode)
+            self.messages += 1
+        else:
+            await self._current.edit_text(text, parse_mode=parse_mode)
+            self.edits += 1
+        self._sent = text
@@ -0,0 +1,235 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from core.lexicon import LOGGING_LEXICON
+from core.utils.enums import OpenAiModels
+
+
+logger = logging.getLogger(__name__)
+
+# Средняя длина токена в символах для смешанного русского/английского текста.
+# Оценка занижена намеренно: лучше недобрать контекст, чем превысить бюджет.
+CHARS_PER_TOKEN = 3
+
+TEMPORARY_HEADER = "Temporary memories:\n"
+PERMANENT_HEADER = "\nPermanent memories:\n"
+TRUNCATION_MARK = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Быстро оценивает количество токенов в тексте без токенизатора.
+
+    Args:
+        text (str): Текст.
+
+    Returns:
+        int: Оценка количества токенов (0 для пустой строки).
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Обрезает текст до оценочного количества токенов, по возможности по границе слова.
+
+    Args:
+        text (str): Текст.
+        max_tokens (int): Максимальное количество токенов.
+
+    Returns:
+        str: Исходный текст, если он укладывается в лимит, иначе обрезанный текст с "…".
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars - len(TRUNCATION_MARK)]
+    space = cut.rfind(" ")
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+@dataclass(frozen=True, slots=True)
+class BuiltContext:
+    """
+    Результат сборки контекста.
+
+    Attributes:
+        text (str): Контекст для системного сообщения модели.
+        tokens (int): Оценка токенов собранного контекста.
+        original_tokens (int): Оценка токенов контекста без ограничений (все записи целиком).
+        truncated (int): Количество записей, обрезанных до `max_entry_tokens`.
+        dropped (int): Количество записей, не вошедших в бюджет.
+    """
+    text: str
+    tokens: int
+    original_tokens: int
+    truncated: int
+    dropped: int
+
+    @property
+    def tokens_saved(self) -> int:
+        """Сколько токенов сэкономлено ограничением контекста."""
+        return self.original_tokens - self.tokens
+
+
+class ContextBuilder:
+    """
+    Сборка контекста памяти для модели в пределах бюджета токенов.
+
+    Бюджет задаётся на модель (`OpenAiModels.context_token_budget`) и может быть
+    переопределён конфигурацией. Каждая запись дополнительно ограничивается
+    `max_entry_tokens` (длинные ответы бота в истории обрезаются).
+
+    Приоритет записей при заполнении бюджета:
+    1. Последний обмен репликами из краткосрочной памяти (текущая нить разговора).
+    2. Долгосрочная память — в порядке релевантности; не поместившиеся записи пропускаются.
+    3. Остальная краткосрочная память — от новых к старым, без разрывов.
+
+    Формат результата совпадает с прежним: "Temporary memories: ..." и "Permanent memories: ...",
+    записи внутри блоков идут в исходном порядке.
+    """
+
+    RECENT_ENTRIES = 2
+
+    __max_entry_tokens: int = 300
+    __budget_override: Optional[int] = None
+    __metrics: Dict[str, int] = {"turns": 0, "original_tokens": 0, "tokens": 0, "truncated": 0, "dropped": 0}
+
+    @classmethod
+    def init(cls, max_entry_tokens: int, token_budget: Optional[int] = None) -> None:
+        """
+        Настраивает ограничения контекста.
+
+        Args:
+            max_entry_tokens (int): Максимальная длина одной записи (токены).
+            token_budget (Optional[int]): Бюджет контекста для всех моделей. None — бюджет модели.
+        """
+        cls.__max_entry_tokens = max(1, max_entry_tokens)
+        cls.__budget_override = token_budget
+        cls.__metrics = {"turns": 0, "original_tokens": 0, "tokens": 0, "truncated": 0, "dropped": 0}
+
+    @classmethod
+    def get_budget(cls, model: str) -> int:
+        """
+        Возвращает бюджет токенов контекста для модели.
+
+        Args:
+            model (str): Название модели.
+
+        Returns:
+            int: Бюджет токенов (для неизвестной модели — бюджет основной чат-модели).
+        """
+        if cls.__budget_override is not None:
+            return cls.__budget_override
+        try:
+            return OpenAiModels(model).context_token_budget
+        except ValueError:
+            return OpenAiModels.GPT_5_MINI.context_token_budget
+
+    @classmethod
+    def build(cls, model: str, history: List[str], memories: List[str]) -> BuiltContext:
+        """
+        Собирает контекст из краткосрочной и долгосрочной памяти в пределах бюджета модели.
+
+        Args:
+            model (str): Модель, для которой собирается контекст.
+            history (List[str]): Краткосрочная память, от новых записей к старым.
+            memories (List[str]): Долгосрочная память, от более релевантных к менее.
+
+        Returns:
+            BuiltContext: Контекст и оценки токенов.
+        """
+        budget = cls.get_budget(model)
+        original_tokens = estimate_tokens(cls.render(history, memories))
+
+        history_entries = [truncate_to_tokens(entry, cls.__max_entry_tokens) for entry in history]
+        memory_entries = [truncate_to_tokens(entry, cls.__max_entry_tokens) for entry in memories]
+        truncated = sum(a != b for a, b in zip(history + memories, history_entries + memory_entries))
+
+        used = 0
+        history_count = 0
+        memory_selected = [False] * len(memory_entries)
+
+        def cost(entry: str, header: str, has_block: bool) -> int:
+            # +1 — перенос строки между записями; заголовок блока учитывается с первой записью
+            return estimate_tokens(entry) + 1 + (0 if has_block else estimate_tokens(header))
+
+        # 1. Последний обмен репликами
+        for entry in history_entries[:cls.RECENT_ENTRIES]:
+            entry_cost = cost(entry, TEMPORARY_HEADER, history_count > 0)
+            if used + entry_cost > budget:
+                break
+            used += entry_cost
+            history_count += 1
+
+        # 2. Долгосрочная память по релевантности
+        for index, entry in enumerate(memory_entries):
+            entry_cost = cost(entry, PERMANENT_HEADER, any(memory_selected))
+            if used + entry_cost <= budget:
+                used += entry_cost
+                memory_selected[index] = True
+
+        # 3. Остальная история без разрывов
+        if history_count == min(cls.RECENT_ENTRIES, len(history_entries)):
+            for entry in history_entries[history_count:]:
+                entry_cost = cost(entry, TEMPORARY_HEADER, history_count > 0)
+                if used + entry_cost > budget:
+                    break
+                used += entry_cost
+                history_count += 1
+
+        selected_memories = [entry for entry, selected in zip(memory_entries, memory_selected) if selected]
+        text = cls.render(history_entries[:history_count], selected_memories)
+        context = BuiltContext(
+            text=text,
+            tokens=estimate_tokens(text),
+            original_tokens=original_tokens,
+            truncated=truncated,
+            dropped=len(history) - history_count + len(memories) - len(selected_memories)
+        )
+
+        cls.__metrics["turns"] += 1
+        cls.__metrics["original_tokens"] += context.original_tokens
+        cls.__metrics["tokens"] += context.tokens
+        cls.__metrics["truncated"] += context.truncated
+        cls.__metrics["dropped"] += context.dropped
+
+        logger.debug(LOGGING_LEXICON["logging"]["context"]["built"].format(
+            context.tokens, budget, context.tokens_saved, context.truncated, context.dropped
+        ))
+        return context
+
+    @staticmethod
+    def render(history: List[str], memories: List[str]) -> str:
+        """
+        Объединяет записи памяти в текст контекста.
+
+        Args:
+            history (List[str]): Краткосрочная память, от новых записей к старым.
+            memories (List[str]): Долгосрочная память.
+
+        Returns:
+            str: Контекст вида "Temporary memories:\\n...\\n\\n\\nPermanent memories:\\n...".
+        """
+        temporary = TEMPORARY_HEADER + "\n".join(history) if history else ""
+        permanent = PERMANENT_HEADER + "\n".join(memories) if memories else ""
+        return temporary + "\n\n" + permanent if temporary or permanent else ""
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает статистику сборки контекста.
+
+        Returns:
+            Dict[str, float]: turns, суммарные токены до/после ограничения, tokens_saved,
+                              обрезанные и отброшенные записи, средний размер контекста.
+        """
+        stats: Dict[str, float] = dict(cls.__metrics)
+        stats["tokens_saved"] = stats["original_tokens"] - stats["tokens"]
+        stats["avg_tokens"] = stats["tokens"] / stats["turns"] if stats["turns"] else 0.0
+        return stats
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from openai import AsyncOpenAI
+
+from core.lexicon import LOGGING_LEXICON
+from core.utils.timing import stage_timer
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Клиент embedding с микро-батчингом конкурентных запросов.
+
+    Одиночные запросы, пришедшие почти одновременно, собираются в течение `max_wait`
+    секунд (или до `max_batch_size` текстов) и отправляются одним вызовом
+    `embeddings.create(input=[...])`. Результаты раздаются ожидающим корутинам.
+
+    Если батч-запрос завершился ошибкой, тексты переотправляются по одному, чтобы
+    ошибка одного входа (например, слишком длинного) не затрагивала остальных.
+
+    Экземпляр создаётся на пару (клиент OpenAI, модель) и получается через `get`.
+    """
+
+    __max_batch_size: int = 16
+    __max_wait: float = 0.005
+    __batchers: Dict[Tuple[int, str], "EmbeddingBatcher"] = {}
+
+    @classmethod
+    def init(cls, max_batch_size: int, max_wait_ms: int) -> None:
+        """
+        Настраивает параметры батчинга для всех создаваемых батчеров.
+
+        Args:
+            max_batch_size (int): Максимальное количество текстов в одном запросе.
+            max_wait_ms (int): Максимальное время ожидания наполнения батча (мс).
+        """
+        cls.__max_batch_size = max(1, max_batch_size)
+        cls.__max_wait = max(0, max_wait_ms) / 1000
+        cls.__batchers = {}
+
+    @classmethod
+    def get(cls, openai_client: AsyncOpenAI, model: str) -> "EmbeddingBatcher":
+        """
+        Возвращает батчер для указанного клиента и модели, создавая его при необходимости.
+
+        Args:
+            openai_client (AsyncOpenAI): Асинхронный клиент OpenAI.
+            model (str): Модель embedding.
+
+        Returns:
+            EmbeddingBatcher: Батчер запросов.
+        """
+        key = (id(openai_client), model)
+        batcher = cls.__batchers.get(key)
+        if batcher is None:
+            batcher = cls(openai_client, model, cls.__max_batch_size, cls.__max_wait)
+            cls.__batchers[key] = batcher
+        return batcher
+
+    def __init__(self, openai_client: AsyncOpenAI, model: str, max_batch_size: int, max_wait: float):
+        """
+        Args:
+            openai_client (AsyncOpenAI): Асинхронный клиент OpenAI.
+            model (str): Модель embedding.
+            max_batch_size (int): Максимальное количество текстов в одном запросе.
+            max_wait (float): Максимальное время ожидания наполнения батча (секунды).
+        """
+        self.openai_client = openai_client
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.requests = 0
+        self.api_calls = 0
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Ставит текст в текущий батч и ожидает его embedding.
+
+        Args:
+            text (str): Текст сообщения.
+
+        Returns:
+            List[float]: Векторное представление текста.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Отправляет накопленный батч в фоновой задаче."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """
+        Выполняет один запрос для батча и раздаёт результаты.
+
+        Повторяющиеся тексты отправляются один раз. Ожидающие, которые уже отменены,
+        пропускаются.
+
+        Args:
+            batch (List[Tuple[str, asyncio.Future]]): Тексты и futures ожидающих.
+        """
+        batch = [(text, future) for text, future in batch if not future.done()]
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        if not texts:
+            return
+
+        try:
+            self.api_calls += 1
+            with stage_timer("embedding_request"):
+                response = await self.openai_client.embeddings.create(model=self.model, input=texts)
+            vectors = {texts[item.index]: item.embedding for item in response.data}
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+
+        except Exception as e:
+            if len(texts) > 1:
+                # Изолируем ошибку: каждый текст переотправляется отдельным запросом
+                logger.warning(LOGGING_LEXICON["logging"]["embeddings"]["batch_error"].format(len(texts), e))
+                await asyncio.gather(*(
+                    self._send([(text, future) for text, future in batch if text == single])
+                    for single in texts
+                ))
+                return
+
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[text])
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Возвращает статистику батчера.
+
+        Returns:
+            Dict[str, float]: requests, api_calls и средний размер батча.
+        """
+        return {
+            "requests": self.requests,
+            "api_calls": self.api_calls,
+            "avg_batch_size": self.requests / self.api_calls if self.api_calls else 0.0
+        }
@@ -0,0 +1,136 @@
+import logging
+from array import array
+from typing import Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from core.lexicon import LOGGING_LEXICON
+from core.utils.cache import LRUCache
+from core.utils.text_normalization import text_fingerprint
+from database.redis.repositories import RedisEmbeddingsRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Двухуровневый кэш embedding, адресуемый по содержимому.
+
+    Ключ — модель + хэш канонического вида текста, поэтому повторы вроде
+    "Меня зовут Ира!" и "меня зовут ира" не требуют повторного запроса к API.
+
+    Уровни:
+    1. In-process LRU (быстрый, ограничен количеством записей).
+    2. Redis с TTL (общий для всех процессов бота).
+
+    Векторы в обоих уровнях хранятся в бинарном виде float32 (4 байта на измерение).
+    """
+
+    __memory: LRUCache = LRUCache(max_size=0)
+    __ttl: int = 0
+    __redis_hits: int = 0
+
+    @classmethod
+    def init(cls, max_size: int, ttl: int) -> None:
+        """
+        Настраивает кэш.
+
+        Args:
+            max_size (int): Максимальное количество векторов в памяти процесса.
+            ttl (int): Время жизни записи в Redis (секунды). 0 — Redis-уровень отключён.
+        """
+        cls.__memory = LRUCache(max_size=max_size)
+        cls.__ttl = ttl
+        cls.__redis_hits = 0
+
+    @staticmethod
+    def build_key(model: str, text: str) -> str:
+        """
+        Формирует ключ кэша.
+
+        Args:
+            model (str): Модель embedding.
+            text (str): Текст сообщения.
+
+        Returns:
+            str: Ключ вида "embedding:{model}:{fingerprint}".
+        """
+        return f"embedding:{model}:{text_fingerprint(text)}"
+
+    @staticmethod
+    def encode(vector: List[float]) -> bytes:
+        """Упаковывает вектор в бинарный float32."""
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def decode(data: bytes) -> List[float]:
+        """Распаковывает вектор из бинарного float32."""
+        vector = array("f")
+        vector.frombytes(data)
+        return vector.tolist()
+
+    @classmethod
+    async def get(cls, model: str, text: str) -> Optional[List[float]]:
+        """
+        Ищет вектор сначала в памяти процесса, затем в Redis.
+
+        Ошибки Redis не пробрасываются: запись считается отсутствующей.
+
+        Args:
+            model (str): Модель embedding.
+            text (str): Текст сообщения.
+
+        Returns:
+            Optional[List[float]]: Вектор или None при промахе.
+        """
+        key = cls.build_key(model, text)
+
+        data = cls.__memory.get(key)
+        if data is None and cls.__ttl > 0:
+            try:
+                data = await RedisEmbeddingsRepository.get_embedding(key)
+            except (RedisError, RuntimeError) as e:
+                logger.warning(LOGGING_LEXICON["logging"]["cache"]["redis_error"].format(key, e))
+
+            if data is not None:
+                cls.__redis_hits += 1
+                cls.__memory.set(key, data)
+
+        return cls.decode(data) if data is not None else None
+
+    @classmethod
+    async def set(cls, model: str, text: str, vector: List[float]) -> None:
+        """
+        Сохраняет вектор в оба уровня кэша.
+
+        Args:
+            model (str): Модель embedding.
+            text (str): Текст сообщения.
+            vector (List[float]): Вектор.
+        """
+        key = cls.build_key(model, text)
+        data = cls.encode(vector)
+
+        cls.__memory.set(key, data)
+        if cls.__ttl > 0:
+            try:
+                await RedisEmbeddingsRepository.save_embedding(key, data, cls.__ttl)
+            except (RedisError, RuntimeError) as e:
+                logger.warning(LOGGING_LEXICON["logging"]["cache"]["redis_error"].format(key, e))
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает статистику кэша.
+
+        Промах первого уровня, найденный в Redis, считается попаданием кэша в целом.
+
+        Returns:
+            Dict[str, float]: Статистика in-process уровня, redis_hits и общий hit_rate.
+        """
+        stats = cls.__memory.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["redis_hits"] = cls.__redis_hits
+        stats["hit_rate"] = (stats["hits"] + cls.__redis_hits) / lookups if lookups else 0.0
+        return stats
@@ -13,3 +13,20 @@ class OpenAiModels(Enum):
     GPT_5_NANO = "gpt-5-nano"
     GPT_5_MINI = "gpt-5-mini"
     TEXT_EMBEDDING_3_SMALL = "text-embedding-3-small"
+
+    @property
+    def context_token_budget(self) -> int:
+        """
+        Бюджет токенов контекста памяти, передаваемого модели вместе с запросом.
+
+        Returns:
+            int: Максимальная оценка токенов контекста (0 — контекст модели не передаётся).
+        """
+        return _CONTEXT_TOKEN_BUDGETS.get(self, 0)
+
+
+# Бюджеты контекста памяти по моделям (токены)
+_CONTEXT_TOKEN_BUDGETS = {
+    OpenAiModels.GPT_5_NANO: 500,
+    OpenAiModels.GPT_5_MINI: 1200
+}
@@ -0,0 +1,152 @@
+import json
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict
+
+from core.utils.context_builder import estimate_tokens, truncate_to_tokens
+
+
+# Флаг формата записи (первый байт): JSON или JSON, сжатый zlib
+FORMAT_JSON = 1
+FORMAT_ZLIB = 2
+
+# Размер заголовка: флаг формата (1 байт) + оценка токенов (uint16 big-endian).
+# Заголовок не сжимается, чтобы Lua-скрипт обрезки истории читал токены без разбора записи.
+HEADER_SIZE = 3
+MAX_HEADER_TOKENS = 0xFFFF
+
+# Роль записи → префикс строки в контексте модели и короткий код в сериализованной записи
+ROLE_PREFIXES = {"user": "User: ", "bot": "Bot: "}
+ROLE_CODES = {"user": "u", "bot": "b"}
+CODE_ROLES = {code: role for role, code in ROLE_CODES.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryEntry:
+    """
+    Запись краткосрочной истории диалога.
+
+    Attributes:
+        role (str): Автор реплики: "user" или "bot".
+        text (str): Текст реплики.
+        tokens (int): Оценка токенов строки записи в контексте (`render`).
+        created_at (int): Время записи (Unix time, секунды; 0 — неизвестно).
+    """
+    role: str
+    text: str
+    tokens: int
+    created_at: int
+
+    @classmethod
+    def create(cls, role: str, text: str, max_tokens: int) -> "HistoryEntry":
+        """
+        Создаёт запись, обрезая реплику до `max_tokens` (как `ContextBuilder` обрезает записи контекста).
+
+        Args:
+            role (str): Автор реплики: "user" или "bot".
+            text (str): Текст реплики.
+            max_tokens (int): Максимальная длина строки записи в контексте (токены).
+
+        Returns:
+            HistoryEntry: Запись с оценкой токенов и текущим временем.
+        """
+        prefix = ROLE_PREFIXES[role]
+        line = truncate_to_tokens(prefix + text, max_tokens)
+        return cls(role=role, text=line[len(prefix):], tokens=estimate_tokens(line), created_at=int(time.time()))
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: Строка записи в контексте модели ("User: ..." или "Bot: ...").
+        """
+        return ROLE_PREFIXES[self.role] + self.text
+
+
+class HistoryCodec:
+    """
+    Компактная сериализация записей истории для Redis.
+
+    Формат записи: [флаг формата: 1 байт][оценка токенов: uint16 BE][данные],
+    где данные — JSON-массив [код роли, время, текст] без пробелов (UTF-8),
+    при длине не меньше `compress_min_bytes` — сжатый zlib, если это уменьшает запись.
+
+    Записи прежнего формата (строки "User: ..." / "Bot: ...") читаются как записи без времени.
+    """
+
+    __compress_min_bytes: int = 0
+    __metrics: Dict[str, int] = {"encoded": 0, "compressed": 0, "json_bytes": 0, "stored_bytes": 0}
+
+    @classmethod
+    def init(cls, compress_min_bytes: int) -> None:
+        """
+        Настраивает сжатие.
+
+        Args:
+            compress_min_bytes (int): Минимальный размер JSON записи (байт) для сжатия zlib. 0 — без сжатия.
+        """
+        cls.__compress_min_bytes = max(0, compress_min_bytes)
+        cls.__metrics = {"encoded": 0, "compressed": 0, "json_bytes": 0, "stored_bytes": 0}
+
+    @classmethod
+    def encode(cls, entry: HistoryEntry) -> bytes:
+        """
+        Сериализует запись.
+
+        Args:
+            entry (HistoryEntry): Запись истории.
+
+        Returns:
+            bytes: Заголовок и данные записи.
+        """
+        payload = json.dumps(
+            [ROLE_CODES[entry.role], entry.created_at, entry.text], ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        cls.__metrics["encoded"] += 1
+        cls.__metrics["json_bytes"] += len(payload)
+
+        flag = FORMAT_JSON
+        if cls.__compress_min_bytes and len(payload) >= cls.__compress_min_bytes:
+            compressed = zlib.compress(payload)
+            if len(compressed) < len(payload):
+                payload, flag = compressed, FORMAT_ZLIB
+                cls.__metrics["compressed"] += 1
+
+        data = bytes((flag,)) + min(entry.tokens, MAX_HEADER_TOKENS).to_bytes(2, "big") + payload
+        cls.__metrics["stored_bytes"] += len(data)
+        return data
+
+    @staticmethod
+    def decode(data: bytes) -> HistoryEntry:
+        """
+        Восстанавливает запись (в том числе записанную в прежнем формате "User: ..." / "Bot: ...").
+
+        Args:
+            data (bytes): Значение из Redis.
+
+        Returns:
+            HistoryEntry: Запись истории.
+        """
+        if data[:1] in (bytes((FORMAT_JSON,)), bytes((FORMAT_ZLIB,))):
+            payload = data[HEADER_SIZE:]
+            if data[0] == FORMAT_ZLIB:
+                payload = zlib.decompress(payload)
+            code, created_at, text = json.loads(payload)
+            return HistoryEntry(CODE_ROLES[code], text, int.from_bytes(data[1:HEADER_SIZE], "big"), created_at)
+
+        line = data.decode("utf-8")
+        role = "bot" if line.startswith(ROLE_PREFIXES["bot"]) else "user"
+        text = line[len(ROLE_PREFIXES[role]):] if line.startswith(ROLE_PREFIXES[role]) else line
+        return HistoryEntry(role, text, estimate_tokens(line), 0)
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает статистику сериализации.
+
+        Returns:
+            Dict[str, float]: encoded, compressed, json_bytes, stored_bytes и средний размер записи.
+        """
+        stats: Dict[str, float] = dict(cls.__metrics)
+        stats["avg_entry_bytes"] = stats["stored_bytes"] / stats["encoded"] if stats["encoded"] else 0.0
+        return stats
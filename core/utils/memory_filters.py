@@ -1,9 +1,6 @@
-import re
-
 from openai import AsyncOpenAI
-from core.utils.text_normalization import normalize_text
 from core.utils.ai_utils import AiMemoryUtils
-from core.lexicon import RULE_BASED_LEXICON, BAD_WORDS_LEXICON
+from core.utils.rule_engine import RULE_ENGINE
 
 
 class MemoryFilter:
@@ -45,7 +42,7 @@ class MemoryFilter:
         Returns:
             bool: True, если текст распознан как шум.
         """
-        return any(re.match(pattern, text) for pattern in RULE_BASED_LEXICON["rules"]["noise_patterns"])
+        return RULE_ENGINE.is_noise(text)
 
     @staticmethod
     def is_question(text: str) -> bool:
@@ -73,8 +70,7 @@ class MemoryFilter:
         Returns:
             bool: True, если есть хотя бы одно ключевое слово.
         """
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in RULE_BASED_LEXICON["rules"]["important_keywords"])
+        return RULE_ENGINE.contains_important_keyword(text)
 
     @staticmethod
     def contains_bad_words(text: str) -> bool:
@@ -83,7 +79,7 @@ class MemoryFilter:
 
         Логика:
         1. Разбиваем текст на слова.
-        2. Нормализуем слова через `normalize_text`.
+        2. Нормализуем слова через кэш лемм.
         3. Проверяем пересечение с BAD_WORDS_LEXICON.
 
         Args:
@@ -92,9 +88,7 @@ class MemoryFilter:
         Returns:
             bool: True, если текст содержит плохие слова.
         """
-        words = set(re.findall(r"\w+", text.lower()))
-        normalized_words = normalize_text(words)
-        return not normalized_words.isdisjoint(BAD_WORDS_LEXICON)
+        return RULE_ENGINE.contains_bad_words(text)
 
     # ------------------- Основные фильтры -------------------
 
@@ -111,7 +105,7 @@ class MemoryFilter:
         Returns:
             bool: True, если сообщение спам.
         """
-        return cls.is_short(text) or cls.is_noise(text) or cls.contains_bad_words(text)
+        return RULE_ENGINE.evaluate(text).is_spam
 
     @classmethod
     async def is_required_for_permanent_memory(
@@ -136,9 +130,10 @@ class MemoryFilter:
         Returns:
             bool: True, если сообщение должно быть сохранено в Postgres.
         """
-        if cls.is_spam(text):
+        verdict = RULE_ENGINE.evaluate(text)
+        if verdict.is_spam:
             return False
-        if cls.contains_important_keyword(text):
+        if verdict.has_important_keyword:
             return True
 
         # Запрос к AI о необходимости сохранения
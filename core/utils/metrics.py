@@ -0,0 +1,276 @@
+import logging
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from core.lexicon import LOGGING_LEXICON
+from core.utils.timing import add_stage_observer, remove_stage_observer
+
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм длительности (секунды)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Источник статистики компонента: функция без аргументов, возвращающая словарь чисел
+StatsSource = Callable[[], Dict[str, float]]
+
+# Content-Type текстового формата Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: object) -> str:
+    """Экранирует значение метки для текстового формата Prometheus."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[object]) -> str:
+    """Формирует набор меток в формате Prometheus: {name="value",...}."""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Histogram:
+    """
+    Гистограмма в памяти процесса (аналог Prometheus histogram).
+
+    Серия на каждый набор значений меток: счётчики корзин, сумма и количество наблюдений.
+    Наблюдение — двоичный поиск корзины и два сложения, без блокировок (один event loop).
+    """
+
+    __slots__ = ("name", "documentation", "label_names", "buckets", "_series")
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        """
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание метрики (HELP).
+            label_names (Tuple[str, ...]): Имена меток.
+            buckets (Tuple[float, ...]): Верхние границы корзин по возрастанию.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Добавляет наблюдение.
+
+        Args:
+            value (float): Значение (для длительностей — секунды).
+            *label_values (str): Значения меток в порядке `label_names`.
+        """
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        """
+        Возвращает строки метрики в текстовом формате Prometheus.
+
+        Returns:
+            List[str]: HELP, TYPE и строки серий (корзины накопительные).
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = _format_labels((*self.label_names, "le"), (*label_values, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    """Монотонный счётчик в памяти процесса (аналог Prometheus counter)."""
+
+    __slots__ = ("name", "documentation", "label_names", "_values")
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        """
+        Args:
+            name (str): Имя метрики (с суффиксом _total).
+            documentation (str): Описание метрики (HELP).
+            label_names (Tuple[str, ...]): Имена меток.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Увеличивает счётчик.
+
+        Args:
+            *label_values (str): Значения меток в порядке `label_names`.
+            amount (float): Величина увеличения.
+        """
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        """
+        Возвращает строки метрики в текстовом формате Prometheus.
+
+        Returns:
+            List[str]: HELP, TYPE и строки серий.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Metrics:
+    """
+    Метрики процесса для Prometheus.
+
+    - Длительности этапов `stage_timer` (`bot_stage_duration_seconds{stage}`): проверка активации,
+      история в Redis, AI-фильтр, embedding, поиск в pgvector, ответ модели, запросы к Telegram и т.д.
+    - Полное время обработки апдейтов и их исходы (`MetricsMiddleware`).
+    - Статистика кэшей и очередей (`register_stats`), снимаемая в момент запроса /metrics.
+
+    Метрики отдаются локальным HTTP-сервером (`start_server`) в текстовом формате Prometheus.
+    В режиме webhook с несколькими процессами каждый процесс-обработчик отдаёт свои метрики
+    на собственном порту.
+    """
+
+    STAGE_DURATION = Histogram(
+        "bot_stage_duration_seconds", "Duration of update processing stages.", ("stage",)
+    )
+    UPDATE_DURATION = Histogram(
+        "bot_update_duration_seconds", "Full update processing time, including mailbox wait.", ("event_type",)
+    )
+    UPDATES = Counter(
+        "bot_updates_total", "Processed updates by outcome.", ("event_type", "status")
+    )
+
+    __enabled: bool = False
+    __stats_sources: Dict[str, StatsSource] = {}
+    __runner: Optional[web.AppRunner] = None
+
+    @classmethod
+    def init(cls, enabled: bool) -> None:
+        """
+        Включает сбор метрик: подписывается на длительности этапов `stage_timer`.
+
+        Args:
+            enabled (bool): Собирать метрики.
+        """
+        remove_stage_observer(cls.__observe_stage)
+        cls.__enabled = enabled
+        cls.__stats_sources = {}
+        if enabled:
+            add_stage_observer(cls.__observe_stage)
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """
+        Returns:
+            bool: True, если сбор метрик включён.
+        """
+        return cls.__enabled
+
+    @classmethod
+    def __observe_stage(cls, stage: str, elapsed_ms: float) -> None:
+        """Наблюдатель `stage_timer`: записывает длительность этапа в гистограмму."""
+        cls.STAGE_DURATION.observe(elapsed_ms / 1000, stage)
+
+    @classmethod
+    def observe_update(cls, event_type: str, status: str, seconds: float) -> None:
+        """
+        Записывает обработанный апдейт.
+
+        Args:
+            event_type (str): Тип апдейта (message, callback_query, ...).
+            status (str): Исход обработки (handled, unhandled, error).
+            seconds (float): Полное время обработки (секунды).
+        """
+        cls.UPDATE_DURATION.observe(seconds, event_type)
+        cls.UPDATES.inc(event_type, status)
+
+    @classmethod
+    def register_stats(cls, component: str, source: StatsSource) -> None:
+        """
+        Регистрирует источник статистики компонента; числовые значения отдаются как gauge
+        `bot_component_stat{component, name}`.
+
+        Args:
+            component (str): Название компонента (например, embedding_cache).
+            source (StatsSource): Функция, возвращающая словарь статистики.
+        """
+        cls.__stats_sources[component] = source
+
+    @classmethod
+    def render(cls) -> str:
+        """
+        Формирует ответ /metrics.
+
+        Returns:
+            str: Все метрики процесса в текстовом формате Prometheus.
+        """
+        lines = [*cls.STAGE_DURATION.render(), *cls.UPDATE_DURATION.render(), *cls.UPDATES.render()]
+
+        lines.append("# HELP bot_component_stat Cache and queue statistics of bot components.")
+        lines.append("# TYPE bot_component_stat gauge")
+        for component, source in sorted(cls.__stats_sources.items()):
+            for name, value in sorted(source().items()):
+                if isinstance(value, (int, float)):
+                    labels = _format_labels(("component", "name"), (component, name))
+                    lines.append(f"bot_component_stat{labels} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    async def start_server(cls, host: str, port: int) -> None:
+        """
+        Запускает HTTP-сервер с эндпоинтом /metrics (если сбор метрик включён).
+
+        Если порт занят, ошибка логируется и бот работает без эндпоинта (метрики продолжают собираться).
+
+        Args:
+            host (str): Адрес прослушивания.
+            port (int): Порт.
+        """
+        if not cls.__enabled or cls.__runner is not None:
+            return
+
+        async def handle(_: web.Request) -> web.Response:
+            return web.Response(body=cls.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            logger.error(LOGGING_LEXICON["logging"]["metrics"]["start_error"].format(host, port, e))
+            await runner.cleanup()
+            return
+
+        cls.__runner = runner
+        logger.info(LOGGING_LEXICON["logging"]["metrics"]["started"].format(host, port))
+
+    @classmethod
+    async def stop_server(cls) -> None:
+        """Останавливает HTTP-сервер метрик."""
+        if cls.__runner is not None:
+            await cls.__runner.cleanup()
+            cls.__runner = None
@@ -0,0 +1,128 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, Set
+
+from core.utils.text_normalization import lemmatize
+from core.lexicon import RULE_PATTERNS, BAD_WORDS_LEXICON
+from core.lexicon.compiled import compile_rule_patterns
+
+
+@dataclass(frozen=True, slots=True)
+class RuleVerdict:
+    """
+    Результат применения всех rule-based правил к сообщению.
+
+    Attributes:
+        is_short (bool): Сообщение короче 3 слов.
+        is_noise (bool): Сообщение совпало с одним из шаблонов шума.
+        is_question (bool): Сообщение оканчивается на '?'.
+        has_important_keyword (bool): В сообщении есть важное ключевое слово.
+        has_bad_words (bool): В сообщении есть плохие слова.
+    """
+    is_short: bool
+    is_noise: bool
+    is_question: bool
+    has_important_keyword: bool
+    has_bad_words: bool
+
+    @property
+    def is_spam(self) -> bool:
+        """Спам — короткое сообщение, шум или наличие плохих слов."""
+        return self.is_short or self.is_noise or self.has_bad_words
+
+
+class RuleEngine:
+    """
+    Предкомпилированный движок rule-based фильтров.
+
+    Все правила из `rule_based.yaml` компилируются один раз (альтернации собираются
+    при сборке артефакта словарей, см. `core.lexicon.compiled.compile_rule_patterns`):
+    - шаблоны шума объединяются в одно регулярное выражение-альтернацию;
+    - ключевые слова объединяются в одно выражение, которое ищется за один проход по тексту;
+    - плохие слова проверяются по множеству лемм с кэшированием нормализации.
+    """
+
+    WORD_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, noise_pattern: str, keywords_pattern: str, bad_words: Set[str]):
+        """
+        Args:
+            noise_pattern (str): Альтернация шаблонов шума (семантика `re.match`).
+            keywords_pattern (str): Альтернация важных ключевых слов в нижнем регистре.
+            bad_words (Set[str]): Нормализованные плохие слова.
+        """
+        self.noise_regex = re.compile(noise_pattern)
+        self.keywords_regex = re.compile(keywords_pattern)
+        self.bad_words = frozenset(bad_words)
+
+    @classmethod
+    def from_rules(
+        cls,
+        noise_patterns: Iterable[str],
+        important_keywords: Iterable[str],
+        bad_words: Set[str]
+    ) -> "RuleEngine":
+        """
+        Собирает движок из списков правил.
+
+        Args:
+            noise_patterns (Iterable[str]): Регулярные выражения шума (семантика `re.match`).
+            important_keywords (Iterable[str]): Важные ключевые слова (поиск подстроки без учёта регистра).
+            bad_words (Set[str]): Нормализованные плохие слова.
+
+        Returns:
+            RuleEngine: Скомпилированный движок правил.
+        """
+        patterns = compile_rule_patterns(noise_patterns, important_keywords)
+        return cls(patterns["noise_pattern"], patterns["keywords_pattern"], bad_words)
+
+    @classmethod
+    def from_lexicon(cls) -> "RuleEngine":
+        """
+        Собирает движок из правил, уже собранных в артефакте словарей (`RULE_PATTERNS`),
+        и `BAD_WORDS_LEXICON`.
+
+        Returns:
+            RuleEngine: Скомпилированный движок правил.
+        """
+        return cls(RULE_PATTERNS["noise_pattern"], RULE_PATTERNS["keywords_pattern"], BAD_WORDS_LEXICON)
+
+    def is_noise(self, text: str) -> bool:
+        """Проверяет текст на совпадение с любым шаблоном шума."""
+        return self.noise_regex.match(text) is not None
+
+    def contains_important_keyword(self, text: str) -> bool:
+        """Проверяет наличие хотя бы одного важного ключевого слова."""
+        return self.keywords_regex.search(text.lower()) is not None
+
+    def contains_bad_words(self, text: str) -> bool:
+        """Проверяет наличие плохих слов (по нормальной форме)."""
+        return any(lemmatize(word) in self.bad_words for word in set(self.WORD_PATTERN.findall(text.lower())))
+
+    def evaluate(self, text: str) -> RuleVerdict:
+        """
+        Применяет все правила к сообщению и возвращает их результаты.
+
+        Текст приводится к нижнему регистру и разбивается на слова один раз,
+        после чего каждое правило выполняется одним скомпилированным выражением.
+
+        Args:
+            text (str): Текст сообщения.
+
+        Returns:
+            RuleVerdict: Результаты всех правил.
+        """
+        text_lower = text.lower()
+        words = set(self.WORD_PATTERN.findall(text_lower))
+
+        return RuleVerdict(
+            is_short=len(text.split()) < 3,
+            is_noise=self.noise_regex.match(text) is not None,
+            is_question=text.strip().endswith("?"),
+            has_important_keyword=self.keywords_regex.search(text_lower) is not None,
+            has_bad_words=any(lemmatize(word) in self.bad_words for word in words)
+        )
+
+
+# Движок правил, скомпилированный один раз на процесс
+RULE_ENGINE = RuleEngine.from_lexicon()
@@ -1,19 +1,81 @@
-from typing import Set
-from pymorphy3 import MorphAnalyzer
+import re
+from functools import lru_cache
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Optional, Set
 
+if TYPE_CHECKING:
+    from pymorphy3 import MorphAnalyzer
 
-def normalize_word(word: str, morph: MorphAnalyzer) -> str:
+
+# Максимальное количество слов в кэше лемм (word → normal_form)
+LEMMA_CACHE_SIZE = 50_000
+
+# Версия канонического вида текста: при изменении `canonicalize_text` сохранённые отпечатки пересчитываются
+FINGERPRINT_VERSION = 2
+
+# Пробельные символы при построении отпечатка схлопываются в один пробел,
+# знаки препинания в конце текста отбрасываются (остальные символы значимы: "C++", ":)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_TRAILING_PUNCTUATION_PATTERN = re.compile(r"[\s.,!?;…]+$")
+
+# Единый морфологический анализатор процесса (загружается один раз)
+_morph: Optional["MorphAnalyzer"] = None
+
+
+def get_morph_analyzer() -> "MorphAnalyzer":
+    """
+    Возвращает общий для процесса морфологический анализатор pymorphy3.
+
+    Модуль pymorphy3 и словари загружаются только при первом вызове (а не при импорте),
+    дальше используется тот же объект.
+
+    Returns:
+        MorphAnalyzer: Морфологический анализатор для русского языка.
+    """
+    global _morph
+    if _morph is None:
+        from pymorphy3 import MorphAnalyzer
+        _morph = MorphAnalyzer(lang="ru")
+    return _morph
+
+
+def normalize_word(word: str, morph: Optional["MorphAnalyzer"] = None) -> str:
     """
     Приводит слово к его нормальной форме с помощью pymorphy3.
 
     Args:
         word (str): Слово для нормализации.
-        morph (MorphAnalyzer): Объект морфологического анализатора.
+        morph (Optional[MorphAnalyzer]): Объект морфологического анализатора.
+                                         Если не передан, используется общий анализатор.
+
+    Returns:
+        str: Нормализованная форма слова.
+    """
+    return (morph or get_morph_analyzer()).parse(word)[0].normal_form
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(word: str) -> str:
+    """
+    Возвращает нормальную форму слова с кэшированием результата (LRU).
+
+    Args:
+        word (str): Слово в нижнем регистре.
 
     Returns:
         str: Нормализованная форма слова.
     """
-    return morph.parse(word)[0].normal_form
+    return normalize_word(word)
+
+
+def lemma_cache_info():
+    """
+    Возвращает статистику кэша лемм.
+
+    Returns:
+        CacheInfo: Именованный кортеж (hits, misses, maxsize, currsize).
+    """
+    return lemmatize.cache_info()
 
 
 def normalize_text(words: Set[str]) -> Set[str]:
@@ -27,5 +89,38 @@ def normalize_text(words: Set[str]) -> Set[str]:
     Returns:
         Set[str]: Множество нормализованных слов.
     """
-    morph = MorphAnalyzer(lang="ru")
-    return {normalize_word(word.lower(), morph) for word in words if word.strip()}
\ No newline at end of file
+    return {lemmatize(word.lower()) for word in words if word.strip()}
+
+
+def canonicalize_text(text: str) -> str:
+    """
+    Приводит текст к каноническому виду для сравнения:
+    нижний регистр, без лишних пробелов и знаков препинания в конце.
+
+    Остальные символы сохраняются: "я люблю c++" и "я люблю c#", "не :)" и "не :(" — разные тексты.
+
+    Пример: "  Меня   зовут Ира!" → "меня зовут ира".
+
+    Args:
+        text (str): Исходный текст.
+
+    Returns:
+        str: Канонический текст.
+    """
+    text = _WHITESPACE_PATTERN.sub(" ", text.casefold())
+    return _TRAILING_PUNCTUATION_PATTERN.sub("", text).strip()
+
+
+def text_fingerprint(text: str) -> str:
+    """
+    Возвращает короткий хэш канонического вида текста.
+
+    Используется как ключ кэшей (embedding, вердикты фильтра) и для поиска дубликатов.
+
+    Args:
+        text (str): Исходный текст.
+
+    Returns:
+        str: Hex-строка хэша BLAKE2b (32 символа).
+    """
+    return blake2b(canonicalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
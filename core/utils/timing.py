@@ -0,0 +1,78 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, List, TypeVar
+
+from core.lexicon import LOGGING_LEXICON
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Наблюдатель длительности этапов: (название этапа, длительность в мс)
+StageObserver = Callable[[str, float], None]
+
+_observers: List[StageObserver] = []
+
+
+def add_stage_observer(observer: StageObserver) -> None:
+    """
+    Подписывает наблюдателя на длительности всех этапов `stage_timer` (например, для сбора метрик).
+
+    Наблюдатель вызывается синхронно при завершении этапа и не должен блокировать.
+
+    Args:
+        observer (StageObserver): Функция (этап, длительность в мс).
+    """
+    _observers.append(observer)
+
+
+def remove_stage_observer(observer: StageObserver) -> None:
+    """
+    Отписывает наблюдателя, добавленного через `add_stage_observer`.
+
+    Args:
+        observer (StageObserver): Ранее добавленный наблюдатель.
+    """
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Замеряет длительность этапа обработки, пишет её в лог (уровень DEBUG)
+    и передаёт наблюдателям, добавленным через `add_stage_observer`.
+
+    Пример:
+        with stage_timer("history_fetch"):
+            history = await TemporaryMemoryService.get(user_id)
+
+    Args:
+        stage (str): Название этапа.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(LOGGING_LEXICON["logging"]["timing"]["stage"].format(stage, elapsed_ms))
+        for observer in _observers:
+            observer(stage, elapsed_ms)
+
+
+async def timed(stage: str, awaitable: Awaitable[T]) -> T:
+    """
+    Ожидает awaitable внутри `stage_timer`. Удобно для задач в `asyncio.TaskGroup`.
+
+    Args:
+        stage (str): Название этапа.
+        awaitable (Awaitable[T]): Корутина или future.
+
+    Returns:
+        T: Результат awaitable.
+    """
+    with stage_timer(stage):
+        return await awaitable
@@ -0,0 +1,328 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from core.lexicon import LOGGING_LEXICON
+from core.utils.text_normalization import text_fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+# Загрузчик всех записей памяти пользователя: [(текст, вектор), ...]
+MemoriesLoader = Callable[[], Awaitable[List[Tuple[str, Sequence[float]]]]]
+
+
+def find_clusters(vectors: np.ndarray, min_similarity: float, max_size: int) -> List[List[int]]:
+    """
+    Жадно разбивает векторы на группы близких по смыслу.
+
+    Каждая ещё не распределённая строка становится центром группы, в которую попадают
+    нераспределённые строки с косинусным сходством с центром не ниже `min_similarity`
+    (самые близкие первыми, не больше `max_size`). Группы из одной строки не возвращаются.
+
+    Args:
+        vectors (np.ndarray): Матрица векторов (строка — запись).
+        min_similarity (float): Минимальное косинусное сходство с центром группы.
+        max_size (int): Максимальный размер группы.
+
+    Returns:
+        List[List[int]]: Индексы строк каждой группы (первым — центр).
+    """
+    if len(vectors) < 2:
+        return []
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms > 0, norms, 1)
+    similarity = unit @ unit.T
+
+    assigned = np.zeros(len(vectors), dtype=bool)
+    clusters = []
+    for center in range(len(vectors)):
+        if assigned[center]:
+            continue
+        candidates = np.flatnonzero(~assigned & (similarity[center] >= min_similarity))
+        candidates = candidates[np.argsort(-similarity[center, candidates], kind="stable")][:max_size]
+        if len(candidates) < 2:
+            continue
+        members = [center, *(int(index) for index in candidates if index != center)][:max_size]
+        assigned[members] = True
+        clusters.append(members)
+    return clusters
+
+
+class _UserMemories:
+    """
+    Записи памяти одного пользователя: тексты, их отпечатки (`text_fingerprint`)
+    и матрица векторов float32 (строка — запись).
+
+    Квадраты норм векторов хранятся отдельно, чтобы L2-расстояние считалось
+    одним матрично-векторным произведением: |m - q|² = |m|² - 2·m·q + |q|².
+    """
+
+    __slots__ = ("texts", "hashes", "matrix", "norms")
+
+    def __init__(self, texts: List[str], matrix: np.ndarray):
+        self.texts = texts
+        self.hashes = [text_fingerprint(text) for text in texts]
+        self.matrix = matrix
+        self.norms = np.einsum("ij,ij->i", matrix, matrix)
+
+    @property
+    def nbytes(self) -> int:
+        """Оценка занимаемой памяти (векторы, нормы и тексты)."""
+        return self.matrix.nbytes + self.norms.nbytes + sum(len(text) for text in self.texts) * 2
+
+    def append(self, text: str, vector: np.ndarray) -> None:
+        """Добавляет запись, если такого текста ещё нет."""
+        if text in self.texts:
+            return
+        row = vector[np.newaxis, :]
+        self.matrix = np.vstack((self.matrix, row)) if self.texts else row.copy()
+        self.norms = np.append(self.norms, np.float32(vector @ vector))
+        self.texts.append(text)
+        self.hashes.append(text_fingerprint(text))
+
+    def search(self, vector: np.ndarray, limit: int) -> List[str]:
+        """Возвращает тексты `limit` ближайших записей по L2-расстоянию."""
+        count = len(self.texts)
+        if not count or limit <= 0:
+            return []
+
+        distances = self.norms - 2 * (self.matrix @ vector)
+        if limit < count:
+            nearest = np.argpartition(distances, limit)[:limit]
+            nearest = nearest[np.argsort(distances[nearest])]
+        else:
+            nearest = np.argsort(distances)
+        return [self.texts[index] for index in nearest]
+
+    def find_duplicate(self, text_hash: str, vector: np.ndarray, max_distance: float) -> Optional[Tuple[str, str]]:
+        """Возвращает (текст, "text" | "vector") записи-дубликата или None."""
+        if text_hash in self.hashes:
+            return self.texts[self.hashes.index(text_hash)], "text"
+        if not self.texts:
+            return None
+
+        distances = self.norms - 2 * (self.matrix @ vector) + vector @ vector
+        nearest = int(np.argmin(distances))
+        if distances[nearest] <= max_distance ** 2:
+            return self.texts[nearest], "vector"
+        return None
+
+
+class UserVectorStore:
+    """
+    In-process хранилище векторов долгосрочной памяти пользователей.
+
+    Память пользователя (не больше ~50 записей) загружается целиком в непрерывную
+    матрицу float32 при первом обращении, после чего поиск top-k выполняется
+    одним векторизованным произведением без запроса к PostgreSQL.
+    Порядок результатов совпадает с поиском pgvector по L2 (`<->`).
+
+    - Пользователи хранятся в LRU с ограничением по объёму памяти (`memory_budget` байт).
+    - При промахе вызывающий код ищет в pgvector, а загрузка пользователя выполняется в фоне.
+    - Новые записи добавляются инкрементально (`add`), в том числе во время фоновой загрузки.
+
+    Память пользователя изменяется только процессом, который обрабатывает его апдейты
+    (в режиме webhook пользователь закреплён за одним процессом), поэтому кэш не устаревает.
+    """
+
+    __users: "OrderedDict[int, _UserMemories]" = OrderedDict()
+    __loading: Dict[int, List[Tuple[str, np.ndarray]]] = {}
+    __tasks: Set[asyncio.Task] = set()
+    __memory_budget: int = 0
+    __used_bytes: int = 0
+    __metrics: Dict[str, int] = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+
+    @classmethod
+    def init(cls, memory_budget: int) -> None:
+        """
+        Настраивает хранилище.
+
+        Args:
+            memory_budget (int): Максимальный объём векторов в памяти процесса (байт). 0 — хранилище отключено.
+        """
+        cls.__users = OrderedDict()
+        cls.__loading = {}
+        cls.__memory_budget = max(0, memory_budget)
+        cls.__used_bytes = 0
+        cls.__metrics = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+
+    @classmethod
+    def search(cls, user_id: int, vector: Sequence[float], limit: int) -> Optional[List[str]]:
+        """
+        Ищет ближайшие записи памяти пользователя.
+
+        Args:
+            user_id (int): ID пользователя.
+            vector (Sequence[float]): Вектор запроса.
+            limit (int): Максимальное количество записей.
+
+        Returns:
+            Optional[List[str]]: Тексты записей от ближайших к дальним или None,
+                                 если память пользователя не загружена.
+        """
+        if cls.__memory_budget <= 0:
+            return None
+
+        memories = cls.__users.get(user_id)
+        if memories is None:
+            cls.__metrics["misses"] += 1
+            return None
+
+        cls.__users.move_to_end(user_id)
+        cls.__metrics["hits"] += 1
+        return memories.search(np.asarray(vector, dtype=np.float32), limit)
+
+    @classmethod
+    def is_loaded(cls, user_id: int) -> bool:
+        """
+        Args:
+            user_id (int): ID пользователя.
+
+        Returns:
+            bool: True, если память пользователя загружена в хранилище.
+        """
+        return cls.__memory_budget > 0 and user_id in cls.__users
+
+    @classmethod
+    def find_duplicate(
+        cls,
+        user_id: int,
+        text_hash: str,
+        vector: Sequence[float],
+        max_distance: float
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Ищет среди загруженной памяти пользователя запись-дубликат: с тем же отпечатком текста
+        или с вектором не дальше `max_distance` (L2).
+
+        Args:
+            user_id (int): ID пользователя.
+            text_hash (str): Отпечаток текста (`text_fingerprint`).
+            vector (Sequence[float]): Вектор текста.
+            max_distance (float): Максимальное L2-расстояние до дубликата.
+
+        Returns:
+            Optional[Tuple[str, str]]: Текст записи и тип совпадения ("text" или "vector")
+                                       или None, если дубликата нет или память не загружена.
+        """
+        memories = cls.__users.get(user_id) if cls.__memory_budget > 0 else None
+        if memories is None:
+            return None
+
+        cls.__users.move_to_end(user_id)
+        return memories.find_duplicate(text_hash, np.asarray(vector, dtype=np.float32), max_distance)
+
+    @classmethod
+    def schedule_load(cls, user_id: int, loader: MemoriesLoader) -> None:
+        """
+        Загружает память пользователя в фоне, если она ещё не загружена и не загружается.
+
+        Args:
+            user_id (int): ID пользователя.
+            loader (MemoriesLoader): Корутина-загрузчик всех записей пользователя из PostgreSQL.
+        """
+        if cls.__memory_budget <= 0 or user_id in cls.__users or user_id in cls.__loading:
+            return
+
+        cls.__loading[user_id] = []
+        task = asyncio.create_task(cls.__load(user_id, loader))
+        cls.__tasks.add(task)
+        task.add_done_callback(cls.__tasks.discard)
+
+    @classmethod
+    def add(cls, user_id: int, text: str, vector: Sequence[float]) -> None:
+        """
+        Добавляет новую запись памяти пользователя, если его память загружена или загружается.
+
+        Args:
+            user_id (int): ID пользователя.
+            text (str): Текст записи.
+            vector (Sequence[float]): Вектор записи.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+
+        pending = cls.__loading.get(user_id)
+        if pending is not None:
+            pending.append((text, vector))
+            return
+
+        memories = cls.__users.get(user_id)
+        if memories is not None:
+            cls.__used_bytes -= memories.nbytes
+            memories.append(text, vector)
+            cls.__used_bytes += memories.nbytes
+            cls.__evict()
+
+    @classmethod
+    def invalidate(cls, user_id: int) -> None:
+        """
+        Удаляет память пользователя из хранилища (например, после удаления записей в базе).
+
+        Args:
+            user_id (int): ID пользователя.
+        """
+        memories = cls.__users.pop(user_id, None)
+        if memories is not None:
+            cls.__used_bytes -= memories.nbytes
+        cls.__loading.pop(user_id, None)
+
+    @classmethod
+    async def __load(cls, user_id: int, loader: MemoriesLoader) -> None:
+        """
+        Загружает память пользователя и дополняет её записями, добавленными во время загрузки.
+
+        Args:
+            user_id (int): ID пользователя.
+            loader (MemoriesLoader): Корутина-загрузчик.
+        """
+        try:
+            rows = await loader()
+        except Exception as e:
+            cls.__loading.pop(user_id, None)
+            logger.warning(LOGGING_LEXICON["logging"]["vector_store"]["load_error"].format(user_id, e))
+            return
+
+        pending = cls.__loading.pop(user_id, None)
+        if pending is None:
+            # Память пользователя была сброшена во время загрузки
+            return
+
+        vectors = [vector for _, vector in rows]
+        matrix = np.asarray(vectors, dtype=np.float32) if vectors else np.empty((0, 0), dtype=np.float32)
+        memories = _UserMemories([text for text, _ in rows], matrix)
+        for text, vector in pending:
+            memories.append(text, vector)
+
+        cls.__users[user_id] = memories
+        cls.__used_bytes += memories.nbytes
+        cls.__metrics["loads"] += 1
+        cls.__evict()
+
+    @classmethod
+    def __evict(cls) -> None:
+        """Вытесняет давно не использованных пользователей, пока объём превышает бюджет."""
+        while cls.__used_bytes > cls.__memory_budget and len(cls.__users) > 1:
+            _, memories = cls.__users.popitem(last=False)
+            cls.__used_bytes -= memories.nbytes
+            cls.__metrics["evictions"] += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает статистику хранилища.
+
+        Returns:
+            Dict[str, float]: users, used_bytes, memory_budget, hits, misses, hit_rate, loads, evictions.
+        """
+        stats: Dict[str, float] = dict(cls.__metrics)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["users"] = len(cls.__users)
+        stats["used_bytes"] = cls.__used_bytes
+        stats["memory_budget"] = cls.__memory_budget
+        return stats
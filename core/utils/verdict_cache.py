@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from core.lexicon import LOGGING_LEXICON
+from core.utils.cache import LRUCache
+from core.utils.text_normalization import text_fingerprint
+from database.redis.repositories import RedisVerdictsRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+class VerdictCache:
+    """
+    Двухуровневый кэш решений AI-фильтра ("да"/"нет") о важности сообщения.
+
+    Ключ — модель фильтра + хэш канонического вида текста.
+
+    Уровни:
+    1. In-process LRU.
+    2. Redis с TTL (общий для всех процессов бота).
+
+    Каждое новое решение модели дописывается в журнал решений (JSON Lines),
+    из которого кэш можно прогреть при следующем запуске. Решения копятся в памяти
+    и дописываются пачками по `LOG_FLUSH_LINES` строк одним вызовом write через постоянно
+    открытый дескриптор (O_APPEND, поэтому строки нескольких процессов не перемешиваются).
+    Когда журнал превышает `log_max_bytes`, он переименовывается в "<путь>.1"
+    (предыдущая копия удаляется), так что на диске хранится не больше двух файлов.
+    """
+
+    VERDICTS = ("да", "нет")
+    LOG_FLUSH_LINES = 64
+    LOG_READ_BLOCK = 64 * 1024
+
+    __memory: LRUCache = LRUCache(max_size=0)
+    __ttl: int = 0
+    __log_path: Optional[str] = None
+    __log_max_bytes: int = 0
+    __log_fd: Optional[int] = None
+    __log_pending: List[str] = []
+    __redis_hits: int = 0
+
+    @classmethod
+    def init(cls, max_size: int, ttl: int, log_path: Optional[str] = None, log_max_bytes: int = 0) -> None:
+        """
+        Настраивает кэш.
+
+        Args:
+            max_size (int): Максимальное количество решений в памяти процесса.
+            ttl (int): Время жизни решения в Redis (секунды). 0 — Redis-уровень отключён.
+            log_path (Optional[str]): Путь к журналу решений. None — журнал не ведётся.
+            log_max_bytes (int): Размер журнала (байт), после которого он ротируется. 0 — без ротации.
+        """
+        cls.close()
+        cls.__memory = LRUCache(max_size=max_size)
+        cls.__ttl = ttl
+        cls.__log_path = log_path or None
+        cls.__log_max_bytes = log_max_bytes
+        cls.__redis_hits = 0
+
+    @staticmethod
+    def build_key(model: str, text: str) -> str:
+        """
+        Формирует ключ кэша.
+
+        Args:
+            model (str): Модель фильтра.
+            text (str): Текст сообщения.
+
+        Returns:
+            str: Ключ вида "verdict:{model}:{fingerprint}".
+        """
+        return f"verdict:{model}:{text_fingerprint(text)}"
+
+    @classmethod
+    def warm_up(cls) -> int:
+        """
+        Прогревает in-process уровень из журнала решений.
+
+        Читаются только последние `max_size` записей: журнал читается с конца,
+        при нехватке записей — и его предыдущая копия ("<путь>.1"). Повреждённые строки пропускаются.
+
+        Returns:
+            int: Количество загруженных решений.
+        """
+        if not cls.__log_path or cls.__memory.max_size <= 0:
+            return 0
+
+        lines: List[str] = []
+        for path in (cls.__log_path, cls.__log_path + ".1"):
+            needed = cls.__memory.max_size - len(lines)
+            if needed <= 0:
+                break
+            try:
+                lines[:0] = cls.read_tail(path, needed)
+            except FileNotFoundError:
+                continue
+
+        loaded = 0
+        for line in lines:
+            try:
+                record = json.loads(line)
+                key, verdict = record["key"], record["verdict"]
+            except (ValueError, KeyError, TypeError):
+                continue
+
+            if verdict in cls.VERDICTS:
+                cls.__memory.set(key, verdict)
+                loaded += 1
+
+        logger.info(LOGGING_LEXICON["logging"]["cache"]["verdict_warm_up"].format(loaded))
+        return loaded
+
+    @classmethod
+    def read_tail(cls, path: str, count: int) -> List[str]:
+        """
+        Читает последние строки файла, не читая его целиком.
+
+        Args:
+            path (str): Путь к файлу.
+            count (int): Сколько последних строк вернуть.
+
+        Returns:
+            List[str]: Не больше `count` последних непустых строк в исходном порядке.
+        """
+        blocks: List[bytes] = []
+        newlines = 0
+        with open(path, "rb") as file:
+            position = file.seek(0, os.SEEK_END)
+            # Нужна ещё одна граница строки, чтобы первая из возвращаемых строк была целой
+            while position > 0 and newlines <= count:
+                size = min(cls.LOG_READ_BLOCK, position)
+                position -= size
+                file.seek(position)
+                blocks.append(file.read(size))
+                newlines += blocks[-1].count(b"\n")
+
+        lines = b"".join(reversed(blocks)).split(b"\n")
+        if position > 0:
+            lines = lines[1:]
+        return [line.decode("utf-8", errors="replace") for line in lines if line][-count:]
+
+    @classmethod
+    async def get(cls, model: str, text: str) -> Optional[str]:
+        """
+        Ищет решение сначала в памяти процесса, затем в Redis.
+
+        Args:
+            model (str): Модель фильтра.
+            text (str): Текст сообщения.
+
+        Returns:
+            Optional[str]: "да", "нет" или None при промахе.
+        """
+        key = cls.build_key(model, text)
+
+        verdict = cls.__memory.get(key)
+        if verdict is None and cls.__ttl > 0:
+            try:
+                verdict = await RedisVerdictsRepository.get_verdict(key)
+            except (RedisError, RuntimeError) as e:
+                logger.warning(LOGGING_LEXICON["logging"]["cache"]["redis_error"].format(key, e))
+
+            if verdict is not None:
+                cls.__redis_hits += 1
+                cls.__memory.set(key, verdict)
+
+        return verdict
+
+    @classmethod
+    async def set(cls, model: str, text: str, verdict: str) -> None:
+        """
+        Сохраняет решение модели в оба уровня кэша и в журнал решений.
+
+        Ответы, отличные от "да"/"нет", не кэшируются.
+
+        Args:
+            model (str): Модель фильтра.
+            text (str): Текст сообщения.
+            verdict (str): Ответ модели в нижнем регистре.
+        """
+        if verdict not in cls.VERDICTS:
+            return
+
+        key = cls.build_key(model, text)
+        cls.__memory.set(key, verdict)
+
+        if cls.__ttl > 0:
+            try:
+                await RedisVerdictsRepository.save_verdict(key, verdict, cls.__ttl)
+            except (RedisError, RuntimeError) as e:
+                logger.warning(LOGGING_LEXICON["logging"]["cache"]["redis_error"].format(key, e))
+
+        if cls.__log_path:
+            cls.__log_pending.append(json.dumps({"key": key, "verdict": verdict}, ensure_ascii=False) + "\n")
+            if len(cls.__log_pending) >= cls.LOG_FLUSH_LINES:
+                cls.flush_log()
+
+    @classmethod
+    def flush_log(cls) -> None:
+        """
+        Дописывает накопленные решения в журнал одним вызовом write и при необходимости ротирует его.
+
+        Ошибки записи логируются, решения при этом теряются (журнал нужен только для прогрева).
+        """
+        if not cls.__log_pending or not cls.__log_path:
+            return
+
+        data = "".join(cls.__log_pending).encode("utf-8")
+        cls.__log_pending = []
+        try:
+            if cls.__log_fd is None:
+                cls.__open_log()
+            if cls.__log_max_bytes > 0:
+                cls.__rotate_log(len(data))
+            os.write(cls.__log_fd, data)
+        except OSError as e:
+            logger.warning(LOGGING_LEXICON["logging"]["cache"]["verdict_log_error"].format(e))
+
+    @classmethod
+    def close(cls) -> None:
+        """Дописывает накопленные решения и закрывает журнал."""
+        cls.flush_log()
+        if cls.__log_fd is not None:
+            os.close(cls.__log_fd)
+            cls.__log_fd = None
+
+    @classmethod
+    def __open_log(cls) -> None:
+        """(Пере)открывает журнал на дозапись."""
+        if cls.__log_fd is not None:
+            os.close(cls.__log_fd)
+            cls.__log_fd = None
+        cls.__log_fd = os.open(cls.__log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    @classmethod
+    def __rotate_log(cls, incoming: int) -> None:
+        """
+        Переименовывает журнал в "<путь>.1", если после записи он превысит лимит.
+
+        Если журнал уже ротирован другим процессом, открытый дескриптор указывает
+        на старый файл — тогда журнал просто открывается заново.
+
+        Args:
+            incoming (int): Размер дописываемых данных (байт).
+        """
+        try:
+            current = os.stat(cls.__log_path)
+        except FileNotFoundError:
+            cls.__open_log()
+            return
+
+        if current.st_ino != os.fstat(cls.__log_fd).st_ino:
+            cls.__open_log()
+        elif current.st_size > 0 and current.st_size + incoming > cls.__log_max_bytes:
+            os.replace(cls.__log_path, cls.__log_path + ".1")
+            cls.__open_log()
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Возвращает статистику кэша.
+
+        Returns:
+            Dict[str, float]: Статистика in-process уровня, redis_hits и общий hit_rate.
+        """
+        stats = cls.__memory.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["redis_hits"] = cls.__redis_hits
+        stats["hit_rate"] = (stats["hits"] + cls.__redis_hits) / lookups if lookups else 0.0
+        return stats
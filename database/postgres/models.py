@@ -1,9 +1,9 @@
-from typing import Annotated
+from typing import Annotated, Optional
 from datetime import datetime
 
-from sqlalchemy import String, BIGINT, BOOLEAN, TIMESTAMP
+from sqlalchemy import String, BIGINT, BOOLEAN, INTEGER, TIMESTAMP, Index
 from sqlalchemy.orm import mapped_column, Mapped
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC
 
 from database.postgres.manager import Base
 
@@ -11,6 +11,12 @@ from database.postgres.manager import Base
 # Удобный алиас для строк фиксированной длины
 str_100 = Annotated[str, mapped_column(String(100))]
 
+# Форматы хранения векторов памяти: тип колонки pgvector и класс операторов HNSW-индекса
+EMBEDDING_STORAGE_TYPES = {
+    "vector": (Vector, "vector_l2_ops"),
+    "halfvec": (HALFVEC, "halfvec_l2_ops")
+}
+
 
 class UsersOrm(Base):
     """
@@ -20,12 +26,15 @@ class UsersOrm(Base):
     - id: уникальный идентификатор пользователя (Telegram user_id)
     - first_name: имя пользователя (до 100 символов)
     - is_activate: флаг активации пользователя (True, если пользователь прошёл активацию)
+    - memories_count: количество записей долгосрочной памяти пользователя
+      (поддерживается в той же транзакции, что и вставка памяти)
     """
     __tablename__ = 'users'
 
     id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
     first_name: Mapped[str_100]
     is_activate: Mapped[bool] = mapped_column(BOOLEAN, default=False)
+    memories_count: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0, server_default='0')
 
 
 class UsersMemoriesOrm(Base):
@@ -36,13 +45,98 @@ class UsersMemoriesOrm(Base):
     - id: уникальный идентификатор записи памяти
     - user_id: ID пользователя (связь с UsersOrm)
     - message_text: текстовое сообщение пользователя (уникальное)
-    - embedding: векторное представление сообщения (для поиска по схожести)
-    - created_at: дата и время создания записи
+    - text_hash: отпечаток канонического вида текста (`text_fingerprint`) для поиска дубликатов
+    - embedding: векторное представление сообщения (для поиска по схожести);
+      формат хранения задаётся `configure_memories_embedding`, по умолчанию vector(1536)
+    - created_at: дата и время создания записи (обновляется, когда с записью объединяется дубликат)
+    - hits: сколько раз запись попала в результаты поиска памяти
+    - last_used_at: когда запись последний раз попала в результаты поиска памяти
+
+    При достижении лимита памяти вытесняются записи, которые дольше всех не использовались
+    (max(created_at, last_used_at)), при равенстве — с меньшим количеством hits.
+
+    Индексы:
+    - btree по user_id (все запросы памяти фильтруются по пользователю)
+    - HNSW по embedding с классом операторов vector_l2_ops / halfvec_l2_ops (поиск через оператор `<->`)
     """
     __tablename__ = 'users_memories'
+    __table_args__ = (
+        Index(
+            'ix_users_memories_embedding_hnsw',
+            'embedding',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_l2_ops'}
+        ),
+    )
 
     id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
-    user_id: Mapped[int] = mapped_column(BIGINT, nullable=False)
+    user_id: Mapped[int] = mapped_column(BIGINT, nullable=False, index=True)
     message_text: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    text_hash: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
     embedding: Mapped[list] = mapped_column(Vector(1536), nullable=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+    hits: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0, server_default='0')
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP, nullable=True)
+
+
+class ResponseCacheOrm(Base):
+    """
+    ORM-модель для таблицы семантического кэша ответов модели.
+
+    Колонки:
+    - id: уникальный идентификатор записи
+    - model: чат-модель, сгенерировавшая ответ
+    - prompt_text: текст запроса пользователя
+    - embedding: векторное представление запроса
+    - reply: ответ модели
+    - generation_ms: сколько заняла генерация ответа (для оценки сэкономленного времени)
+    - created_at: дата и время создания записи (TTL и вытеснение старых записей)
+
+    Индексы:
+    - HNSW по embedding с классом операторов vector_cosine_ops (поиск через оператор `<=>`)
+    - btree по created_at
+    """
+    __tablename__ = 'response_cache'
+    __table_args__ = (
+        Index(
+            'ix_response_cache_embedding_hnsw',
+            'embedding',
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'}
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    model: Mapped[str_100]
+    prompt_text: Mapped[str] = mapped_column(String, nullable=False)
+    embedding: Mapped[list] = mapped_column(Vector(1536), nullable=False)
+    reply: Mapped[str] = mapped_column(String, nullable=False)
+    generation_ms: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0, server_default='0')
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False, default=datetime.utcnow, index=True)
+
+
+def configure_memories_embedding(storage: str, dimensions: int) -> None:
+    """
+    Задаёт формат хранения векторов памяти пользователей (до создания таблиц и первых запросов).
+
+    Если `dimensions` меньше размерности модели embedding, векторы перед сохранением
+    и поиском укорачиваются (см. `UsersMemoriesRepository.to_storage`).
+
+    Args:
+        storage (str): Тип колонки: "vector" (float32) или "halfvec" (float16).
+        dimensions (int): Размерность хранимых векторов.
+
+    Raises:
+        ValueError: Если формат хранения неизвестен.
+    """
+    if storage not in EMBEDDING_STORAGE_TYPES:
+        raise ValueError(f"Unknown embedding storage: {storage}")
+
+    column_type, ops = EMBEDDING_STORAGE_TYPES[storage]
+    table = UsersMemoriesOrm.__table__
+    table.c.embedding.type = column_type(dimensions)
+    for index in table.indexes:
+        if index.name == "ix_users_memories_embedding_hnsw":
+            index.dialect_options["postgresql"]["ops"] = {"embedding": ops}
@@ -1,13 +1,26 @@
 import logging
-from typing import Optional, List
+from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Set, Tuple
 
-from sqlalchemy import update, select, func
+import numpy as np
+from pgvector import HalfVector
+
+from sqlalchemy import (
+    update, select, delete, func, inspect, values, column, cast, bindparam, or_, true,
+    Connection, Row, Select, String, BIGINT, INTEGER, TIMESTAMP
+)
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateColumn
 
 from database.postgres.manager import PostgresManager, Base
-from database.postgres.models import UsersOrm, UsersMemoriesOrm
+from database.postgres.models import UsersOrm, UsersMemoriesOrm, ResponseCacheOrm
 from core.lexicon import LOGGING_LEXICON
+from core.utils.activation_cache import ActivationCache
+from core.utils.text_normalization import FINGERPRINT_VERSION, text_fingerprint
+from core.utils.vector_store import UserVectorStore
+from core.utils.timing import stage_timer
 
 
 logger = logging.getLogger(__name__)
@@ -23,32 +36,173 @@ class AsyncRepository:
     @staticmethod
     async def create_tables() -> None:
         """
-        Создает все таблицы базы данных, определенные в метаданных SQLAlchemy.
+        Создает все таблицы базы данных, определенные в метаданных SQLAlchemy,
+        а у уже существующих таблиц — недостающие колонки и индексы.
+        Если формат хранения векторов памяти изменился, перекодирует существующие записи,
+        и заполняет отпечатки текста у записей, сохранённых до появления колонки `text_hash`.
+        После этого сверяет счётчики памяти пользователей с фактическим количеством записей.
 
         Логи:
             INFO при успешном создании таблиц.
             ERROR при возникновении ошибок SQLAlchemy или неожиданных ошибок.
+
+        Raises:
+            SQLAlchemyError, ValueError: Ошибки создания или миграции схемы пробрасываются после записи в лог:
+                                         с несогласованной схемой (например, типом колонки `embedding`,
+                                         отличным от модели) бот запускаться не должен.
         """
         try:
             async with PostgresManager.get_engine().begin() as connection:
                 await connection.run_sync(Base.metadata.create_all)
+                await connection.run_sync(AsyncRepository._create_missing_columns)
+                await connection.run_sync(AsyncRepository._migrate_memories_embedding)
+                await connection.run_sync(AsyncRepository._backfill_memories_text_hash)
+                await connection.run_sync(AsyncRepository._create_missing_indexes)
+                await AsyncRepository._reconcile_memories_counters(connection)
                 logger.info(LOGGING_LEXICON["logging"]["database"]["tables"]["created"])
 
         except SQLAlchemyError as e:
             logger.error(
                 LOGGING_LEXICON["logging"]["database"]["tables"]["create_sqlalchemy_error"].format(e)
             )
+            raise
 
         except Exception as e:
             logger.error(
                 LOGGING_LEXICON["logging"]["database"]["tables"]["create_unexpected_error"].format(e)
             )
+            raise
+
+    @staticmethod
+    def _create_missing_columns(connection: Connection) -> None:
+        """
+        Добавляет в существующие таблицы колонки, объявленные в моделях позже создания таблиц.
+
+        Новые колонки должны иметь `server_default` или допускать NULL.
+
+        Args:
+            connection (Connection): Синхронное соединение из `run_sync`.
+        """
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+
+    @staticmethod
+    def _migrate_memories_embedding(connection: Connection) -> None:
+        """
+        Перекодирует векторы памяти, если формат колонки в базе отличается от заданного в модели.
+
+        HNSW-индекс удаляется (он создаётся заново с нужным классом операторов в
+        `_create_missing_indexes`), а векторы приводятся к новому типу. При уменьшении
+        размерности вектор укорачивается и нормализуется — так же, как это делает параметр
+        `dimensions` API embedding для моделей text-embedding-3.
+
+        Args:
+            connection (Connection): Синхронное соединение из `run_sync`.
+
+        Raises:
+            ValueError: Если заданная размерность больше хранимой (восстановить отброшенные компоненты нельзя).
+        """
+        table = UsersMemoriesOrm.__table__
+        target = table.c.embedding.type.compile(dialect=connection.dialect).lower()
+        current = connection.exec_driver_sql(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'users_memories'::regclass AND attname = 'embedding'"
+        ).scalar()
+        if current is None or current == target:
+            return
+
+        current_dim = int(current[current.index("(") + 1:-1])
+        target_dim = table.c.embedding.type.dim
+        if target_dim > current_dim:
+            raise ValueError(f"Cannot migrate users_memories.embedding from {current} to {target}")
+
+        source = "embedding::vector"
+        if target_dim < current_dim:
+            source = f"l2_normalize(subvector({source}, 1, {target_dim}))"
+
+        connection.exec_driver_sql("DROP INDEX IF EXISTS ix_users_memories_embedding_hnsw")
+        connection.exec_driver_sql(
+            f"ALTER TABLE users_memories ALTER COLUMN embedding TYPE {target} USING ({source})::{target}"
+        )
+        logger.info(LOGGING_LEXICON["logging"]["database"]["tables"]["embedding_migrated"].format(current, target))
+
+    @staticmethod
+    def _backfill_memories_text_hash(connection: Connection) -> None:
+        """
+        Заполняет `users_memories.text_hash` у записей, где он ещё не посчитан.
+
+        Отпечаток считается в Python (`text_fingerprint`), чтобы совпадать
+        с отпечатками новых записей и `UserVectorStore`. Версия отпечатков хранится
+        в комментарии колонки: если она отличается от `FINGERPRINT_VERSION`, пересчитываются все записи.
+
+        Args:
+            connection (Connection): Синхронное соединение из `run_sync`.
+        """
+        table = UsersMemoriesOrm.__table__
+        version = f"text_fingerprint v{FINGERPRINT_VERSION}"
+        stored_version = connection.exec_driver_sql(
+            "SELECT col_description('users_memories'::regclass, attnum) FROM pg_attribute "
+            "WHERE attrelid = 'users_memories'::regclass AND attname = 'text_hash'"
+        ).scalar()
+
+        query = select(table.c.id, table.c.message_text)
+        if stored_version == version:
+            query = query.where(table.c.text_hash.is_(None))
+        rows = connection.execute(query).all()
+        if rows:
+            connection.execute(
+                update(table).where(table.c.id == bindparam("row_id")).values(text_hash=bindparam("row_hash")),
+                [{"row_id": row.id, "row_hash": text_fingerprint(row.message_text)} for row in rows]
+            )
+        if stored_version != version:
+            connection.exec_driver_sql(f"COMMENT ON COLUMN users_memories.text_hash IS '{version}'")
+
+    @staticmethod
+    async def _reconcile_memories_counters(connection: AsyncConnection) -> None:
+        """
+        Приводит `users.memories_count` в соответствие с фактическим количеством записей памяти.
+
+        Args:
+            connection (AsyncConnection): Асинхронное соединение внутри транзакции.
+        """
+        actual = (
+            select(func.count(UsersMemoriesOrm.id))
+            .where(UsersMemoriesOrm.user_id == UsersOrm.id)
+            .scalar_subquery()
+        )
+        await connection.execute(
+            update(UsersOrm)
+            .where(UsersOrm.memories_count != actual)
+            .values(memories_count=actual)
+        )
+
+    @staticmethod
+    def _create_missing_indexes(connection: Connection) -> None:
+        """
+        Создает индексы, объявленные в моделях, если их ещё нет в базе.
+
+        `create_all` пропускает существующие таблицы вместе с их индексами,
+        поэтому индексы, добавленные в модели позже, создаются здесь отдельно.
+
+        Args:
+            connection (Connection): Синхронное соединение из `run_sync`.
+        """
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
 
 class UsersRepository(AsyncRepository):
     """
     Репозиторий для работы с пользователями.
 
+    Статус активации кэшируется в `ActivationCache` и обновляется при записи (write-through).
+
     Методы:
         - add_user: Добавление нового пользователя.
         - set_user_active: Активация пользователя.
@@ -91,10 +245,14 @@ class UsersRepository(AsyncRepository):
         """
         try:
             async with PostgresManager.get_session() as session:
-                query = update(UsersOrm).filter_by(id=user_id).values(is_activate=True)
-                await session.execute(query)
+                query = update(UsersOrm).filter_by(id=user_id).values(is_activate=True).returning(UsersOrm.id)
+                result = await session.execute(query)
+                is_updated = result.scalar() is not None
                 await session.commit()
 
+            if is_updated:
+                await ActivationCache.set_active(user_id)
+
         except SQLAlchemyError as e:
             logger.error(LOGGING_LEXICON["logging"]["database"]["tables"]["activate_sqlalchemy_error"].format(e))
 
@@ -106,18 +264,33 @@ class UsersRepository(AsyncRepository):
         """
         Проверяет, активирован ли пользователь.
 
+        Сначала обращается к `ActivationCache`; при промахе читает из PostgreSQL
+        только колонку `is_activate` (через пул asyncpg, если он создан).
+        Кэшируется только положительный результат (см. `ActivationCache`).
+
         Args:
             user_id (int): ID пользователя Telegram.
 
         Returns:
             Optional[bool]: True если активирован, False если не активирован, None при ошибке.
         """
+        is_active = await ActivationCache.get(user_id)
+        if is_active is not None:
+            return is_active
+
         try:
-            async with PostgresManager.get_session() as session:
-                query = select(UsersOrm).filter_by(id=user_id)
-                result = await session.execute(query)
-                user = result.scalars().first()
-                return user.is_activate if user else False
+            pool = PostgresManager.get_pool()
+            if pool is not None:
+                is_active = bool(await pool.fetchval("SELECT is_activate FROM users WHERE id = $1", user_id))
+            else:
+                async with PostgresManager.get_session() as session:
+                    query = select(UsersOrm.is_activate).filter_by(id=user_id)
+                    result = await session.execute(query)
+                    is_active = bool(result.scalar())
+
+            if is_active:
+                await ActivationCache.set_active(user_id)
+            return is_active
 
         except SQLAlchemyError as e:
             logger.error(LOGGING_LEXICON["logging"]["database"]["tables"]["status_sqlalchemy_error"].format(e))
@@ -131,36 +304,466 @@ class UsersMemoriesRepository(AsyncRepository):
     Репозиторий для работы с памятью пользователей (UsersMemories).
 
     Методы:
-        - safe_memory: Безопасное добавление памяти с защитой от дубликатов.
+        - find_duplicates: Пакетный поиск записей-дубликатов по отпечатку текста или близости векторов.
+        - refresh_memories: Обновление времени записей при объединении с дубликатами.
+        - save_memories_with_eviction: Пакетное добавление памяти с вытеснением давно не использованных записей.
+        - record_usage: Учёт попаданий записей в результаты поиска.
+        - replace_memories: Замена группы записей одной объединённой записью.
         - get_memory: Получение наиболее релевантных сообщений по embedding.
+        - get_user_memories: Получение всех записей памяти пользователя вместе с векторами.
         - count_memories: Подсчет количества сообщений памяти для пользователя.
+
+    Поиск сначала выполняется в `UserVectorStore`; добавленные записи попадают туда при записи (write-through).
+    Векторы сохраняются и ищутся в формате колонки `embedding` (см. `to_storage`).
     """
 
     @staticmethod
-    async def safe_memory(user_id: int, text: str, vector: List[float]) -> None:
+    def to_storage(vector: List[float]) -> np.ndarray:
+        """
+        Приводит embedding к размерности хранения памяти.
+
+        Если колонка короче вектора, вектор укорачивается и нормализуется
+        (эквивалент параметра `dimensions` API embedding для моделей text-embedding-3).
+
+        Args:
+            vector (List[float]): Полный вектор модели embedding.
+
+        Returns:
+            np.ndarray: Вектор float32 размерности колонки.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        dim = UsersMemoriesOrm.embedding.type.dim
+        if dim is not None and len(vector) > dim:
+            vector = vector[:dim]
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector = vector / norm
+        return vector
+
+    @staticmethod
+    def from_storage(value) -> np.ndarray:
+        """
+        Преобразует значение колонки `embedding` (vector или halfvec) в вектор float32.
+
+        Args:
+            value: Значение, полученное из базы.
+
+        Returns:
+            np.ndarray: Вектор float32.
+        """
+        if isinstance(value, HalfVector):
+            value = value.to_numpy()
+        return np.asarray(value, dtype=np.float32)
+
+    @staticmethod
+    async def save_memories_with_eviction(
+        memories: List[Tuple[int, str, List[float]]],
+        limit: int = 50
+    ) -> Tuple[List[Row], Dict[int, int]]:
         """
-        Сохраняет сообщение пользователя в базу памяти.
-        Игнорирует дубликаты сообщений (по уникальному полю message_text).
+        Сохраняет пачку сообщений (возможно, разных пользователей) и освобождает место
+        у пользователей, превысивших лимит, в одной транзакции.
+
+        Сначала одним запросом вставляются записи и увеличивается `users.memories_count`
+        (строки пользователей блокируются FOR UPDATE). Дубликаты по message_text пропускаются,
+        как и повторы одного отпечатка текста (`text_fingerprint`) пользователя внутри пачки.
+        Затем у пользователей, которым действительно добавлены записи и у которых стало больше
+        `limit + 1` записей, удаляются записи, которые дольше всех не использовались
+        (max(created_at, last_used_at)), при равенстве — с меньшим количеством попаданий в поиск.
+        Только что добавленные записи не вытесняются. Если вставка не удалась, ничего не удаляется.
+
+        Args:
+            memories (List[Tuple[int, str, List[float]]]): Записи (user_id, текст, вектор).
+            limit (int): Лимит памяти: у пользователя остаётся не больше `limit + 1` записей.
+
+        Returns:
+            Tuple[List[Row], Dict[int, int]]: Добавленные записи (id, user_id, message_text)
+                                              и количество вытесненных записей по пользователям.
+        """
+        if not memories:
+            return [], {}
+
+        unique = {}
+        for user_id, text, vector in memories:
+            unique.setdefault((user_id, text_fingerprint(text)), (user_id, text, vector))
+        memories = [(user_id, text, UsersMemoriesRepository.to_storage(vector)) for user_id, text, vector in unique.values()]
+        evicted: Dict[int, int] = {}
+        async with PostgresManager.get_session() as session:
+            result = await session.execute(UsersMemoriesRepository._build_save_query(memories))
+            rows = list(result.all())
+            if rows:
+                result = await session.execute(UsersMemoriesRepository._build_evict_query(
+                    {row.user_id for row in rows}, [row.id for row in rows], limit
+                ))
+                evicted = {row.user_id: row.evicted for row in result.all()}
+            await session.commit()
+
+        for user_id in evicted:
+            UserVectorStore.invalidate(user_id)
+        vectors = {(user_id, text): vector for user_id, text, vector in memories}
+        for row in rows:
+            UserVectorStore.add(row.user_id, row.message_text, vectors[(row.user_id, row.message_text)])
+        return rows, evicted
+
+    @staticmethod
+    def _build_save_query(memories: List[Tuple[int, str, List[float]]]) -> Select:
+        """
+        Строит запрос сохранения пачки записей памяти:
+
+            WITH locked AS (SELECT id FROM users WHERE id IN (...) ORDER BY id FOR UPDATE),
+                 inserted AS (INSERT INTO users_memories (user_id, message_text, text_hash, ...)
+                              SELECT ... FROM (VALUES ...) AS batch JOIN locked ON locked.id = batch.user_id
+                              ON CONFLICT (message_text) DO NOTHING RETURNING id, user_id, message_text),
+                 counted AS (UPDATE users SET memories_count = memories_count + n FROM (... GROUP BY user_id))
+            SELECT id, user_id, message_text FROM inserted
+
+        Args:
+            memories (List[Tuple[int, str, List[float]]]): Записи (user_id, текст, вектор).
+
+        Returns:
+            Select: Запрос SQLAlchemy Core.
+        """
+        batch = (
+            values(
+                column("user_id", BIGINT),
+                column("message_text", UsersMemoriesOrm.message_text.type),
+                column("text_hash", UsersMemoriesOrm.text_hash.type),
+                column("embedding", UsersMemoriesOrm.embedding.type),
+                name="batch"
+            )
+            .data([(user_id, text, text_fingerprint(text), vector) for user_id, text, vector in memories])
+        )
+        locked = (
+            select(UsersOrm.id)
+            .where(UsersOrm.id.in_({user_id for user_id, _, _ in memories}))
+            .order_by(UsersOrm.id)  # единый порядок блокировок исключает взаимоблокировки
+            .with_for_update()
+            .cte("locked")
+        )
+        rows = (
+            select(
+                batch.c.user_id,
+                batch.c.message_text,
+                batch.c.text_hash,
+                # Параметры VALUES без явного типа приходят как text, поэтому приводим к vector
+                cast(batch.c.embedding, UsersMemoriesOrm.embedding.type),
+                func.timezone("utc", func.now())
+            )
+            .join(locked, locked.c.id == batch.c.user_id)
+        )
+        inserted = (
+            insert(UsersMemoriesOrm)
+            .from_select(["user_id", "message_text", "text_hash", "embedding", "created_at"], rows)
+            .on_conflict_do_nothing(index_elements=["message_text"])
+            .returning(UsersMemoriesOrm.id, UsersMemoriesOrm.user_id, UsersMemoriesOrm.message_text)
+            .cte("inserted")
+        )
+        per_user = (
+            select(inserted.c.user_id, func.count().label("inserted_count"))
+            .group_by(inserted.c.user_id)
+            .subquery()
+        )
+        counted = (
+            update(UsersOrm)
+            .where(UsersOrm.id == per_user.c.user_id)
+            .values(memories_count=UsersOrm.memories_count + per_user.c.inserted_count)
+            .cte("counted")
+        )
+        return (
+            select(inserted.c.id, inserted.c.user_id, inserted.c.message_text)
+            .add_cte(locked, inserted, counted)
+        )
+
+    @staticmethod
+    async def find_duplicates(
+        memories: List[Tuple[int, str, List[float]]],
+        max_distance: float
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Ищет для каждой записи пачки запись памяти того же пользователя, которую она дублирует:
+        с тем же отпечатком текста (`text_fingerprint`) или с вектором не дальше `max_distance` (L2).
+
+        Для пользователей, чья память загружена в `UserVectorStore`, проверка выполняется в процессе.
+        Остальные записи проверяются одним запросом (LATERAL-подзапрос на каждую запись
+        с точным перебором записей пользователя — их не больше лимита памяти).
+
+        Args:
+            memories (List[Tuple[int, str, List[float]]]): Записи (user_id, текст, вектор).
+            max_distance (float): Максимальное L2-расстояние до дубликата.
+
+        Returns:
+            List[Optional[Tuple[str, str]]]: Для каждой записи — текст найденной записи и тип совпадения
+                                             ("text" или "vector") или None, если дубликата нет.
+        """
+        duplicates: List[Optional[Tuple[str, str]]] = [None] * len(memories)
+        pending = []
+        for ordinal, (user_id, text, vector) in enumerate(memories):
+            text_hash = text_fingerprint(text)
+            vector = UsersMemoriesRepository.to_storage(vector)
+            if UserVectorStore.is_loaded(user_id):
+                duplicates[ordinal] = UserVectorStore.find_duplicate(user_id, text_hash, vector, max_distance)
+            else:
+                pending.append((ordinal, user_id, text_hash, vector))
+
+        if pending:
+            with stage_timer("memory_dedup"):
+                async with PostgresManager.get_session() as session:
+                    rows = (await session.execute(
+                        UsersMemoriesRepository._build_duplicates_query(pending, max_distance)
+                    )).all()
+            for row in rows:
+                duplicates[row.ordinal] = row.message_text, "text" if row.same_text else "vector"
+        return duplicates
+
+    @staticmethod
+    def _build_duplicates_query(pending: List[Tuple[int, int, str, np.ndarray]], max_distance: float) -> Select:
+        """
+        Строит запрос поиска дубликатов пачки записей:
+
+            SELECT batch.ordinal, match.message_text, match.same_text
+            FROM (VALUES ...) AS batch
+            JOIN LATERAL (SELECT message_text, text_hash = batch.text_hash AS same_text FROM users_memories
+                          WHERE user_id = batch.user_id AND (text_hash = batch.text_hash OR embedding <-> batch.embedding <= :d)
+                          ORDER BY same_text DESC NULLS LAST, embedding <-> batch.embedding LIMIT 1) AS match ON true
+
+        Args:
+            pending (List[Tuple[int, int, str, np.ndarray]]): Записи (номер в пачке, user_id, отпечаток, вектор).
+            max_distance (float): Максимальное L2-расстояние до дубликата.
+
+        Returns:
+            Select: Запрос SQLAlchemy Core.
+        """
+        batch = (
+            values(
+                column("ordinal", INTEGER),
+                column("user_id", BIGINT),
+                column("text_hash", UsersMemoriesOrm.text_hash.type),
+                column("embedding", UsersMemoriesOrm.embedding.type),
+                name="batch"
+            )
+            .data(pending)
+        )
+        same_text = UsersMemoriesOrm.text_hash == batch.c.text_hash
+        # Сортировка не только по расстоянию исключает HNSW-индекс: записи пользователя перебираются точно
+        distance = UsersMemoriesOrm.embedding.op("<->")(cast(batch.c.embedding, UsersMemoriesOrm.embedding.type))
+        match = (
+            select(UsersMemoriesOrm.message_text, same_text.label("same_text"))
+            .where(UsersMemoriesOrm.user_id == batch.c.user_id, or_(same_text, distance <= max_distance))
+            .order_by(same_text.desc().nulls_last(), distance)
+            .limit(1)
+            .lateral("match")
+        )
+        return (
+            select(batch.c.ordinal, match.c.message_text, match.c.same_text)
+            .select_from(batch.join(match, true()))
+        )
+
+    @staticmethod
+    async def refresh_memories(memories: List[Tuple[int, str]]) -> None:
+        """
+        Обновляет время создания записей памяти, с которыми объединены дубликаты,
+        чтобы записи считались свежими (одним запросом UPDATE ... FROM VALUES).
+
+        Args:
+            memories (List[Tuple[int, str]]): Записи (user_id, текст существующей записи).
+        """
+        if not memories:
+            return
+
+        batch = (
+            values(column("user_id", BIGINT), column("message_text", String), name="batch")
+            .data(memories)
+        )
+        async with PostgresManager.get_session() as session:
+            await session.execute(
+                update(UsersMemoriesOrm)
+                .where(UsersMemoriesOrm.user_id == batch.c.user_id, UsersMemoriesOrm.message_text == batch.c.message_text)
+                .values(created_at=func.timezone("utc", func.now()))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    @staticmethod
+    def _build_evict_query(user_ids: Set[int], keep_ids: List[int], limit: int) -> Select:
+        """
+        Строит запрос вытеснения записей памяти:
+
+            WITH over AS (SELECT id, memories_count - (:limit + 1) AS excess
+                          FROM users WHERE id IN (...) AND excess > 0 ORDER BY id FOR UPDATE),
+                 ranked AS (SELECT id, excess, row_number() OVER (PARTITION BY user_id
+                                   ORDER BY greatest(created_at, last_used_at), hits, id) AS rank
+                            FROM users_memories JOIN over ON ... WHERE id NOT IN (:keep_ids)),
+                 deleted AS (DELETE FROM users_memories USING ranked WHERE rank <= excess RETURNING user_id),
+                 per_user AS (SELECT user_id, count(*) AS evicted FROM deleted GROUP BY user_id),
+                 counted AS (UPDATE users SET memories_count = memories_count - evicted FROM per_user)
+            SELECT user_id, evicted FROM per_user
+
+        Args:
+            user_ids (Set[int]): Пользователи, которым добавлены записи.
+            keep_ids (List[int]): Только что добавленные записи (не вытесняются).
+            limit (int): Лимит памяти (у пользователя остаётся не больше `limit + 1` записей).
+
+        Returns:
+            Select: Запрос SQLAlchemy Core.
+        """
+        excess = UsersOrm.memories_count - (limit + 1)
+        over = (
+            select(UsersOrm.id, excess.label("excess"))
+            .where(UsersOrm.id.in_(user_ids), excess > 0)
+            .order_by(UsersOrm.id)  # тот же порядок блокировок, что и в `_build_save_query`
+            .with_for_update(of=UsersOrm)
+            .cte("over")
+        )
+        ranked = (
+            select(
+                UsersMemoriesOrm.id,
+                over.c.excess,
+                func.row_number().over(
+                    partition_by=UsersMemoriesOrm.user_id,
+                    order_by=(
+                        func.greatest(UsersMemoriesOrm.created_at, UsersMemoriesOrm.last_used_at),
+                        UsersMemoriesOrm.hits,
+                        UsersMemoriesOrm.id
+                    )
+                ).label("rank")
+            )
+            .select_from(UsersMemoriesOrm)
+            .join(over, over.c.id == UsersMemoriesOrm.user_id)
+            .where(UsersMemoriesOrm.id.notin_(keep_ids))
+            .cte("ranked")
+        )
+        deleted = (
+            delete(UsersMemoriesOrm)
+            .where(UsersMemoriesOrm.id == ranked.c.id, ranked.c.rank <= ranked.c.excess)
+            .returning(UsersMemoriesOrm.user_id)
+            .cte("deleted")
+        )
+        per_user = (
+            select(deleted.c.user_id, func.count().label("evicted"))
+            .group_by(deleted.c.user_id)
+            .cte("per_user")
+        )
+        counted = (
+            update(UsersOrm)
+            .where(UsersOrm.id == per_user.c.user_id)
+            .values(memories_count=UsersOrm.memories_count - per_user.c.evicted)
+            .cte("counted")
+        )
+        return (
+            select(per_user.c.user_id, per_user.c.evicted)
+            .add_cte(over, ranked, deleted, per_user, counted)
+        )
+
+    @staticmethod
+    async def record_usage(usage: List[Tuple[int, str, int, datetime]]) -> None:
+        """
+        Записывает попадания записей памяти в результаты поиска одним запросом
+        (UPDATE ... FROM VALUES): увеличивает `hits` и обновляет `last_used_at`.
+
+        Args:
+            usage (List[Tuple[int, str, int, datetime]]): Записи (user_id, текст, попадания, время последнего попадания).
+        """
+        if not usage:
+            return
+
+        batch = (
+            values(
+                column("user_id", BIGINT),
+                column("message_text", String),
+                column("hits", INTEGER),
+                column("last_used_at", TIMESTAMP),
+                name="batch"
+            )
+            .data(usage)
+        )
+        async with PostgresManager.get_session() as session:
+            await session.execute(
+                update(UsersMemoriesOrm)
+                .where(UsersMemoriesOrm.user_id == batch.c.user_id, UsersMemoriesOrm.message_text == batch.c.message_text)
+                .values(
+                    hits=UsersMemoriesOrm.hits + batch.c.hits,
+                    last_used_at=func.greatest(UsersMemoriesOrm.last_used_at, batch.c.last_used_at)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    @staticmethod
+    async def replace_memories(user_id: int, texts: List[str], text: str, vector: List[float]) -> bool:
+        """
+        Заменяет группу записей памяти пользователя одной объединённой записью (в одной транзакции).
+
+        Объединённая запись наследует суммарное количество попаданий и время последнего
+        использования исходных записей; `users.memories_count` уменьшается на разницу.
+        Строка пользователя блокируется (FOR UPDATE) на всё время замены.
+        Память пользователя сбрасывается в `UserVectorStore`.
 
         Args:
             user_id (int): ID пользователя Telegram.
-            text (str): Текст сообщения.
-            vector (List[float]): Векторное представление сообщения для поиска.
+            texts (List[str]): Тексты заменяемых записей.
+            text (str): Текст объединённой записи.
+            vector (List[float]): Вектор объединённой записи.
+
+        Returns:
+            bool: True, если замена выполнена (исходные записи ещё существовали,
+                  а объединённого текста в памяти ещё нет).
         """
+        vector = UsersMemoriesRepository.to_storage(vector)
         async with PostgresManager.get_session() as session:
-            query = (
+            # Строка пользователя блокируется первой (тот же порядок блокировок, что и в `_build_save_query`):
+            # иначе параллельное сохранение посчитало бы вытеснение по ещё не уменьшенному счётчику
+            await session.execute(select(UsersOrm.id).where(UsersOrm.id == user_id).with_for_update())
+            deleted = (await session.execute(
+                delete(UsersMemoriesOrm)
+                .where(UsersMemoriesOrm.user_id == user_id, UsersMemoriesOrm.message_text.in_(texts))
+                .returning(UsersMemoriesOrm.hits, UsersMemoriesOrm.last_used_at)
+                .execution_options(synchronize_session=False)
+            )).all()
+            if not deleted:
+                await session.rollback()
+                return False
+
+            used_at = [row.last_used_at for row in deleted if row.last_used_at is not None]
+            inserted = (await session.execute(
                 insert(UsersMemoriesOrm)
-                .values(user_id=user_id, message_text=text, embedding=vector)
-                .on_conflict_do_nothing(index_elements=['message_text'])
+                .values(
+                    user_id=user_id,
+                    message_text=text,
+                    text_hash=text_fingerprint(text),
+                    embedding=vector,
+                    created_at=func.timezone("utc", func.now()),
+                    hits=sum(row.hits for row in deleted),
+                    last_used_at=max(used_at, default=None)
+                )
+                .on_conflict_do_nothing(index_elements=["message_text"])
+                .returning(UsersMemoriesOrm.id)
+            )).first()
+            if inserted is None:
+                # Такой текст уже сохранён (возможно, у другого пользователя): группу не удаляем
+                await session.rollback()
+                return False
+
+            await session.execute(
+                update(UsersOrm)
+                .where(UsersOrm.id == user_id)
+                .values(memories_count=UsersOrm.memories_count - len(deleted) + 1)
+                .execution_options(synchronize_session=False)
             )
-            await session.execute(query)
             await session.commit()
 
+        UserVectorStore.invalidate(user_id)
+        return True
+
     @staticmethod
     async def get_memory(user_id: int, vector: List[float], limit: int = 5) -> List[str]:
         """
         Получает релевантные сообщения памяти пользователя по embedding.
 
+        Если память пользователя загружена в `UserVectorStore`, поиск выполняется в процессе.
+        Иначе запрос идёт в pgvector, а память пользователя загружается в хранилище в фоне.
+        Если создан пул asyncpg, запрос выполняется на нём как подготовленное выражение,
+        а вектор передаётся в бинарном виде.
+
         Args:
             user_id (int): ID пользователя Telegram.
             vector (List[float]): Вектор запроса для поиска похожих сообщений.
@@ -169,21 +772,68 @@ class UsersMemoriesRepository(AsyncRepository):
         Returns:
             List[str]: Список текстов сообщений, наиболее релевантных запросу.
         """
+        vector = UsersMemoriesRepository.to_storage(vector)
+        cached = UserVectorStore.search(user_id, vector, limit)
+        if cached is not None:
+            return cached
+
+        UserVectorStore.schedule_load(user_id, lambda: UsersMemoriesRepository.get_user_memories(user_id))
+
+        with stage_timer("pgvector_search"):
+            pool = PostgresManager.get_pool()
+            if pool is not None:
+                rows = await pool.fetch(
+                    "SELECT message_text FROM users_memories WHERE user_id = $1 ORDER BY embedding <-> $2 LIMIT $3",
+                    user_id, vector, limit
+                )
+                return [row["message_text"] for row in rows]
+
+            async with PostgresManager.get_session() as session:
+                query = (
+                    select(UsersMemoriesOrm.message_text)
+                    .filter_by(user_id=user_id)
+                    .order_by(UsersMemoriesOrm.embedding.op("<->")(vector))
+                    .limit(limit)
+                )
+
+                result = await session.execute(query)
+                return list(result.scalars().all())
+
+    @staticmethod
+    async def get_user_memories(user_id: int) -> List[Tuple[str, np.ndarray]]:
+        """
+        Возвращает все записи памяти пользователя вместе с векторами (для загрузки в `UserVectorStore`).
+
+        Args:
+            user_id (int): ID пользователя Telegram.
+
+        Returns:
+            List[Tuple[str, np.ndarray]]: Записи (текст, вектор) в порядке добавления.
+        """
+        pool = PostgresManager.get_pool()
+        if pool is not None:
+            rows = await pool.fetch(
+                "SELECT message_text, embedding FROM users_memories WHERE user_id = $1 ORDER BY id",
+                user_id
+            )
+            return [(row["message_text"], UsersMemoriesRepository.from_storage(row["embedding"])) for row in rows]
+
         async with PostgresManager.get_session() as session:
             query = (
-                select(UsersMemoriesOrm.message_text)
+                select(UsersMemoriesOrm.message_text, UsersMemoriesOrm.embedding)
                 .filter_by(user_id=user_id)
-                .order_by(UsersMemoriesOrm.embedding.op("<->")(vector))
-                .limit(limit)
+                .order_by(UsersMemoriesOrm.id)
             )
 
             result = await session.execute(query)
-            return list(result.scalars().all())
+            return [(row.message_text, UsersMemoriesRepository.from_storage(row.embedding)) for row in result.all()]
 
     @staticmethod
     async def count_memories(user_id: int) -> int:
         """
-        Подсчитывает количество сохраненных сообщений памяти пользователя.
+        Возвращает количество сохраненных сообщений памяти пользователя.
+
+        Читает поддерживаемый счётчик `users.memories_count` вместо COUNT(*) по таблице памяти.
 
         Args:
             user_id (int): ID пользователя Telegram.
@@ -191,7 +841,100 @@ class UsersMemoriesRepository(AsyncRepository):
         Returns:
             int: Количество сообщений памяти пользователя.
         """
+        pool = PostgresManager.get_pool()
+        if pool is not None:
+            return await pool.fetchval("SELECT memories_count FROM users WHERE id = $1", user_id) or 0
+
+        async with PostgresManager.get_session() as session:
+            query = select(UsersOrm.memories_count).filter_by(id=user_id)
+            result = await session.execute(query)
+            return result.scalar() or 0
+
+
+class ResponseCacheRepository(AsyncRepository):
+    """
+    Репозиторий семантического кэша ответов модели.
+
+    Методы:
+        - find_reply: Поиск ближайшего по косинусному расстоянию закэшированного ответа.
+        - save_reply: Сохранение ответа модели.
+        - evict: Удаление устаревших записей и записей сверх лимита.
+    """
+
+    @staticmethod
+    async def find_reply(model: str, vector: List[float], ttl: int) -> Optional[Row]:
+        """
+        Находит закэшированный ответ, запрос которого ближе всего к переданному embedding.
+
+        Args:
+            model (str): Чат-модель, ответы которой ищутся.
+            vector (List[float]): Embedding запроса пользователя.
+            ttl (int): Время жизни записи (секунды); более старые записи не учитываются.
+
+        Returns:
+            Optional[Row]: Запись (reply, generation_ms, distance) или None, если кэш пуст.
+        """
+        distance = ResponseCacheOrm.embedding.cosine_distance(vector)
         async with PostgresManager.get_session() as session:
-            query = select(func.count()).select_from(UsersMemoriesOrm).filter_by(user_id=user_id)
+            query = (
+                select(ResponseCacheOrm.reply, ResponseCacheOrm.generation_ms, distance.label("distance"))
+                .where(
+                    ResponseCacheOrm.model == model,
+                    ResponseCacheOrm.created_at >= datetime.utcnow() - timedelta(seconds=ttl)
+                )
+                .order_by(distance)
+                .limit(1)
+            )
+
             result = await session.execute(query)
-            return result.scalar()
+            return result.first()
+
+    @staticmethod
+    async def save_reply(model: str, prompt_text: str, vector: List[float], reply: str, generation_ms: int) -> None:
+        """
+        Сохраняет ответ модели в кэш.
+
+        Args:
+            model (str): Чат-модель, сгенерировавшая ответ.
+            prompt_text (str): Текст запроса пользователя.
+            vector (List[float]): Embedding запроса.
+            reply (str): Ответ модели.
+            generation_ms (int): Длительность генерации ответа (мс).
+        """
+        async with PostgresManager.get_session() as session:
+            session.add(ResponseCacheOrm(
+                model=model,
+                prompt_text=prompt_text,
+                embedding=vector,
+                reply=reply,
+                generation_ms=generation_ms
+            ))
+            await session.commit()
+
+    @staticmethod
+    async def evict(ttl: int, max_entries: int) -> int:
+        """
+        Удаляет записи старше TTL, а затем самые старые записи сверх `max_entries`.
+
+        Args:
+            ttl (int): Время жизни записи (секунды).
+            max_entries (int): Максимальное количество записей в кэше.
+
+        Returns:
+            int: Количество удалённых записей.
+        """
+        async with PostgresManager.get_session() as session:
+            expired = await session.execute(
+                delete(ResponseCacheOrm)
+                .where(ResponseCacheOrm.created_at < datetime.utcnow() - timedelta(seconds=ttl))
+            )
+            overflow = await session.execute(
+                delete(ResponseCacheOrm)
+                .where(ResponseCacheOrm.id.in_(
+                    select(ResponseCacheOrm.id)
+                    .order_by(ResponseCacheOrm.created_at.desc())
+                    .offset(max_entries)
+                ))
+            )
+            await session.commit()
+            return expired.rowcount + overflow.rowcount
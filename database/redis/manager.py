@@ -9,11 +9,13 @@ class RedisManager:
     Основные функции:
     - Инициализация единственного клиента Redis.
     - Получение доступа к клиенту для выполнения команд Redis.
+    - Отдельный клиент без декодирования ответов для бинарных значений (векторы и т.п.).
 
     Примечание:
     Использует паттерн Singleton для единственного экземпляра клиента.
     """
     __client: Optional[Redis] = None
+    __binary_client: Optional[Redis] = None
 
     @classmethod
     def init(cls, redis_url: str) -> None:
@@ -24,6 +26,7 @@ class RedisManager:
             redis_url (str): URL для подключения к Redis (например, "redis://localhost:6379/0").
         """
         cls.__client = from_url(redis_url, decode_responses=True)
+        cls.__binary_client = from_url(redis_url, decode_responses=False)
 
     @classmethod
     def get_client(cls) -> Optional[Redis]:
@@ -34,3 +37,13 @@ class RedisManager:
             Optional[Redis]: Объект Redis, если был инициализирован, иначе None.
         """
         return cls.__client
+
+    @classmethod
+    def get_binary_client(cls) -> Optional[Redis]:
+        """
+        Возвращает Redis-клиент, который не декодирует ответы в строки.
+
+        Returns:
+            Optional[Redis]: Объект Redis, если был инициализирован, иначе None.
+        """
+        return cls.__binary_client
@@ -1,53 +1,281 @@
+from typing import List, Optional
+
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+
 from database.redis.manager import RedisManager
 
 
+# Lua-скрипт записи истории: добавление, обрезка по бюджету токенов и продление TTL за один round trip.
+# KEYS[1] — ключ истории; ARGV: бюджет токенов, максимум записей, TTL (секунды)
+# и новые записи от старых к новым.
+# Токены записи читаются из её заголовка (`core.utils.history`); для записей прежнего
+# формата (строки "User: ...") оцениваются по длине. Самая новая запись сохраняется всегда.
+PUSH_HISTORY_SCRIPT = """
+local key = KEYS[1]
+local budget = tonumber(ARGV[1])
+local max_entries = tonumber(ARGV[2])
+for i = 4, #ARGV do
+    redis.call('LPUSH', key, ARGV[i])
+end
+local entries = redis.call('LRANGE', key, 0, max_entries - 1)
+local used, keep = 0, 0
+for i, entry in ipairs(entries) do
+    local flag = string.byte(entry, 1)
+    local tokens
+    if (flag == 1 or flag == 2) and #entry >= 3 then
+        tokens = string.byte(entry, 2) * 256 + string.byte(entry, 3)
+    else
+        tokens = math.ceil(#entry / 3)
+    end
+    if keep > 0 and used + tokens > budget then
+        break
+    end
+    used = used + tokens
+    keep = i
+end
+redis.call('LTRIM', key, 0, keep - 1)
+redis.call('EXPIRE', key, tonumber(ARGV[3]))
+return keep
+"""
+
+
 class RedisMemoriesRepository:
     """
     Репозиторий для работы с краткосрочной памятью пользователей в Redis.
 
-    Хранит историю сообщений чата пользователя и позволяет получать последние N сообщений.
+    Хранит историю сообщений чата пользователя (ключ "chat:{user_id}:history", от новых к старым)
+    в виде сериализованных записей `core.utils.history`.
+
+    - История обрезается по бюджету токенов (не больше `max_entries` записей) атомарно при записи.
+    - TTL ключа продлевается при каждой записи и чтении: история неактивных пользователей удаляется.
     """
 
+    __push_script: Optional[AsyncScript] = None
+
     @staticmethod
-    async def save_memory(user_id: int, text: str, limit: int = 10) -> None:
+    def build_key(user_id: int) -> str:
         """
-        Сохраняет сообщение пользователя в Redis.
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            str: Ключ истории вида "chat:{user_id}:history".
+        """
+        return f"chat:{user_id}:history"
+
+    @classmethod
+    def _get_push_script(cls, client: Redis) -> AsyncScript:
+        """Возвращает Lua-скрипт записи истории, зарегистрированный для клиента (EVALSHA с откатом на EVAL)."""
+        if cls.__push_script is None or cls.__push_script.registered_client is not client:
+            cls.__push_script = client.register_script(PUSH_HISTORY_SCRIPT)
+        return cls.__push_script
 
-        Логика:
-        1. Формирует ключ в формате "chat:{user_id}:history".
-        2. Добавляет новое сообщение в начало списка (LPUSH).
-        3. Обрезает список до указанного лимита (LTRIM).
+    @classmethod
+    async def save_memories(
+        cls,
+        user_id: int,
+        entries: List[bytes],
+        token_budget: int = 1500,
+        max_entries: int = 20,
+        ttl: int = 7 * 24 * 60 * 60
+    ) -> None:
+        """
+        Сохраняет записи истории пользователя в Redis за один round trip.
+
+        LPUSH, обрезка по бюджету токенов (LTRIM) и EXPIRE выполняются атомарно одним Lua-скриптом.
+        Записи добавляются в начало списка в переданном порядке, поэтому последняя из них становится самой новой.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            entries (List[bytes]): Сериализованные записи (`HistoryCodec.encode`) от старых к новым.
+            token_budget (int, optional): Бюджет токенов истории. По умолчанию 1500.
+            max_entries (int, optional): Максимальное количество записей в истории. По умолчанию 20.
+            ttl (int, optional): Время жизни истории с последнего обращения (секунды). По умолчанию 7 дней.
+        """
+        client = RedisManager.get_binary_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        script = cls._get_push_script(client)
+        await script(keys=[cls.build_key(user_id)], args=[token_budget, max_entries, ttl, *entries])
+
+    @staticmethod
+    async def get_memories(user_id: int, max_entries: int = 20, ttl: int = 7 * 24 * 60 * 60) -> List[bytes]:
+        """
+        Получает последние записи истории пользователя из Redis и продлевает её TTL.
+
+        LRANGE и EXPIRE отправляются одним pipeline-запросом.
 
         Args:
             user_id (int): Идентификатор пользователя.
-            text (str): Сообщение для сохранения.
-            limit (int, optional): Максимальное количество сообщений в истории. По умолчанию 10.
+            max_entries (int, optional): Количество записей для извлечения. По умолчанию 20.
+            ttl (int, optional): Время жизни истории с последнего обращения (секунды). По умолчанию 7 дней.
+
+        Returns:
+            List[bytes]: Сериализованные записи в порядке от последних к старым.
+        """
+        client = RedisManager.get_binary_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        key = RedisMemoriesRepository.build_key(user_id)
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.lrange(key, 0, max_entries - 1)
+            pipe.expire(key, ttl)
+            history, _ = await pipe.execute()
+        return history
+
+    @staticmethod
+    async def expire_histories(ttl: int, batch_size: int = 1000) -> int:
+        """
+        Назначает TTL историям, у которых его нет (записанным до появления TTL).
+
+        Ключи перебираются через SCAN; TTL проверяется и назначается пачками через pipeline.
+
+        Args:
+            ttl (int): Время жизни истории (секунды).
+            batch_size (int, optional): Размер пачки ключей. По умолчанию 1000.
+
+        Returns:
+            int: Количество ключей, которым был назначен TTL.
+        """
+        client = RedisManager.get_binary_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+
+        async def expire_batch(keys: List[bytes]) -> int:
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.ttl(key)
+                ttls = await pipe.execute()
+            persistent = [key for key, key_ttl in zip(keys, ttls) if key_ttl == -1]
+            if persistent:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key in persistent:
+                        pipe.expire(key, ttl)
+                    await pipe.execute()
+            return len(persistent)
+
+        expired = 0
+        keys: List[bytes] = []
+        async for key in client.scan_iter(match=RedisMemoriesRepository.build_key("*"), count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size:
+                expired += await expire_batch(keys)
+                keys = []
+        if keys:
+            expired += await expire_batch(keys)
+        return expired
+
+
+class RedisEmbeddingsRepository:
+    """
+    Репозиторий общего (между процессами) кэша embedding в Redis.
+
+    Векторы хранятся в компактном бинарном виде (float32) с ограниченным временем жизни.
+    """
+
+    @staticmethod
+    async def get_embedding(key: str) -> Optional[bytes]:
+        """
+        Получает закэшированный вектор.
+
+        Args:
+            key (str): Ключ вида "embedding:{model}:{fingerprint}".
+
+        Returns:
+            Optional[bytes]: Бинарное представление вектора или None, если его нет в кэше.
+        """
+        client = RedisManager.get_binary_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        return await client.get(key)
+
+    @staticmethod
+    async def save_embedding(key: str, data: bytes, ttl: int) -> None:
+        """
+        Сохраняет вектор в кэш.
+
+        Args:
+            key (str): Ключ вида "embedding:{model}:{fingerprint}".
+            data (bytes): Бинарное представление вектора.
+            ttl (int): Время жизни записи в секундах.
+        """
+        client = RedisManager.get_binary_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        await client.set(key, data, ex=ttl)
+
+
+class RedisVerdictsRepository:
+    """
+    Репозиторий общего (между процессами) кэша решений AI-фильтра в Redis.
+    """
+
+    @staticmethod
+    async def get_verdict(key: str) -> Optional[str]:
+        """
+        Получает закэшированное решение.
+
+        Args:
+            key (str): Ключ вида "verdict:{model}:{fingerprint}".
+
+        Returns:
+            Optional[str]: "да", "нет" или None, если решения нет в кэше.
         """
         client = RedisManager.get_client()
         if client is None:
             raise RuntimeError("Redis client is not initialized")
-        key = f"chat:{user_id}:history"
-        await client.lpush(key, text)
-        await client.ltrim(key, 0, limit - 1)
+        return await client.get(key)
 
     @staticmethod
-    async def get_memories(user_id: int, limit: int = 10) -> list[str]:
+    async def save_verdict(key: str, verdict: str, ttl: int) -> None:
+        """
+        Сохраняет решение в кэш.
+
+        Args:
+            key (str): Ключ вида "verdict:{model}:{fingerprint}".
+            verdict (str): Решение модели ("да" или "нет").
+            ttl (int): Время жизни записи в секундах.
         """
-        Получает последние сообщения пользователя из Redis.
+        client = RedisManager.get_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        await client.set(key, verdict, ex=ttl)
+
+
+class RedisUsersRepository:
+    """
+    Репозиторий общего (между процессами) кэша статуса активации пользователей в Redis.
+    """
 
-        Логика:
-        1. Формирует ключ в формате "chat:{user_id}:history".
-        2. Возвращает последние `limit` сообщений (LRANGE).
+    @staticmethod
+    async def get_activation(user_id: int) -> bool:
+        """
+        Проверяет, закэширована ли активация пользователя.
 
         Args:
             user_id (int): Идентификатор пользователя.
-            limit (int, optional): Количество сообщений для извлечения. По умолчанию 10.
 
         Returns:
-            list[str]: Список сообщений пользователя в порядке от последних к старым.
+            bool: True, если пользователь закэширован как активированный
+                  (отсутствие записи и значения прежнего формата "0" — промах).
+        """
+        client = RedisManager.get_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        value = await client.get(f"user:{user_id}:active")
+        return value == "1"
+
+    @staticmethod
+    async def save_activation(user_id: int, ttl: int) -> None:
+        """
+        Сохраняет в кэш активацию пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            ttl (int): Время жизни записи в секундах.
         """
         client = RedisManager.get_client()
         if client is None:
             raise RuntimeError("Redis client is not initialized")
-        key = f"chat:{user_id}:history"
-        return await client.lrange(key, 0, limit - 1)
+        await client.set(f"user:{user_id}:active", "1", ex=ttl)
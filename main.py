@@ -1,63 +1,31 @@
 import asyncio
 import logging
 
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from openai import AsyncOpenAI
-
-from bot.handlers import common, chat
+from bot.setup import setup_bot, shutdown_bot
+from bot.webhook import run_webhook
 from core.lexicon import LOGGING_LEXICON
 from core.config import load_config, Config
 from core.loggers import setup_logging
-from core.utils.enums import OpenAiModels
-from database.setup import setup_db_connections
 
 
 async def main(config: Config):
     """
     Основная точка входа для запуска Telegram-бота.
 
-    Инициализирует Telegram-бота, подключает обработчики,
-    настраивает соединения с базами данных и OpenAI,
-    запускает цикл обработки апдейтов.
+    В режиме webhook (`BOT_MODE=webhook`) запускает HTTP-сервер и, при необходимости,
+    процессы-обработчики апдейтов (см. `bot.webhook.run_webhook`).
+    В режиме polling инициализирует бота, обработчики, соединения с базами данных
+    и OpenAI и запускает цикл long polling.
 
     Args:
         config (Config): Объект конфигурации приложения с параметрами бота, БД и API.
     """
+    if config.tg_bot.mode == "webhook":
+        await run_webhook(config)
+        return
 
-    # --- Инициализация Telegram-бота ---
-    bot = Bot(
-        token=config.tg_bot.token,
-        default=DefaultBotProperties(parse_mode="Markdown")
-    )
-    dp = Dispatcher()
-
-    # --- Подключение роутеров (обработчиков команд и сообщений) ---
-    dp.include_routers(
-        common.router,
-        chat.router
-    )
-
-    # --- Инициализация подключений к базам данных ---
-    await setup_db_connections(
-        postgres_url=config.postgres.asyncpg_url,
-        redis_url=config.redis_url
-    )
-
-    # --- Инициализация OpenAI клиента ---
-    openai_client = AsyncOpenAI(
-        api_key=config.aitunnel_api_key,
-        base_url="https://api.aitunnel.ru/v1/"
-    )
-
-    # --- Общие данные, доступные во всех обработчиках ---
-    dp.workflow_data.update({
-        "admin_ids": config.tg_bot.admin_ids,
-        "openai_client": openai_client,
-        "chat_model": OpenAiModels.GPT_5_MINI.value,
-        "filter_model": OpenAiModels.GPT_5_NANO.value,
-        "embedding_model": OpenAiModels.TEXT_EMBEDDING_3_SMALL.value
-    })
+    # --- Инициализация бота, обработчиков, баз данных и кэшей ---
+    bot, dp = await setup_bot(config)
 
     # --- Удаляем апдейты, пришедшие до старта бота ---
     await bot.delete_webhook(drop_pending_updates=True)
@@ -67,9 +35,8 @@ async def main(config: Config):
         # --- Запуск цикла обработки апдейтов ---
         await dp.start_polling(bot)
     finally:
-        logger.info(LOGGING_LEXICON["logging"]["bot"]["stop"])
-        # --- Корректное завершение работы и закрытие сессии бота ---
-        await bot.session.close()
+        # --- Корректное завершение работы ---
+        await shutdown_bot(bot, dp)
 
 
 if __name__ == '__main__':
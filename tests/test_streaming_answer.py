@@ -0,0 +1,48 @@
+import asyncio
+from typing import List
+
+from core.utils.chat import StreamingAnswer
+
+
+class FakeMessage:
+    """Сообщение Telegram, запоминающее свой последний текст."""
+
+    def __init__(self, sent: List["FakeMessage"], text: str = ""):
+        self.sent = sent
+        self.text = text
+
+    async def answer(self, text: str, parse_mode=None) -> "FakeMessage":
+        message = FakeMessage(self.sent, text)
+        self.sent.append(message)
+        return message
+
+    async def edit_text(self, text: str, parse_mode=None) -> None:
+        self.text = text
+
+
+def stream(deltas: List[str], max_len: int) -> List[str]:
+    sent: List[FakeMessage] = []
+    placeholder = FakeMessage(sent, "...")
+    sent.append(placeholder)
+
+    async def run() -> None:
+        answer = StreamingAnswer(placeholder, edit_interval=0, max_len=max_len)
+        for delta in deltas:
+            await answer.feed(delta)
+        await answer.finish("fallback")
+
+    asyncio.run(run())
+    return [message.text for message in sent]
+
+
+def test_leading_whitespace_does_not_shift_continuation_messages():
+    lines = [f"line{i:02d} abcdefghij\n" for i in range(10)]
+    messages = stream(["\n\n", " "] + lines, max_len=50)
+
+    assert len(messages) > 1
+    assert "".join(messages) == "".join(lines).rstrip()
+    assert all(message.startswith("line") for message in messages)
+
+
+def test_whitespace_only_reply_uses_fallback():
+    assert stream(["\n", "  ", "\n"], max_len=50) == ["fallback"]